@@ -1,11 +1,11 @@
 import streamlit as st
-import json
+import os
+import sys
 import pandas as pd
 import plotly.express as px
 import requests
 import requests
 from datetime import datetime, timedelta
-from collections import defaultdict
 from st_aggrid import AgGrid, GridOptionsBuilder
 from telegram import Bot
 import asyncio
@@ -14,6 +14,14 @@ import re
 from wordcloud import WordCloud
 import matplotlib.pyplot as plt
 
+# Modul penyimpanan bersama dengan bot
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "telegram-bot"))
+from storage import open_store, default_json_paths
+
+# Konfigurasi penyimpanan (harus sama dengan STORAGE_BACKEND dan SQLITE_DB_FILE di bot)
+STORAGE_BACKEND = "sqlite"
+SQLITE_DB_FILE = "antijudi.db"
+
 # Fungsi Cek User
 def is_user_in_group(group_id, user_id):
     url = f"https://api.telegram.org/bot{BOT_TOKEN}/getChatMember"
@@ -132,18 +140,19 @@ def kirim_dm(user_id, text):
     response = requests.post(url, json=payload)
     return response.status_code == 200
 
-# Fungsi load file JSON
-def load_json(file):
-    with open(file, "r") as f:
-        return json.load(f)
+# Store dibuka sekali per proses Streamlit (bukan setiap rerun) dan dipakai bersama semua sesi
+@st.cache_resource
+def get_store():
+    return open_store(STORAGE_BACKEND, default_json_paths(), db_path=SQLITE_DB_FILE)
 
-# Load semua data
-violations = load_json("violations.json")
-non_violations = load_json("non_violations.json")
-mute_data = load_json("mute_tracker.json")
-ban_data = load_json("banned_users.json")
-active_groups = load_json("active_groups.json")
-user_started = load_json("user_started.json")
+# Load semua data (pesan tidak dimuat seluruhnya, tapi di-query sesuai kebutuhan tab)
+store = get_store()
+store.refresh()
+mute_data = store.load_document("mute_tracker")
+ban_data = store.load_document("banned_users")
+active_groups = store.load_document("active_groups")
+user_started = store.load_document("users_started")
+entity_reputation = store.load_document("entity_reputation")
 
 # Inisialisasi waktu pertama kali jika belum ada
 if "last_update_time" not in st.session_state:
@@ -185,7 +194,7 @@ if tab == "📈 Statistik":
     with col1:
         st.metric("Total Grup Aktif", len(active_groups))
     with col2:
-        total_violations = sum([len(v) for v in violations.values()])
+        total_violations = store.count_messages("violation")
         st.metric("Total Pelanggaran", total_violations)
     with col3:
         st.metric("Total User Mute", len(mute_data))
@@ -194,28 +203,19 @@ if tab == "📈 Statistik":
 
     st.divider()
 
+    # Jumlah pelanggaran per tanggal dan grup (dipakai semua grafik)
+    df_counts = pd.DataFrame(store.count_by_date_group("violation"), columns=["Tanggal", "Grup", "Jumlah"])
+
     # Pie chart
     st.subheader("📌 Persentase Pelanggaran Grup")
-    group_counts = defaultdict(int)
-    for user_id, logs in violations.items():
-        for v in logs:
-            group_counts[v['group_name']] += 1
-    pie_df = pd.DataFrame(group_counts.items(), columns=["Grup", "Jumlah"])
+    pie_df = df_counts.groupby("Grup", as_index=False)["Jumlah"].sum()
     fig_pie = px.pie(pie_df, names='Grup', values='Jumlah', hole=0.4)
     fig_pie.update_traces(textposition='inside', textinfo='percent+label')
     st.plotly_chart(fig_pie, use_container_width=True)
 
     # Histogram pelanggaran
     st.subheader("📊 Grafik Jumlah Pelanggaran Grup")
-    df_number = []
-    for user_id, logs in violations.items():
-        for v in logs:
-            date = v['timestamp'].split()[0]
-            df_number.append({
-                "Tanggal": date,
-                "Grup": v['group_name']
-            })
-    df_number = pd.DataFrame(df_number)
+    df_number = df_counts
     filter_grup_jumlah = st.multiselect(
         "Filter Grup (Jumlah Pelanggaran)",
         options=df_number["Grup"].unique(),
@@ -223,7 +223,7 @@ if tab == "📈 Statistik":
         key="jumlah_pelanggaran_filter"
     )
     df_filtered_jumlah = df_number[df_number["Grup"].isin(filter_grup_jumlah)]
-    fig_number = px.histogram(df_filtered_jumlah, x="Tanggal", color="Grup", barmode="group")
+    fig_number = px.histogram(df_filtered_jumlah, x="Tanggal", y="Jumlah", color="Grup", barmode="group", histfunc="sum")
     fig_number.update_layout(xaxis_title="Tanggal", yaxis_title="Jumlah Pelanggaran")
     st.plotly_chart(fig_number, use_container_width=True)
     
@@ -231,15 +231,7 @@ if tab == "📈 Statistik":
 
     # Grafik tren pelanggaran
     st.subheader("📈 Grafik Tren Pelanggaran Grup")
-    df_trend = []
-    for user_id, logs in violations.items():
-        for v in logs:
-            date = v['timestamp'].split()[0]
-            df_trend.append({
-                "Tanggal": date,
-                "Grup": v['group_name']
-            })
-    df_trend = pd.DataFrame(df_trend)
+    df_trend = df_counts
     filter_grup_tren = st.multiselect(
         "Filter Grup (Tren Pelanggaran)",
         options=df_trend["Grup"].unique(),
@@ -247,7 +239,7 @@ if tab == "📈 Statistik":
         key="tren_pelanggaran_filter"
     )
     df_filtered_tren = df_trend[df_trend["Grup"].isin(filter_grup_tren)]
-    trend_df = df_filtered_tren.groupby(["Tanggal", "Grup"]).size().reset_index(name="Jumlah")
+    trend_df = df_filtered_tren.sort_values("Tanggal")
     fig_trend = px.line(trend_df, x="Tanggal", y="Jumlah", color="Grup")
     fig_trend.update_layout(xaxis_title="Tanggal", yaxis_title="Jumlah Pelanggaran")
     st.plotly_chart(fig_trend, use_container_width=True)
@@ -256,15 +248,7 @@ if tab == "📈 Statistik":
 
     # Heatmap
     st.subheader("🔥 Heatmap Pelanggaran")
-    df_heatmap = []
-    for user_id, logs in violations.items():
-        for v in logs:
-            date = v['timestamp'].split()[0]
-            df_heatmap.append({
-                "Tanggal": date,
-                "Grup": v['group_name']
-            })
-    df_heatmap = pd.DataFrame(df_heatmap)
+    df_heatmap = df_counts
 
     # Multiselect untuk filter grup khusus heatmap
     filter_grup_heatmap = st.multiselect(
@@ -274,7 +258,7 @@ if tab == "📈 Statistik":
         key="heatmap_filter"
     )
     df_filtered_heatmap = df_heatmap[df_heatmap["Grup"].isin(filter_grup_heatmap)]
-    heatmap_df = df_filtered_heatmap.groupby(["Grup", "Tanggal"]).size().reset_index(name='Jumlah')
+    heatmap_df = df_filtered_heatmap.groupby(["Grup", "Tanggal"], as_index=False)["Jumlah"].sum()
     heatmap_pivot = heatmap_df.pivot(index='Grup', columns='Tanggal', values='Jumlah').fillna(0)
     fig_heatmap = px.imshow(
         heatmap_pivot,
@@ -290,7 +274,7 @@ if tab == "📈 Statistik":
     # WordCloud
     st.subheader("☁️ WordCloud Pesan Pelanggaran")
     # Ambil semua nama grup dari data pelanggaran
-    all_group_names = sorted(set(v["group_name"] for logs in violations.values() for v in logs))
+    all_group_names = store.group_names("violation")
     # Multiselect untuk memilih grup
     selected_groups_wc = st.multiselect(
         "Filter Grup (WordCloud)",
@@ -299,12 +283,7 @@ if tab == "📈 Statistik":
         key="wordcloud_group_filter"
     )
     # Gabungkan pesan dari grup yang dipilih
-    filtered_texts = [
-        log["message"]
-        for logs in violations.values()
-        for log in logs
-        if log["group_name"] in selected_groups_wc
-    ]
+    filtered_texts = store.message_texts("violation", selected_groups_wc)
     # Gabungkan jadi satu teks besar
     combined_text = " ".join(filtered_texts)
     # Bersihkan kata-kata 1 huruf (misalnya: "x", "m", "d", dll)
@@ -325,6 +304,25 @@ if tab == "📈 Statistik":
     st.markdown("<br>", unsafe_allow_html=True)
     st.divider()
 
+    # Reputasi entitas (link, domain, nomor telepon) dari index reputasi bot
+    st.subheader("🔗 Reputasi Link, Domain & Nomor")
+    if entity_reputation:
+        reputation_df = pd.DataFrame.from_dict(entity_reputation, orient="index").reset_index()
+        reputation_df = reputation_df[["index", "kind", "bad", "clean", "hits", "last_seen"]]
+        reputation_df.columns = ["Entitas", "Jenis", "Judi", "Bersih", "Hit", "Terakhir Terlihat"]
+        reputation_df["Entitas"] = reputation_df["Entitas"].str.split(":", n=1).str[1]
+        reputation_df = reputation_df.sort_values(["Hit", "Terakhir Terlihat"], ascending=False)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Entitas Terpantau", len(reputation_df))
+        col2.metric("Total Hit", int(reputation_df["Hit"].sum()))
+        col3.metric("Entitas Dengan Hit", int((reputation_df["Hit"] > 0).sum()))
+        st.dataframe(reputation_df, use_container_width=True, hide_index=True)
+    else:
+        st.info("Belum ada data reputasi link, domain atau nomor telepon.")
+
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.divider()
+
     # Tabel verifikasi
     st.subheader("✅ Users Terverifikasi (/start Bot)")
     verified_df = pd.DataFrame.from_dict(user_started, orient="index").reset_index()
@@ -381,33 +379,17 @@ elif tab == "📄 Pesan & Pelanggaran":
 
     combined_data = []
 
-    for user_id in set(list(violations.keys()) + list(non_violations.keys())):
-        vio_logs = violations.get(user_id, [])
-        non_vio_logs = non_violations.get(user_id, [])
-
-        group_ids = set([entry["group_id"] for entry in vio_logs + non_vio_logs])
-
-        for group_id in group_ids:
-            vio_in_group = [v for v in vio_logs if v["group_id"] == group_id]
-            non_vio_in_group = [v for v in non_vio_logs if v["group_id"] == group_id]
-
-            # Cek data referensi
-            if vio_in_group:
-                ref_entry = vio_in_group[0]
-            elif non_vio_in_group:
-                ref_entry = non_vio_in_group[0]
-            else:
-                continue  # tidak ada data yang valid, skip
-
-            combined_data.append({
-                "User ID": user_id,
-                "Username": ref_entry.get("username", ""),
-                "Name": ref_entry.get("name", ""),
-                "Grup": ref_entry.get("group_name", f"ID: {group_id}"),
-                "Total": len(vio_in_group) + len(non_vio_in_group),
-                "Bersih": len(non_vio_in_group),
-                "Melanggar": len(vio_in_group)
-            })
+    # Rekap per user dan grup (data referensi dari pelanggaran pertama, atau pesan bersih pertama)
+    for summary in store.user_group_summary():
+        combined_data.append({
+            "User ID": summary["user_id"],
+            "Username": summary["username"] or "",
+            "Name": summary["name"] or "",
+            "Grup": summary["group_name"] or f"ID: {summary['group_id']}",
+            "Total": summary["violation"] + summary["clean"],
+            "Bersih": summary["clean"],
+            "Melanggar": summary["violation"]
+        })
 
     df_activity = pd.DataFrame(combined_data)
 
@@ -425,55 +407,21 @@ elif tab == "📄 Pesan & Pelanggaran":
     # Tabel daftar pesan & pelanggaran users
     st.subheader("📝 Daftar Pesan & Pelanggaran Users")
 
-    # Gabungkan semua user_id dari violations dan non_violations
-    all_user_ids = set(violations.keys()) | set(non_violations.keys())
-
-    all_data = []
-    for user_id in all_user_ids:
-        # Ambil data terakhir dari violations atau non_violations
-        last_violation = violations.get(user_id, [])
-        last_clean = non_violations.get(user_id, [])
-
-        latest_log = None
-        if last_violation:
-            latest_log = sorted(last_violation, key=lambda x: x["timestamp"])[-1]
-        elif last_clean:
-            latest_log = sorted(last_clean, key=lambda x: x["timestamp"])[-1]
-
-        if latest_log:
-            latest_log["user_id"] = user_id
-            all_data.append(latest_log)
-
-    if not all_data:
+    tanggal_unik = store.message_dates()
+    if not tanggal_unik:
         st.info("❌ Tidak ada data users tercatat!")
     else:
-        df = pd.DataFrame(all_data)
-
-        # Filter grup
-        grup_filter = st.selectbox("Filter Grup", options=["Semua"] + df["group_name"].unique().tolist())
-        if grup_filter != "Semua":
-            df = df[df["group_name"] == grup_filter]
-
-        # Filter tanggal
-        tanggal_unik = sorted(
-            set(
-                ts["timestamp"].split()[0]
-                for uid in all_user_ids
-                for ts in (violations.get(uid, []) + non_violations.get(uid, []))
-            )
-        )
+        # Filter grup, tanggal dan pencarian dijalankan langsung di penyimpanan
+        grup_filter = st.selectbox("Filter Grup", options=["Semua"] + store.group_names())
         tanggal_filter = st.selectbox("Filter Tanggal", options=["Semua"] + tanggal_unik)
-        if tanggal_filter != "Semua":
-            df = df[df["timestamp"].str.startswith(tanggal_filter)]
-
-        # Filter pencarian
         search_query = st.text_input("Cari berdasarkan Username / Nama / User ID", placeholder="Ketik Username, Nama, atau User ID").lower().strip()
-        if search_query:
-            df = df[
-                df["username"].str.lower().str.contains(search_query, na=False) |
-                df["name"].str.lower().str.contains(search_query, na=False) |
-                df["user_id"].astype(str).str.contains(search_query)
-            ]
+
+        # Pesan terakhir setiap user (pelanggaran diutamakan, lalu pesan bersih)
+        df = pd.DataFrame(store.latest_message_per_user(
+            group_name=None if grup_filter == "Semua" else grup_filter,
+            date=None if tanggal_filter == "Semua" else tanggal_filter,
+            search=search_query or None
+        ))
 
         if df.empty:
             st.info("❌ Tidak ada data users pada filter yang dipilih!")
@@ -482,8 +430,8 @@ elif tab == "📄 Pesan & Pelanggaran":
                 user_id = row["user_id"]
                 
                 # Ambil data
-                clean_logs = non_violations.get(user_id, [])
-                full_logs = violations.get(user_id, [])
+                clean_logs = store.user_messages(user_id, "clean")
+                full_logs = store.user_messages(user_id, "violation")
                 total_clean = len(clean_logs)
                 total_violations = len(full_logs)
                 
@@ -508,7 +456,7 @@ elif tab == "📄 Pesan & Pelanggaran":
                                 key=f"checkbox_clean_{user_id}_{idx}"
                             )
                             if checked:
-                                selected_clean_indexes.append(idx)
+                                selected_clean_indexes.append(cl["id"])
                     else:
                         st.markdown("<br>", unsafe_allow_html=True)
                         st.write(f"✅ Pesan Bersih : {total_clean}")
@@ -525,7 +473,7 @@ elif tab == "📄 Pesan & Pelanggaran":
                                 key=f"checkbox_{user_id}_{idx}"
                             )
                             if checked:
-                                selected_indexes.append(idx)
+                                selected_indexes.append(log["id"])
                     else:
                         st.write(f"⚠️ Pesan Melanggar : {total_violations}")
 
@@ -561,25 +509,14 @@ elif tab == "📄 Pesan & Pelanggaran":
                         if st.button("✅ Bersih", key=f"hapus_{user_id}"):
                             if selected_indexes:
                                 # Pindahkan hanya pelanggaran yang dipilih
-                                moved_vio = [log for idx, log in enumerate(full_logs) if idx in selected_indexes]
-                                violations[user_id] = [
-                                    log for idx, log in enumerate(full_logs) if idx not in selected_indexes
-                                ]
-                                if not violations[user_id]:
-                                    violations.pop(user_id, None)
+                                moved_vio = store.move_messages(user_id, "violation", "clean", selected_indexes)
                                 pesan_dipindah = f"{len(selected_indexes)} pesan melanggar dipindahkan ke pesan bersih"
                             else:
                                 # Pindahkan semua pelanggaran
-                                moved_vio = full_logs
-                                violations.pop(user_id, None)
+                                moved_vio = store.move_messages(user_id, "violation", "clean")
                                 pesan_dipindah = "Semua pesan melanggar dipindahkan ke pesan bersih"
 
-                            # Tambahkan ke non_violations
                             if moved_vio:
-                                if user_id not in non_violations:
-                                    non_violations[user_id] = []
-                                non_violations[user_id].extend(moved_vio)
-
                                 # Kirim ulang pesan dihapus ke grup
                                 for log in moved_vio:
                                     group_id = log.get("group_id")
@@ -596,12 +533,6 @@ elif tab == "📄 Pesan & Pelanggaran":
                                         except Exception as e:
                                             print(f"Gagal kirim ulang pesan ke grup {group_id}: {e}")
 
-                            # Simpan perubahan
-                            with open("violations.json", "w") as f:
-                                json.dump(violations, f, indent=4)
-                            with open("non_violations.json", "w") as f:
-                                json.dump(non_violations, f, indent=4)
-
                             # Kirim DM jika user sudah pernah start bot
                             if user_id in user_started:
                                 try:
@@ -617,25 +548,14 @@ elif tab == "📄 Pesan & Pelanggaran":
                         if st.button("❌ Melanggar", key=f"deteksi_{user_id}"):
                             if selected_clean_indexes:
                                 # Pindahkan hanya pesan bersih yang dipilih
-                                moved_clean = [log for idx, log in enumerate(clean_logs) if idx in selected_clean_indexes]
-                                non_violations[user_id] = [
-                                    log for idx, log in enumerate(clean_logs) if idx not in selected_clean_indexes
-                                ]
-                                if not non_violations[user_id]:
-                                    non_violations.pop(user_id, None)
+                                moved_clean = store.move_messages(user_id, "clean", "violation", selected_clean_indexes)
                                 pesan_dipindah = f"{len(selected_clean_indexes)} pesan bersih dipindahkan ke pesan melanggar"
                             else:
                                 # Pindahkan semua pesan bersih
-                                moved_clean = clean_logs
-                                non_violations.pop(user_id, None)
+                                moved_clean = store.move_messages(user_id, "clean", "violation")
                                 pesan_dipindah = "Semua pesan bersih dipindahkan ke pesan melanggar"
 
-                            # Tambahkan ke violations
                             if moved_clean:
-                                if user_id not in violations:
-                                    violations[user_id] = []
-                                violations[user_id].extend(moved_clean)
-
                                 # Hapus pesan dari grup & kirim notifikasi ke grup
                                 async def proses_pesan_melanggar():
                                     for log in moved_clean:
@@ -667,12 +587,6 @@ elif tab == "📄 Pesan & Pelanggaran":
                                 except RuntimeError as e:
                                     print(f"Loop error: {e}")
 
-                            # Simpan perubahan
-                            with open("violations.json", "w") as f:
-                                json.dump(violations, f, indent=4)
-                            with open("non_violations.json", "w") as f:
-                                json.dump(non_violations, f, indent=4)
-
                             # Kirim DM ke user (jika sudah start bot)
                             if user_id in user_started:
                                 try:
@@ -725,16 +639,12 @@ elif tab == "📄 Pesan & Pelanggaran":
                                     except Exception as e:
                                         print(f"Gagal mute user di grup {group_id}: {e}")
 
-                            # Simpan file JSON dengan format ISO string
+                            # Simpan data mute dengan format ISO string
                             if berhasil:
-                                with open("mute_tracker.json", "w") as f:
-                                    formatted = {
-                                        uid: {
-                                            **data,
-                                            "until": data["until"].replace(microsecond=0).isoformat()
-                                        } for uid, data in mute_data.items()
-                                    }
-                                    json.dump(formatted, f, indent=4)
+                                store.put_item("mute_tracker", user_id, {
+                                    **mute_data[user_id],
+                                    "until": mute_until.replace(microsecond=0).isoformat()
+                                })
 
                                 # Kirim DM jika mute berhasil
                                 if user_id in user_started:
@@ -775,15 +685,14 @@ elif tab == "📄 Pesan & Pelanggaran":
                                         print(f"Gagal ban user di grup {group_id}: {e}")
 
                             if berhasil:
-                                # Simpan ke file banned_users.json
+                                # Simpan ke daftar banned_users
                                 ban_data[user_id] = {
                                     "username": row["username"],
                                     "name": row["name"],
                                     "date": datetime.now().strftime("%Y-%m-%d"),
                                     "time": datetime.now().strftime("%H:%M:%S")
                                 }
-                                with open("banned_users.json", "w") as f:
-                                    json.dump(ban_data, f, indent=4)
+                                store.put_item("banned_users", user_id, ban_data[user_id])
 
                                 # Kirim DM ke user (satu kali saja)
                                 if user_id in user_started:
@@ -862,10 +771,8 @@ elif tab == "⛔ Mute & Ban":
                                 except:
                                     pass
 
-                        # Hapus data dari file mute_tracker.json
-                        mute_data.pop(user_id, None)
-                        with open("mute_tracker.json", "w") as f:
-                            json.dump(mute_data, f, indent=4)
+                        # Hapus data dari mute_tracker
+                        store.delete_item("mute_tracker", user_id)
 
                         # Kirim notifikasi DM hanya sekali setelah semua unmute berhasil
                         if berhasil:
@@ -940,10 +847,8 @@ elif tab == "⛔ Mute & Ban":
                             except:
                                 pass
 
-                        # Hapus data dari file banned_users.json
-                        ban_data.pop(user_id, None)
-                        with open("banned_users.json", "w") as f:
-                            json.dump(ban_data, f, indent=4)
+                        # Hapus data dari banned_users
+                        store.delete_item("banned_users", user_id)
 
                         if berhasil:
                             st.session_state["notif_unban"] = f"✅ {user['name']} ({user['username']}) berhasil di unban!"
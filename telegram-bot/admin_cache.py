@@ -0,0 +1,104 @@
+import time
+import asyncio
+import logging
+
+ADMIN_STATUSES = ("administrator", "creator")
+
+# Cache daftar admin per grup dengan TTL (termasuk status bot sendiri, karena bot admin ikut di getChatAdministrators)
+# fetch(bot, group_id) mengembalikan {user_id: {"status": ..., "username": ...}} untuk semua admin grup.
+# Entri yang melewati TTL tetap dipakai sambil diperbarui di background; entri yang belum ada atau
+# diinvalidasi diambil langsung. Perubahan dari event CHAT_MEMBER / MY_CHAT_MEMBER diterapkan lewat apply().
+class AdminCache:
+    def __init__(self, fetch, ttl=600, on_update=None):
+        self._fetch = fetch
+        self.ttl = ttl
+        self.on_update = on_update  # on_update(group_id, admins) setiap kali daftar admin berubah
+        self._groups = {}           # group_id -> {"admins": {...}, "fetched_at": ..., "valid": bool}
+        self._pending = {}          # group_id -> task pengambilan yang sedang berjalan
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    async def admins(self, bot, group_id):
+        group_id = str(group_id)
+        entry = self._groups.get(group_id)
+        if entry is None or not entry["valid"]:
+            self.misses += 1
+            return await self._refresh(bot, group_id)
+        self.hits += 1
+        if time.monotonic() - entry["fetched_at"] > self.ttl:
+            self.refresh_in_background(bot, group_id)
+        return entry["admins"]
+
+    async def status(self, bot, group_id, user_id):
+        admin = (await self.admins(bot, group_id)).get(str(user_id))
+        return admin["status"] if admin else None
+
+    async def is_admin(self, bot, group_id, user_id):
+        return await self.status(bot, group_id, user_id) in ADMIN_STATUSES
+
+    # Pengambilan per grup digabung: perintah admin yang bersamaan hanya memicu satu request
+    def _refresh(self, bot, group_id):
+        task = self._pending.get(group_id)
+        if task is None:
+            task = self._pending[group_id] = asyncio.create_task(self._load(bot, group_id))
+            task.add_done_callback(lambda _: self._pending.pop(group_id, None))
+        return asyncio.shield(task)
+
+    async def _load(self, bot, group_id):
+        admins = await self._fetch(bot, group_id)
+        self._groups[group_id] = {"admins": admins, "fetched_at": time.monotonic(), "valid": True}
+        self.refreshes += 1
+        self._notify(group_id, admins)
+        return admins
+
+    def refresh_in_background(self, bot, group_id):
+        group_id = str(group_id)
+        if group_id in self._pending:
+            return
+        self._refresh(bot, group_id).add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(future):
+        if not future.cancelled() and future.exception() is not None:
+            logging.warning(f"Gagal memperbarui daftar admin di background: {future.exception()}")
+
+    # Menerapkan perubahan status satu user (promosi / demosi) tanpa request ulang
+    def apply(self, group_id, user_id, status, username=""):
+        entry = self._groups.get(str(group_id))
+        if entry is None:
+            return
+        admins = entry["admins"]
+        user_id = str(user_id)
+        if str(status) in ADMIN_STATUSES:
+            changed = admins.get(user_id) != {"status": str(status), "username": username}
+            admins[user_id] = {"status": str(status), "username": username}
+        else:
+            changed = admins.pop(user_id, None) is not None
+        if changed:
+            self._notify(str(group_id), admins)
+
+    def invalidate(self, group_id):
+        entry = self._groups.get(str(group_id))
+        if entry is not None:
+            entry["valid"] = False
+
+    def forget(self, group_id):
+        self._groups.pop(str(group_id), None)
+
+    def _notify(self, group_id, admins):
+        if self.on_update is not None:
+            try:
+                self.on_update(group_id, admins)
+            except Exception as e:
+                logging.error(f"Gagal memperbarui daftar admin grup {group_id}: {e}")
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "groups": len(self._groups),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "refreshes": self.refreshes
+        }
@@ -1,15 +1,27 @@
-import os
-import json
-import torch
+import asyncio
 import logging
+import time
 import string
 from datetime import datetime, timedelta, timezone
 from collections import defaultdict
-from transformers import BertTokenizer, BertForSequenceClassification
 from telegram import Update, ChatPermissions, InlineKeyboardButton, InlineKeyboardMarkup, ChatMember
 from telegram.constants import ChatMemberStatus
 from telegram.error import TelegramError
 from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, ChatMemberHandler, ContextTypes, filters
+from inference import PredictionBatcher, PredictionResult, create_inference_executor, load_inference_backend, PREPROCESSING_FILE
+from prediction_cache import PredictionCache
+from lexical_classifier import load_lexical_cascade
+from enforcement import OutboundDispatcher, LANE_DELETE, LANE_ENFORCE, LANE_WARNING, LANE_DM, fan_out
+from membership import MembershipIndex
+from admin_cache import AdminCache, ADMIN_STATUSES
+from notifications import WarningAggregator
+from raid_detector import RaidDetector
+from spam_wave import SpamWaveTracker
+from near_duplicate import build_near_duplicate_index
+from reputation import build_reputation_index
+from text_normalizer import get_text_normalizer
+from model_utils import DEFAULT_DATASET_PATH
+from storage import open_store, DocumentFlusher, MessageIndex, apply_relabels
 
 # Konfigurasi logging
 logging.basicConfig(
@@ -19,210 +31,397 @@ logging.basicConfig(
     datefmt="%Y-%m-%d %H:%M:%S",
 )
 
+# Konfigurasi micro-batching inferensi
+BATCH_MAX_SIZE = 32        # Jumlah maksimal pesan dalam satu forward pass
+BATCH_MAX_WAIT_MS = 15     # Waktu tunggu maksimal (ms) untuk mengumpulkan satu batch
+CONCURRENT_UPDATES = 256   # Jumlah update yang boleh diproses bersamaan agar batch bisa terisi
+
+# Konfigurasi executor inferensi (forward pass dijalankan di luar event loop)
+INFERENCE_WORKERS = 1             # Jumlah worker thread executor
+INFERENCE_INTRA_OP_THREADS = 4    # torch.set_num_threads, satu pengaturan untuk seluruh proses (dibagi semua worker)
+INFERENCE_INTER_OP_THREADS = 1    # torch.set_interop_threads (seluruh proses)
+INFERENCE_CPU_AFFINITY = None     # Contoh: [0, 1, 2, 3] untuk pin ke core tertentu
+INFERENCE_MAX_QUEUE = 2048        # Batas antrian pesan yang menunggu prediksi
+INFERENCE_MAX_PENDING_BATCHES = 2 # Batas batch yang dikirim ke executor bersamaan
+
+# Konfigurasi cache prediksi (pesan spam yang di-copy-paste tidak perlu diprediksi ulang)
+PREDICTION_CACHE_ENABLED = True
+PREDICTION_CACHE_MAX_ENTRIES = 100000
+PREDICTION_CACHE_TTL_SECONDS = 24 * 3600
+PREDICTION_CACHE_FILE = "prediction_cache.json"  # None = tidak disimpan ke disk
+PREDICTION_CACHE_STATS_INTERVAL = 600            # Interval log statistik cache (detik)
+
+# Konfigurasi cascade leksikal (tahap pertama sebelum IndoBERT, hasil lexical_classifier.py)
+LEXICAL_MODEL_PATH = "lexical_model.joblib"  # None = cascade dinonaktifkan
+LEXICAL_LOW_THRESHOLD = 0.05    # p(judi) <= nilai ini langsung dianggap bersih
+LEXICAL_HIGH_THRESHOLD = 0.98   # p(judi) >= nilai ini langsung dianggap promosi judi
+
+# Konfigurasi pencocokan near-duplicate (MinHash/LSH) terhadap pesan judi yang sudah diketahui
+NEAR_DUPLICATE_ENABLED = True
+NEAR_DUPLICATE_DATASET_PATH = DEFAULT_DATASET_PATH  # Baris label 1 ikut diindex, None = hanya violations
+NEAR_DUPLICATE_THRESHOLD = 0.7    # Kemiripan Jaccard minimal agar pesan langsung dianggap judi
+NEAR_DUPLICATE_NUM_PERM = 64      # Panjang signature MinHash
+NEAR_DUPLICATE_BANDS = 16         # Jumlah band LSH (num_perm / bands baris per band)
+
+# Konfigurasi index reputasi link, domain dan nomor telepon
+REPUTATION_ENABLED = True
+REPUTATION_DATASET_PATH = DEFAULT_DATASET_PATH  # Seed dari dataset berlabel, None = hanya dari pesan grup
+REPUTATION_MIN_BAD = 2            # Entitas buruk jika muncul di >= N pesan judi ...
+REPUTATION_BAD_RATIO = 0.9        # ... dan proporsi pesan judi >= nilai ini
+REPUTATION_FILE = "entity_reputation.json"  # Dipakai jika STORAGE_BACKEND = "json"
+REPUTATION_SAVE_INTERVAL = 60     # Interval penyimpanan hit / last seen untuk dashboard (detik)
+
+# Konfigurasi penegakan lintas grup (mute, ban, unrestrict dijalankan bersamaan per grup)
+# dan dispatcher request keluar ke Telegram
+ENFORCEMENT_MAX_CONCURRENCY = 8   # Jumlah grup yang diproses bersamaan
+TELEGRAM_GLOBAL_RATE = 30         # Batas request Telegram per detik untuk seluruh bot
+TELEGRAM_GROUP_MESSAGE_RATE = 20 / 60  # Batas pesan per grup per detik (20 pesan/menit)
+OUTBOUND_WORKERS = 4              # Worker dispatcher request keluar (hapus > restrict/ban > peringatan > DM)
+
+# Konfigurasi penggabungan peringatan per grup saat lonjakan spam
+WARNING_WINDOW_SECONDS = 10       # Peringatan dalam N detik digabung menjadi satu ringkasan
+WARNING_SUMMARY_MAX_LISTED = 10   # Jumlah pelanggar maksimal yang ditulis di ringkasan
+WARNING_SUMMARY_LIFETIME = 120    # Ringkasan diedit di tempat selama N detik, setelah itu pesan baru
+WARNING_DM_COOLDOWN = 60          # DM peringatan ke user yang sama paling banyak sekali per N detik
+WARNING_GROUP_SETTINGS = {}       # Pengaturan per grup, contoh: {"-100123": {"window": 30, "max_listed": 5}}
+
+# Konfigurasi deteksi raid per grup (mode agresif otomatis saat lonjakan spam)
+RAID_WINDOW_SECONDS = 60          # Panjang sliding window laju pesan / member baru / pelanggaran
+RAID_MESSAGE_THRESHOLD = 60       # Raid jika >= N pesan dalam window ...
+RAID_VIOLATION_RATIO = 0.3        # ... dan rasio pelanggaran >= nilai ini
+RAID_VIOLATION_THRESHOLD = 15     # Raid jika >= N pelanggaran dalam window
+RAID_JOIN_THRESHOLD = 20          # Raid jika >= N member baru dalam window
+RAID_EXIT_FACTOR = 0.5            # Mode agresif berakhir jika semua laju < faktor * batas ...
+RAID_CALM_SECONDS = 120           # ... selama N detik
+RAID_LEXICAL_THRESHOLD = 0.7      # Saat mode agresif, p(judi) leksikal >= nilai ini langsung dihapus
+# User yang belum verifikasi selalu dibatasi saat bergabung. Membatasi juga user terverifikasi yang bergabung
+# kembali saat raid ikut menahan anggota sah, jadi hanya dilakukan jika diaktifkan secara eksplisit.
+RAID_RESTRICT_VERIFIED_JOINS = False  # Batasi juga user terverifikasi yang bergabung kembali saat raid
+RAID_JOIN_RESTRICT_SECONDS = 600  # Lama pembatasan user terverifikasi jika RAID_RESTRICT_VERIFIED_JOINS aktif (detik)
+RAID_CHECK_INTERVAL = 15          # Interval evaluasi ulang grup yang sedang dalam mode agresif
+
+# Konfigurasi deteksi gelombang spam lintas grup (count-min sketch + top-k dengan peluruhan waktu)
+SPAM_WAVE_TOP_K = 256             # Jumlah sidik jari pesan teratas yang dilacak
+SPAM_WAVE_SKETCH_WIDTH = 4096     # Lebar tabel count-min sketch
+SPAM_WAVE_SKETCH_DEPTH = 4        # Jumlah baris (fungsi hash) count-min sketch
+SPAM_WAVE_HALF_LIFE = 60          # Hitungan meluruh setengahnya setiap N detik
+SPAM_WAVE_THRESHOLD = 5           # Pesan dianggap menyebar jika estimasi hitungan >= N ...
+SPAM_WAVE_MIN_GROUPS = 2          # ... di minimal N grup (dan pernah dikonfirmasi judi)
+
+# Konfigurasi index keanggotaan user -> grup (dari event chat_member dan pesan, pengganti getChatMember per grup)
+MEMBERSHIP_MAX_USERS = 100000     # Jumlah user maksimal di index (LRU)
+MEMBERSHIP_TTL = 6 * 3600         # Status anggota dianggap valid selama N detik
+MEMBERSHIP_NEGATIVE_TTL = 600     # Status bukan anggota (left/kicked) dianggap valid selama N detik
+
+# Konfigurasi cache admin grup (perintah admin tidak perlu getChatMember setiap kali)
+ADMIN_CACHE_TTL = 600             # Setelah N detik daftar admin diperbarui di background
+
+# Konfigurasi penyimpanan data ("sqlite" dipakai bersama dengan dashboard, "json" = format file lama)
+STORAGE_BACKEND = "sqlite"
+SQLITE_DB_FILE = "antijudi.db"    # Saat pertama dibuka, data JSON lama dimigrasi otomatis
+
+# Konfigurasi penulisan dokumen di background (grup aktif, user, banned, mute)
+PERSIST_FLUSH_INTERVAL = 0.5      # Perubahan digabung dan ditulis setiap N detik
+PERSIST_FLUSH_MAX_PENDING = 100   # atau setelah N perubahan
+
+# Konfigurasi write-ahead log / commit berkelompok untuk violations dan non_violations
+WAL_GROUP_COMMIT_SIZE = 64        # fsync setiap N pesan
+WAL_GROUP_COMMIT_INTERVAL = 1.0   # atau setiap N detik
+WAL_COMPACTION_INTERVAL = 300     # Interval compaction WAL ke snapshot JSON (detik)
+RELABEL_SYNC_INTERVAL = 5         # Interval membaca relabel dari dashboard (detik)
+MUTE_SYNC_INTERVAL = 5            # Interval membaca perubahan mute/unmute dari dashboard (detik)
+BAN_SYNC_INTERVAL = 5             # Interval membaca perubahan ban/unban dari dashboard (detik)
+
+# Konfigurasi hot window non_violations (pesan bersih lama tidak disimpan di memori)
+CLEAN_HOT_MAX_PER_USER = 200      # Pesan bersih terbaru per user yang disimpan di memori
+CLEAN_HOT_MAX_DAYS = 7            # Pesan bersih lebih tua dari N hari dipindah ke segmen harian (.jsonl.gz)
+CLEAN_RETENTION_DAYS = 180        # Pesan bersih lebih tua dari N hari diarsipkan
+CLEAN_ARCHIVE_DIR = "archive"     # Folder arsip, None = pesan lewat retensi dihapus
+
+# Konfigurasi backend inferensi
+INFERENCE_BACKEND = "torch"       # "torch", "onnx" (hasil export_onnx.py) atau "int8" (hasil quantize_model.py)
+ONNX_MODEL_DIR = "onnx-model"     # Folder model.onnx, tokenizer dan parity_report.json
+QUANTIZED_MODEL_DIR = "int8-model"  # Folder quantized_model.pt, tokenizer dan quantization_report.json
+QUANTIZED_MAX_ACCURACY_DROP = 0.01  # Batas penurunan akurasi model INT8 dibanding fp32
+EARLY_EXIT_HEADS_PATH = None      # File head early-exit (hasil train_early_exit.py), None = semua layer dipakai
+EARLY_EXIT_THRESHOLD = 0.95       # Probabilitas minimal agar inferensi berhenti di layer tengah
+TEXT_NORMALIZATION_ENABLED = True  # Dipakai jika checkpoint tidak punya preprocessing.json (checkpoint notebook dilatih dengan teks yang dinormalisasi)
+
 # Memuat model IndoBERT dan tokenizer
 logging.info("Memuat model IndoBERT dan tokenizer...")
-tokenizer = BertTokenizer.from_pretrained(CHECKPOINT_PATH)
-model = BertForSequenceClassification.from_pretrained(CHECKPOINT_PATH)
-model.eval()
+inference_backend = load_inference_backend(
+    INFERENCE_BACKEND,
+    CHECKPOINT_PATH,
+    onnx_model_dir=ONNX_MODEL_DIR,
+    intra_op_threads=INFERENCE_INTRA_OP_THREADS,
+    quantized_model_dir=QUANTIZED_MODEL_DIR,
+    max_accuracy_drop=QUANTIZED_MAX_ACCURACY_DROP,
+    early_exit_heads_path=EARLY_EXIT_HEADS_PATH,
+    early_exit_threshold=EARLY_EXIT_THRESHOLD
+)
 logging.info("Model dan tokenizer berhasil dimuat!")
 
+# Normalizer slang/stopword yang sama dengan preprocessing training (dipasang sebelum tokenizer)
+# Penanda preprocessing.json di folder model menentukan apakah input perlu dinormalisasi.
+text_normalization = inference_backend.text_normalization
+if text_normalization is None:
+    logging.warning(
+        f"Model {inference_backend.model_version} tidak punya {PREPROCESSING_FILE}, "
+        f"normalisasi teks mengikuti TEXT_NORMALIZATION_ENABLED={TEXT_NORMALIZATION_ENABLED}"
+    )
+    text_normalization = TEXT_NORMALIZATION_ENABLED
+text_normalizer = get_text_normalizer() if text_normalization else None
+
+# Backend penyimpanan bersama (SQLite atau file JSON)
+store = open_store(
+    STORAGE_BACKEND,
+    json_paths={
+        "active_groups": ACTIVE_GROUPS_FILE,
+        "banned_users": BAN_FILE,
+        "users_started": USER_FILE,
+        "mute_tracker": MUTE_TRACKER_FILE,
+        "entity_reputation": REPUTATION_FILE,
+        "violation": VIOLATION_FILE,
+        "clean": NON_VIOLATION_FILE
+    },
+    db_path=SQLITE_DB_FILE,
+    group_commit_size=WAL_GROUP_COMMIT_SIZE,
+    group_commit_interval=WAL_GROUP_COMMIT_INTERVAL
+)
+document_flusher = DocumentFlusher(store, PERSIST_FLUSH_INTERVAL, PERSIST_FLUSH_MAX_PENDING)
+
+# Fungsi untuk menyimpan satu item dokumen (ditulis jika masih ada di memori, dihapus jika sudah tidak ada).
+# Hanya baris yang berubah yang ditulis sehingga perubahan dari dashboard di baris lain tidak tertimpa.
+# Perubahan hanya ditandai, penulisan dilakukan document_flusher di background.
+def save_document_item(name, data, key, format_item):
+    key = str(key)
+    document_flusher.mark_dirty(name, key, lambda: format_item(data[key]) if key in data else None)
+
 # Fungsi untuk load dan save daftar grup aktif
 def load_active_groups():
-    try:
-        if os.path.exists(ACTIVE_GROUPS_FILE):
-            with open(ACTIVE_GROUPS_FILE, "r") as f:
-                return json.load(f)  # Memuat sebagai dictionary
-    except (json.JSONDecodeError, OSError) as e:
-        logging.warning(f"Gagal memuat {ACTIVE_GROUPS_FILE}: {e}")
-    return {}
-
-def save_active_groups(groups):
-    formatted_groups = {
-        str(chat_id): {
-            "group_name": dt.get("group_name", ""),
-            "activated_by": dt.get("activated_by"),
-            "date": dt["date"],
-            "time": dt["time"],
-            "admins": dt.get("admins", [])  # Simpan daftar admin sebagai list of dict
-        } for chat_id, dt in groups.items()
+    return store.load_document("active_groups")
+
+def format_active_group(dt):
+    return {
+        "group_name": dt.get("group_name", ""),
+        "activated_by": dt.get("activated_by"),
+        "date": dt["date"],
+        "time": dt["time"],
+        "admins": dt.get("admins", [])  # Simpan daftar admin sebagai list of dict
     }
-    try:
-        with open(ACTIVE_GROUPS_FILE, "w") as f:
-            json.dump(formatted_groups, f, indent=4)
-    except OSError as e:
-        logging.error(f"Gagal menyimpan {ACTIVE_GROUPS_FILE}: {e}")
+
+def save_active_groups(groups, chat_id):
+    save_document_item("active_groups", groups, chat_id, format_active_group)
 
 # Fungsi untuk load dan save daftar pengguna yang telah diblokir
 def load_banned_users():
-    try:
-        if os.path.exists(BAN_FILE):
-            with open(BAN_FILE, "r") as f:
-                return json.load(f)
-    except (json.JSONDecodeError, OSError) as e:
-        logging.warning(f"Gagal memuat {BAN_FILE}: {e}")
-    return {}
-
-def save_banned_users(banned_users):
-    formatted_banned_users = {
-        str(user_id): {
-            "username": dt.get("username", ""),
-            "name": dt.get("name", ""),
-            "date": dt["date"],
-            "time": dt["time"]
-        } for user_id, dt in banned_users.items()
+    return store.load_document("banned_users")
+
+def format_banned_user(dt):
+    return {
+        "username": dt.get("username", ""),
+        "name": dt.get("name", ""),
+        "date": dt["date"],
+        "time": dt["time"]
     }
-    try:
-        with open(BAN_FILE, "w") as f:
-            json.dump(formatted_banned_users, f, indent=4)
-    except OSError as e:
-        logging.error(f"Gagal menyimpan {BAN_FILE}: {e}")
+
+def save_banned_users(banned_users, user_id):
+    save_document_item("banned_users", banned_users, user_id, format_banned_user)
 
 # Fungsi untuk load dan save daftar user pribadi
 def load_users():
-    try:
-        if os.path.exists(USER_FILE):
-            with open(USER_FILE, "r") as f:
-                return json.load(f)
-    except (json.JSONDecodeError, OSError) as e:
-        logging.warning(f"Gagal memuat {USER_FILE}: {e}")
-    return {}
-
-def save_users(users):
-    formatted_users = {
-        str(user_id): {
-            "username": dt.get("username", ""),
-            "name": dt.get("name", ""),
-            "date": dt["date"],
-            "time": dt["time"]
-        } for user_id, dt in users.items()
+    return store.load_document("users_started")
+
+def format_user(dt):
+    return {
+        "username": dt.get("username", ""),
+        "name": dt.get("name", ""),
+        "date": dt["date"],
+        "time": dt["time"]
     }
-    try:
-        with open(USER_FILE, "w") as f:
-            json.dump(formatted_users, f, indent=4)
-    except OSError as e:
-        logging.error(f"Gagal menyimpan {USER_FILE}: {e}")
 
-# Fungsi untuk load dan save daftar non pelanggaran
-def load_non_violations():
-    try:
-        if os.path.exists(NON_VIOLATION_FILE):
-            with open(NON_VIOLATION_FILE, "r") as f:
-                return json.load(f)
-    except (json.JSONDecodeError, OSError) as e:
-        logging.warning(f"Gagal memuat {NON_VIOLATION_FILE}: {e}")
-    return {}
+def save_users(users, user_id):
+    save_document_item("users_started", users, user_id, format_user)
 
-def save_non_violations(non_violations):
-    formatted_non_violations = {
-        str(user_id): [
-            {
-                "username": entry.get("username", ""),
-                "name": entry.get("name", ""),
-                "group_id": entry.get("group_id", ""),
-                "group_name": entry.get("group_name", ""),
-                "timestamp": entry.get("timestamp", ""),
-                "message": entry.get("message", ""),
-                "message_id": entry.get("message_id", None)
-            }
-            for entry in entries
-        ]
-        for user_id, entries in non_violations.items()
+# Fungsi untuk load dan save daftar mute
+def parse_mute_entry(data):
+    return {
+        "username": data.get("username", ""),
+        "name": data.get("name", ""),
+        "until": datetime.fromisoformat(data["until"]),
+        "groups": data.get("groups", {})
     }
-    try:
-        with open(NON_VIOLATION_FILE, "w") as f:
-            json.dump(formatted_non_violations, f, indent=4)
-    except OSError as e:
-        logging.error(f"Gagal menyimpan {NON_VIOLATION_FILE}: {e}")
 
-# Fungsi untuk load dan save daftar pelanggaran
-def load_violations():
+def load_mute_tracker():
     try:
-        if os.path.exists(VIOLATION_FILE):
-            with open(VIOLATION_FILE, "r") as f:
-                return json.load(f)
-    except (json.JSONDecodeError, OSError) as e:
-        logging.warning(f"Gagal memuat {VIOLATION_FILE}: {e}")
+        raw = store.load_document("mute_tracker")
+        return {str(user_id): parse_mute_entry(data) for user_id, data in raw.items()}
+    except (KeyError, ValueError) as e:
+        logging.warning(f"Gagal memuat mute_tracker: {e}")
     return {}
 
-def save_violations(violations):
-    formatted_violations = {
-        str(user_id): [
-            {
-                "username": entry.get("username", ""),
-                "name": entry.get("name", ""),
-                "group_id": entry.get("group_id", ""),
-                "group_name": entry.get("group_name", ""),
-                "timestamp": entry.get("timestamp", ""),
-                "message": entry.get("message", ""),
-                "message_id": entry.get("message_id", None)
-            }
-            for entry in entries
-        ]
-        for user_id, entries in violations.items()
+def format_mute_entry(data):
+    return {
+        "username": data.get("username", ""),
+        "name": data.get("name", ""),
+        "until": data["until"].replace(microsecond=0).isoformat(),
+        "groups": data.get("groups", {})
     }
-    try:
-        with open(VIOLATION_FILE, "w") as f:
-            json.dump(formatted_violations, f, indent=4)
-    except OSError as e:
-        logging.error(f"Gagal menyimpan {VIOLATION_FILE}: {e}")
 
-# Fungsi untuk load dan save daftar mute
-def load_mute_tracker():
-    try:
-        if os.path.exists(MUTE_TRACKER_FILE):
-            with open(MUTE_TRACKER_FILE, "r") as f:
-                raw = json.load(f)
-                return {
-                    str(user_id): {
-                        "username": data.get("username", ""),
-                        "name": data.get("name", ""),
-                        "until": datetime.fromisoformat(data["until"]),
-                        "groups": data.get("groups", {})
-                    }
-                    for user_id, data in raw.items()
-                }
-    except (json.JSONDecodeError, OSError, ValueError) as e:
-        logging.warning(f"Gagal memuat {MUTE_TRACKER_FILE}: {e}")
-    return {}
-
-def save_mute_tracker(mute_tracker):
-    try:
-        formatted_mute_tracker = {
-            str(user_id): {
-                "username": data.get("username", ""),
-                "name": data.get("name", ""),
-                "until": data["until"].replace(microsecond=0).isoformat(),
-                "groups": data.get("groups", {})
-            }
-            for user_id, data in mute_tracker.items()
-        }
-        with open(MUTE_TRACKER_FILE, "w") as f:
-            json.dump(formatted_mute_tracker, f, indent=4)
-    except OSError as e:
-        logging.error(f"Gagal menyimpan {MUTE_TRACKER_FILE}: {e}")
+def save_mute_tracker(mute_tracker, user_id):
+    save_document_item("mute_tracker", mute_tracker, user_id, format_mute_entry)
 
 # Load data saat bot start
 users_started = load_users()
 active_groups = load_active_groups()
-non_violations = load_non_violations()
-violations = load_violations()
+# Index (group_id, message_id) -> label, diperbarui setiap append dan relabel dari dashboard
+message_index = MessageIndex()
+non_violation_log = store.message_log(
+    "clean", index=message_index, max_per_user=CLEAN_HOT_MAX_PER_USER, max_age_days=CLEAN_HOT_MAX_DAYS
+)
+violation_log = store.message_log("violation", index=message_index)
+non_violations = non_violation_log.load()
+violations = violation_log.load()
+# Relabel dashboard yang belum tercakup snapshot (misalnya dilakukan saat bot mati) diterapkan sebelum index lain dibangun
+pending_relabels, relabel_cursor = store.relabels_since(store.relabel_cursor())
+if pending_relabels:
+    moved = apply_relabels(pending_relabels, {"violation": violations, "clean": non_violations}, message_index)
+    logging.info(f"{len(pending_relabels)} relabel tertunda diterapkan saat start ({moved} pesan dipindahkan)")
 mute_tracker = load_mute_tracker()
+mute_cursor = store.document_cursor("mute_tracker")  # Posisi jurnal perubahan mute dari dashboard
 banned_users = load_banned_users()
+ban_cursor = store.document_cursor("banned_users")  # Posisi jurnal perubahan ban dari dashboard
 # Struktur penyimpanan data untuk pelanggaran
 violation_tracker = defaultdict(int)
-for user_id, entries in violations.items():
-    violation_tracker[user_id] = len(entries)
+for user_id in violations.user_ids():
+    violation_tracker[user_id] = violations.count(user_id)
+
+# Fungsi untuk melakukan prediksi sekumpulan pesan sekaligus (dynamic padding per batch)
+def predict_judi_batch(texts):
+    if text_normalizer is not None:
+        texts = text_normalizer.normalize_batch(texts)
+    return inference_backend.predict(texts)
 
 # Fungsi untuk melakukan prediksi apakah pesan mengandung promosi judi
 def predict_judi(text):
     logging.info(f"Memprediksi pesan: {text}")
-    inputs = tokenizer(text, return_tensors="pt", padding=True, truncation=True, max_length=512)
-    with torch.no_grad():
-        outputs = model(**inputs)
-    probabilities = torch.nn.functional.softmax(outputs.logits, dim=-1).squeeze()
-    predicted_label = probabilities.argmax().item()
-    logging.info(f"Hasil prediksi: {predicted_label}")
-    return predicted_label
+    prediction = predict_judi_batch([text])[0]
+    logging.info(f"Hasil prediksi: {prediction}")
+    return prediction
+
+# Executor inferensi dan antrian batching di depan predict_judi
+inference_executor = create_inference_executor(
+    max_workers=INFERENCE_WORKERS,
+    intra_op_threads=INFERENCE_INTRA_OP_THREADS,
+    inter_op_threads=INFERENCE_INTER_OP_THREADS,
+    cpu_affinity=INFERENCE_CPU_AFFINITY
+)
+prediction_batcher = PredictionBatcher(
+    predict_judi_batch,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS,
+    executor=inference_executor,
+    max_queue_size=INFERENCE_MAX_QUEUE,
+    max_pending_batches=INFERENCE_MAX_PENDING_BATCHES
+)
+
+# Cache prediksi berdasarkan teks yang dinormalisasi
+prediction_cache = PredictionCache(
+    max_entries=PREDICTION_CACHE_MAX_ENTRIES,
+    ttl_seconds=PREDICTION_CACHE_TTL_SECONDS,
+    persist_path=PREDICTION_CACHE_FILE
+)
+prediction_cache.load()
+
+# Cascade leksikal di depan IndoBERT
+lexical_cascade = load_lexical_cascade(LEXICAL_MODEL_PATH, LEXICAL_LOW_THRESHOLD, LEXICAL_HIGH_THRESHOLD)
+
+# Index near-duplicate pesan judi (violations + dataset label 1), diperbarui setiap ada pelanggaran baru
+near_duplicate_index = None
+if NEAR_DUPLICATE_ENABLED:
+    near_duplicate_index = build_near_duplicate_index(
+        (violations.text(position) for _, position in violations.rows()),
+        NEAR_DUPLICATE_DATASET_PATH,
+        num_perm=NEAR_DUPLICATE_NUM_PERM,
+        bands=NEAR_DUPLICATE_BANDS,
+        threshold=NEAR_DUPLICATE_THRESHOLD
+    )
+
+# Index reputasi entitas (link, domain, nomor telepon) dari dataset, pelanggaran dan relabel dashboard
+reputation_index = None
+if REPUTATION_ENABLED:
+    reputation_index = build_reputation_index(
+        REPUTATION_DATASET_PATH,
+        saved=store.load_document("entity_reputation"),
+        min_bad=REPUTATION_MIN_BAD,
+        bad_ratio=REPUTATION_BAD_RATIO
+    )
+
+# Statistik layer tempat inferensi berhenti (early exit)
+exit_layer_stats = defaultdict(int)
+
+# Fungsi untuk mengklasifikasi pesan (cache → near-duplicate → reputasi entitas → cascade leksikal → batching model)
+# Saat grup dalam mode agresif (raid), hasil leksikal di atas RAID_LEXICAL_THRESHOLD langsung dianggap judi.
+async def classify_message(text, aggressive=False):
+    if PREDICTION_CACHE_ENABLED:
+        cached = prediction_cache.get(text)
+        if cached is not None:
+            logging.info("[CASCADE] Tahap cache: hit")
+            return PredictionResult.from_dict({**cached, "stage": "cache"})
+
+    if near_duplicate_index is not None:
+        similarity = near_duplicate_index.match(text)
+        if similarity is not None:
+            logging.info(f"[CASCADE] Tahap near-duplicate: mirip pesan judi (jaccard={similarity:.2f})")
+            return PredictionResult(1, similarity, model_version="minhash", stage="near-duplicate")
+
+    if reputation_index is not None:
+        entity = reputation_index.lookup(text)
+        if entity is not None:
+            logging.info(f"[CASCADE] Tahap reputasi: entitas buruk {entity}")
+            return PredictionResult(1, 1.0, model_version="reputation", stage="reputation")
+
+    if lexical_cascade is not None:
+        lexical_label, lexical_probability = lexical_cascade.classify(text)
+        if lexical_label is None and aggressive and lexical_probability >= RAID_LEXICAL_THRESHOLD:
+            logging.info(f"[CASCADE] Mode raid: p={lexical_probability:.4f} langsung dianggap judi")
+            lexical_label = 1
+        if lexical_label is not None:
+            return PredictionResult(lexical_label, lexical_probability, model_version="lexical", stage="lexical")
+
+    started = time.perf_counter()
+    prediction = await prediction_batcher.predict(text)
+    elapsed = time.perf_counter() - started
+    exit_layer_stats[prediction.exit_layer] += 1
+    logging.info(
+        f"[CASCADE] Tahap IndoBERT: label {prediction.label} (p={prediction.spam_probability:.4f}, "
+        f"layer {prediction.exit_layer}, {elapsed * 1000:.2f} ms)"
+    )
+    if PREDICTION_CACHE_ENABLED:
+        prediction_cache.record_model_time(elapsed)
+        prediction_cache.put(text, prediction.as_dict())
+    return prediction
+
+# Handler untuk mencatat statistik cache prediksi dan cascade secara berkala
+async def log_prediction_cache_stats(context: ContextTypes.DEFAULT_TYPE):
+    logging.info(f"Statistik cache prediksi: {prediction_cache.stats()}")
+    if lexical_cascade is not None:
+        logging.info(f"Statistik cascade leksikal: {lexical_cascade.stats()}")
+    logging.info(f"Statistik layer early exit: {dict(exit_layer_stats)}")
+    if text_normalizer is not None:
+        logging.info(f"Statistik normalizer teks: {text_normalizer.stats()}")
+    logging.info(f"Statistik log pesan: pelanggaran {violations.stats()}, bersih {non_violations.stats()}")
+    logging.info(f"Statistik index keanggotaan: {membership_index.stats()}")
+    logging.info(f"Statistik cache admin: {admin_cache.stats()}")
+    logging.info(f"Statistik dispatcher Telegram: {outbound_dispatcher.stats()}")
+    logging.info(f"Statistik penggabungan peringatan: {warning_aggregator.stats()}")
+    logging.info(f"Statistik deteksi raid: {raid_detector.stats()}")
+    logging.info(f"Statistik gelombang spam: {spam_wave_tracker.stats()}")
+    if near_duplicate_index is not None:
+        logging.info(f"Statistik near-duplicate: {near_duplicate_index.stats()}")
+    if reputation_index is not None:
+        logging.info(f"Statistik reputasi entitas: {reputation_index.stats()}")
+    prediction_cache.save()
 
 # Fungsi filter pesan
 def is_valid_for_prediction(text):
@@ -239,23 +438,114 @@ def is_valid_for_prediction(text):
         return False
     return True
 
+# Dispatcher bersama untuk semua request keluar ke Telegram (jalur prioritas + rate limit)
+outbound_dispatcher = OutboundDispatcher(TELEGRAM_GLOBAL_RATE, TELEGRAM_GROUP_MESSAGE_RATE, workers=OUTBOUND_WORKERS)
+
+def format_admin_username(user):
+    return f"@{user.username}" if user.username else user.full_name
+
+# Fungsi untuk mengambil daftar admin grup (termasuk owner dan bot jika bot admin)
+async def fetch_group_admins(bot, group_id):
+    admin_members = await outbound_dispatcher.call(LANE_ENFORCE, bot.get_chat_administrators, chat_id=int(group_id))
+    return {
+        str(admin.user.id): {"status": str(admin.status), "username": format_admin_username(admin.user)}
+        for admin in admin_members
+    }
+
+# Fungsi untuk memperbarui daftar admin yang disimpan di active_groups saat cache admin berubah
+def update_stored_admins(group_id, admins):
+    if group_id not in active_groups:
+        return
+    admin_list = [{"user_id": user_id, "username": admin["username"]} for user_id, admin in admins.items()]
+    if active_groups[group_id].get("admins") != admin_list:
+        active_groups[group_id]["admins"] = admin_list
+        save_active_groups(active_groups, group_id)
+
+# Fungsi kirim dan edit peringatan grup (dipakai penggabung peringatan)
+async def send_group_warning(bot, group_id, text):
+    message = await outbound_dispatcher.call(LANE_WARNING, bot.send_message, message_chat_id=group_id, chat_id=int(group_id), text=text)
+    return message.message_id
+
+async def edit_group_warning(bot, group_id, message_id, text):
+    await outbound_dispatcher.call(LANE_WARNING, bot.edit_message_text, message_chat_id=group_id, chat_id=int(group_id), message_id=message_id, text=text)
+
+# Penggabung peringatan per grup
+warning_aggregator = WarningAggregator(
+    send_group_warning,
+    edit_group_warning,
+    window=WARNING_WINDOW_SECONDS,
+    max_listed=WARNING_SUMMARY_MAX_LISTED,
+    summary_lifetime=WARNING_SUMMARY_LIFETIME,
+    dm_cooldown=WARNING_DM_COOLDOWN,
+    group_settings=WARNING_GROUP_SETTINGS
+)
+
+# Pelacak gelombang spam lintas grup
+spam_wave_tracker = SpamWaveTracker(
+    top_k=SPAM_WAVE_TOP_K,
+    width=SPAM_WAVE_SKETCH_WIDTH,
+    depth=SPAM_WAVE_SKETCH_DEPTH,
+    half_life_seconds=SPAM_WAVE_HALF_LIFE,
+    wave_threshold=SPAM_WAVE_THRESHOLD,
+    min_groups=SPAM_WAVE_MIN_GROUPS
+)
+
+# Detektor raid per grup
+raid_detector = RaidDetector(
+    window_seconds=RAID_WINDOW_SECONDS,
+    message_threshold=RAID_MESSAGE_THRESHOLD,
+    violation_ratio=RAID_VIOLATION_RATIO,
+    violation_threshold=RAID_VIOLATION_THRESHOLD,
+    join_threshold=RAID_JOIN_THRESHOLD,
+    exit_factor=RAID_EXIT_FACTOR,
+    calm_seconds=RAID_CALM_SECONDS
+)
+
+# Fungsi untuk mengumumkan mode anti-raid aktif / nonaktif di grup
+async def handle_raid_transition(bot, group_id, transition):
+    if transition is None:
+        return
+    if transition == "start":
+        logging.warning(f"[RAID] Lonjakan spam di grup {group_id}, mode agresif aktif: {raid_detector.rates(group_id)}")
+        text = "🚨 Lonjakan spam terdeteksi! Mode anti-raid aktif: pesan promosi langsung dihapus dan anggota baru dibatasi sementara."
+    else:
+        logging.info(f"[RAID] Grup {group_id} kembali normal, mode agresif nonaktif")
+        text = "✅ Mode anti-raid dinonaktifkan, grup kembali normal."
+    try:
+        await outbound_dispatcher.call(LANE_WARNING, bot.send_message, message_chat_id=group_id, chat_id=int(group_id), text=text)
+    except Exception as e:
+        logging.warning(f"Gagal mengirim status anti-raid ke grup {group_id}: {e}")
+
+# Cache admin per grup
+admin_cache = AdminCache(fetch_group_admins, ADMIN_CACHE_TTL, update_stored_admins)
+
 # Fungsi untuk mengecek apakah pengguna adalah admin atau owner
 async def is_admin(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
     chat_id = update.effective_chat.id
     user_id = update.effective_user.id
 
     try:
-        chat_member = await context.bot.get_chat_member(chat_id, user_id)
-        return chat_member.status in ["administrator", "creator"]  # Pakai string langsung
+        return await admin_cache.is_admin(context.bot, chat_id, user_id)
     except Exception as e:
         logging.error(f"Error saat mengecek admin: {str(e)}")
         return False
 
+# Index keanggotaan user -> grup
+membership_index = MembershipIndex(MEMBERSHIP_MAX_USERS, MEMBERSHIP_TTL, MEMBERSHIP_NEGATIVE_TTL)
+
+# Fungsi untuk mengambil status user di grup (dari index, getChatMember hanya jika belum diketahui)
+async def get_member_status(bot, group_id, user_id):
+    status = membership_index.status(user_id, group_id)
+    if status is None:
+        member: ChatMember = await outbound_dispatcher.call(LANE_ENFORCE, bot.get_chat_member, chat_id=int(group_id), user_id=int(user_id))
+        status = member.status
+        membership_index.record(user_id, group_id, status)
+    return status
+
 # Fungsi cek user 
 async def is_user_in_group(bot, group_id: int, user_id: int) -> bool:
     try:
-        member: ChatMember = await bot.get_chat_member(chat_id=group_id, user_id=user_id)
-        return member.status in ["member", "administrator", "creator", "restricted"]
+        return await get_member_status(bot, group_id, user_id) in ["member", "administrator", "creator", "restricted"]
     except TelegramError as e:
         logging.warning(f"[is_user_in_group] Gagal getChatMember: {e}")
     except Exception as e:
@@ -281,7 +571,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 "date": now.strftime("%Y-%m-%d"),
                 "time": now.strftime("%H:%M:%S")
             }
-            save_users(users_started)
+            save_users(users_started, user_id)
             logging.info(f"User verifikasi berhasil dicatat: {user_id} - {user_name}")
         else:
             logging.info(f"User sudah pernah verifikasi sebelumnya: {user_id} - {user_name}")
@@ -290,31 +580,39 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "✅ Verifikasi berhasil - Anda telah terverifikasi dan dapat berinteraksi di grup seperti biasa!"
         )
 
-        # Unrestrict user di semua grup aktif
-        for group_id in active_groups:
-            try:
-                member = await context.bot.get_chat_member(chat_id=int(group_id), user_id=int(user_id))
-                if member.status in ["restricted", "member"]:
-                    await context.bot.restrict_chat_member(
-                        chat_id=int(group_id),
-                        user_id=int(user_id),
-                        permissions=ChatPermissions(
-                            can_send_messages=True,
-                            can_send_audios=True,
-                            can_send_documents=True,
-                            can_send_photos=True,
-                            can_send_videos=True,
-                            can_send_video_notes=True,
-                            can_send_voice_notes=True,
-                            can_send_polls=True,
-                            can_send_other_messages=True,
-                            can_add_web_page_previews=True,
-                            can_invite_users=True
-                        )
-                    )
-                    logging.info(f"✅ {user_name} (ID: {user_id}) di-unrestrict di grup {group_id}")
-            except Exception as e:
-                logging.warning(f"Gagal unrestrict user {user_id} di grup {group_id}: {e}")
+        # Grup tempat user dimute bot sudah pasti restricted, grup lain dicek lewat index keanggotaan
+        muted_groups = mute_tracker.get(user_id, {}).get("groups", {})
+
+        async def unrestrict_in_group(group_id, group_info):
+            if str(group_id) not in muted_groups and await get_member_status(context.bot, group_id, user_id) not in ["restricted", "member"]:
+                return False
+            await outbound_dispatcher.call(
+                LANE_ENFORCE, context.bot.restrict_chat_member,
+                chat_id=int(group_id),
+                user_id=int(user_id),
+                permissions=ChatPermissions(
+                    can_send_messages=True,
+                    can_send_audios=True,
+                    can_send_documents=True,
+                    can_send_photos=True,
+                    can_send_videos=True,
+                    can_send_video_notes=True,
+                    can_send_voice_notes=True,
+                    can_send_polls=True,
+                    can_send_other_messages=True,
+                    can_add_web_page_previews=True,
+                    can_invite_users=True
+                )
+            )
+            membership_index.record(user_id, group_id, "member")
+            return True
+
+        # Unrestrict user di semua grup aktif secara bersamaan
+        for group_id, group_info, result in await fan_out(active_groups.items(), unrestrict_in_group, ENFORCEMENT_MAX_CONCURRENCY):
+            if isinstance(result, Exception):
+                logging.warning(f"Gagal unrestrict user {user_id} di grup {group_id}: {result}")
+            elif result:
+                logging.info(f"✅ {user_name} (ID: {user_id}) di-unrestrict di grup {group_id}")
         return
 
     # Start dari Chat Pribadi (tanpa argumen verifikasi)
@@ -346,7 +644,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 "date": now.strftime("%Y-%m-%d"),
                 "time": now.strftime("%H:%M:%S")
             }
-            save_users(users_started)
+            save_users(users_started, user_id)
             logging.info(f"User baru dicatat: {user_id} - {user_name}")
         else:
             logging.info(f"User sudah terdaftar: {user_id} - {user_name}")
@@ -372,11 +670,11 @@ async def start_anti_judi_bot(update: Update, context: ContextTypes.DEFAULT_TYPE
         await update.message.reply_text("🚫 Hanya Admin yang dapat mengaktifkan AntiJudiBot di dalam grup ini!")
         return
 
-    # Cek bot sudah menjadi admin
+    # Cek bot sudah menjadi admin (dari cache admin yang sama)
     bot_id = context.bot.id
-    bot_member = await context.bot.get_chat_member(chat_id=int(chat_id), user_id=bot_id)
+    bot_status = await admin_cache.status(context.bot, chat_id, bot_id)
 
-    if bot_member.status != ChatMemberStatus.ADMINISTRATOR:
+    if bot_status != ChatMemberStatus.ADMINISTRATOR:
         await update.message.reply_text(
             "⚠️ Bot belum menjadi Admin di dalam grup ini - Pastikan bot telah menjadi Admin dan memiliki izin akses di dalam grup!")
         return
@@ -388,14 +686,8 @@ async def start_anti_judi_bot(update: Update, context: ContextTypes.DEFAULT_TYPE
 
     # Ambil daftar admin grup (termasuk owner)
     try:
-        admin_members = await context.bot.get_chat_administrators(chat_id=int(chat_id))
-        admin_list = []
-        for admin in admin_members:
-            admin_user = admin.user
-            admin_list.append({
-                "user_id": str(admin_user.id),
-                "username": f"@{admin_user.username}" if admin_user.username else admin_user.full_name
-            })
+        admins = await admin_cache.admins(context.bot, chat_id)
+        admin_list = [{"user_id": user_id, "username": admin["username"]} for user_id, admin in admins.items()]
     except Exception as e:
         logging.error(f"Gagal mengambil daftar admin grup {chat_id}: {e}")
         admin_list = []
@@ -412,7 +704,7 @@ async def start_anti_judi_bot(update: Update, context: ContextTypes.DEFAULT_TYPE
         "time": now.strftime("%H:%M:%S") + " WIB",  # Format: HH:MM:SS
         "admins": admin_list
     }
-    save_active_groups(active_groups) # Simpan data ke file atau database
+    save_active_groups(active_groups, chat_id) # Simpan data ke file atau database
 
     await update.message.reply_text("✅ AntiJudiBot aktif di dalam grup ini!")
 
@@ -424,7 +716,9 @@ async def start_anti_judi_bot(update: Update, context: ContextTypes.DEFAULT_TYPE
     keyboard = [[InlineKeyboardButton("✅ Verifikasi", url=f"https://t.me/{bot_username}?start=verifikasi")]]
     reply_markup = InlineKeyboardMarkup(keyboard)
 
-    await context.bot.send_message(
+    await outbound_dispatcher.call(
+        LANE_WARNING, context.bot.send_message,
+        message_chat_id=chat_id,
         chat_id=int(chat_id),
         text=verification_text,
         parse_mode="HTML",
@@ -452,7 +746,7 @@ async def stop_anti_judi_bot(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
     # Menghapus grup dari daftar active_groups
     active_groups.pop(chat_id, None)  # Menggunakan pop agar tidak error jika key tidak ditemukan
-    save_active_groups(active_groups)
+    save_active_groups(active_groups, chat_id)
 
     await update.message.reply_text("⛔ AntiJudiBot dinonaktifkan di dalam grup ini!")
 
@@ -503,31 +797,52 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if chat_id not in active_groups:
         return
 
+    # Pengirim pesan pasti anggota grup ini
+    membership_index.seen(user_id, chat_id)
+    await handle_raid_transition(context.bot, chat_id, raid_detector.record_message(chat_id))
+
     # Abaikan pesan yang tidak layak diproses
     if not is_valid_for_prediction(text):
         logging.info(f"[FILTERED] Pesan tidak layak diproses dari {user_name}: {text}")
         return
 
     logging.info(f"Menerima pesan dari {user_name} (ID: {user_id}): {text}")
+    aggressive = raid_detector.is_aggressive(chat_id)
+
+    # Pesan judi yang sedang menyebar di beberapa grup langsung ditindak tanpa model
+    fingerprint = spam_wave_tracker.fingerprint(text)
+    spam_wave_tracker.observe(fingerprint, chat_id)
+    if spam_wave_tracker.is_wave(fingerprint):
+        logging.info(f"[SPAM WAVE] Pesan {message_id} cocok dengan gelombang spam lintas grup")
+        prediction = PredictionResult(1, 1.0, model_version="spam-wave", stage="spam-wave")
+    else:
+        prediction = await classify_message(text, aggressive)
+    logging.info(
+        f"Hasil prediksi untuk pesan {message_id} dari {user_name}: {prediction.label} "
+        f"(p={prediction.spam_probability:.4f}, {prediction.stage}, {prediction.model_version})"
+    )
 
     # Jika terdeteksi promosi judi
-    if predict_judi(text) == 1:
+    if prediction.label == 1:
         # Cek apakah sudah dikoreksi sebagai bersih → jangan masukkan ke violations
-        for log in non_violations.get(user_id, []):
-            if log["message_id"] == message_id:
-                return
-            
+        if message_index.label_of(chat_id, message_id) == "clean":
+            return
+        spam_wave_tracker.confirm(fingerprint)
+
         logging.warning(f"{user_name} (ID: {user_id}) mengirimkan pesan promosi judi: {text}")
 
         # Hapus pesan dan hitung pelanggaran
-        await update.message.delete()
+        await outbound_dispatcher.call(LANE_DELETE, update.message.delete)
         violation_tracker[user_id] += 1
 
-        # Tambahkan ke violations log
-        if user_id not in violations:
-            violations[user_id] = []
+        # Pesan judi baru ikut diindex untuk pencocokan near-duplicate berikutnya
+        if near_duplicate_index is not None and prediction.stage != "near-duplicate":
+            near_duplicate_index.add(text)
+        if reputation_index is not None and prediction.stage != "reputation":
+            reputation_index.record(text, 1)
 
-        violations[user_id].append({
+        # Tambahkan ke violations log (append ke WAL)
+        violation_log.append(user_id, {
             "username": user_name,
             "name": user.full_name or "",
             "group_id": chat_id,
@@ -536,15 +851,19 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "message": text,
             "message_id": message_id
         })
-        save_violations(violations)
 
-        # 1) Kirim peringatan di grup
-        await context.bot.send_message(chat_id=int(chat_id), text=f"⚠️ Peringatan kepada {user_name}, pesan Anda terdeteksi sebagai promosi judi online!")
+        await handle_raid_transition(context.bot, chat_id, raid_detector.record_violation(chat_id))
+        aggressive = raid_detector.is_aggressive(chat_id)
+
+        # 1) Kirim peringatan di grup (digabung menjadi ringkasan saat lonjakan spam, tidak dikirim saat mode raid)
+        if not aggressive:
+            await warning_aggregator.add(context.bot, chat_id, user_name)
 
         # 2) Kirim notifikasi ke DM
-        if user_id in users_started:
+        if not aggressive and user_id in users_started and warning_aggregator.allow_dm(user_id):
             try:
-                await context.bot.send_message(
+                await outbound_dispatcher.call(
+                    LANE_DM, context.bot.send_message,
                     chat_id=int(user_id),
                     text=(
                         f"⚠️ Peringatan kepada {user_name}, pesan Anda di dalam grup telah dihapus karena terdeteksi sebagai promosi judi online!"
@@ -569,54 +888,65 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 }
             else:
                 mute_tracker[user_id]["until"] = mute_until  # update durasi jika perlu
+            schedule_unmute(context.job_queue, user_id, mute_until)
+
+            async def mute_in_group(group_id, group_info):
+                if not await is_user_in_group(context.bot, int(group_id), int(user_id)):
+                    return False
+                await outbound_dispatcher.call(
+                    LANE_ENFORCE, context.bot.restrict_chat_member,
+                    chat_id=int(group_id),
+                    user_id=int(user_id),
+                    permissions=ChatPermissions(
+                        can_send_messages=False,
+                        can_send_audios=False,
+                        can_send_documents=False,
+                        can_send_photos=False,
+                        can_send_videos=False,
+                        can_send_video_notes=False,
+                        can_send_voice_notes=False,
+                        can_send_polls=False,
+                        can_send_other_messages=False,
+                        can_add_web_page_previews=False,
+                        can_invite_users=False
+                    ),
+                    until_date=until_timestamp
+                )
+                membership_index.record(user_id, group_id, "restricted")
 
-            berhasil_mute = []
-
-            for group_id, group_info in active_groups.items():
-                if await is_user_in_group(context.bot, int(group_id), int(user_id)):
-                    try:
-                        await context.bot.restrict_chat_member(
-                            chat_id=int(group_id),
-                            user_id=int(user_id),
-                            permissions=ChatPermissions(
-                                can_send_messages=False,
-                                can_send_audios=False,
-                                can_send_documents=False,
-                                can_send_photos=False,
-                                can_send_videos=False,
-                                can_send_video_notes=False,
-                                can_send_voice_notes=False,
-                                can_send_polls=False,
-                                can_send_other_messages=False,
-                                can_add_web_page_previews=False,
-                                can_invite_users=False
-                            ),
-                            until_date=until_timestamp
-                        )
-
-                        # Simpan info grup yang berhasil mute
-                        mute_tracker[user_id]["groups"][str(group_id)] = {
-                            "group_name": group_info["group_name"]
-                        }
-                        berhasil_mute.append(group_info["group_name"])
-
-                        # Kirim notifikasi ke grup
-                        await context.bot.send_message(
-                            chat_id=int(group_id),
-                            text=f"🔇 {user_name} dimute karena pelanggaran berulang!"
-                        )
+                # Kirim notifikasi ke grup
+                try:
+                    await outbound_dispatcher.call(
+                        LANE_WARNING, context.bot.send_message,
+                        message_chat_id=group_id,
+                        chat_id=int(group_id),
+                        text=f"🔇 {user_name} dimute karena pelanggaran berulang!"
+                    )
+                except Exception as e:
+                    logging.warning(f"Gagal kirim notifikasi mute ke grup {group_info['group_name']}: {e}")
+                return True
 
-                    except Exception as e:
-                        logging.warning(f"Gagal mute {user_name} di grup {group_info['group_name']}: {e}")
+            # Mute di semua grup secara bersamaan, hasil per grup dicatat setelahnya
+            berhasil_mute = []
+            for group_id, group_info, result in await fan_out(active_groups.items(), mute_in_group, ENFORCEMENT_MAX_CONCURRENCY):
+                if isinstance(result, Exception):
+                    logging.warning(f"Gagal mute {user_name} di grup {group_info['group_name']}: {result}")
+                elif result:
+                    # Simpan info grup yang berhasil mute
+                    mute_tracker[user_id]["groups"][str(group_id)] = {
+                        "group_name": group_info["group_name"]
+                    }
+                    berhasil_mute.append(group_info["group_name"])
 
             if berhasil_mute:
-                save_mute_tracker(mute_tracker)
+                save_mute_tracker(mute_tracker, user_id)
                 logging.warning(f"{user_name} dimute di {len(berhasil_mute)} grup: {', '.join(berhasil_mute)}.")
 
                 # Kirim notifikasi ke DM
                 if user_id in users_started and berhasil_mute:
                     try:
-                        await context.bot.send_message(
+                        await outbound_dispatcher.call(
+                            LANE_DM, context.bot.send_message,
                             chat_id=int(user_id),
                             text="🔇 Anda telah dimute karena pelanggaran berulang di semua grup!\n\n"
                         )
@@ -628,25 +958,35 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         # 4) Jika pelanggaran >5 → ban
         elif violation_tracker[user_id] > 20:
-            berhasil_ban = []
-
-            for group_id, group_info in active_groups.items():
-                if await is_user_in_group(context.bot, int(group_id), int(user_id)):
-                    try:
-                        await context.bot.ban_chat_member(
-                            chat_id=int(group_id),
-                            user_id=int(user_id)
-                        )
-                        berhasil_ban.append(group_info["group_name"])
+            async def ban_in_group(group_id, group_info):
+                if not await is_user_in_group(context.bot, int(group_id), int(user_id)):
+                    return False
+                await outbound_dispatcher.call(
+                    LANE_ENFORCE, context.bot.ban_chat_member,
+                    chat_id=int(group_id),
+                    user_id=int(user_id)
+                )
+                membership_index.record(user_id, group_id, "kicked")
 
-                        # Kirim notifikasi ke grup
-                        await context.bot.send_message(
-                            chat_id=int(group_id),
-                            text=f"🚫 {user_name} dikeluarkan dan diblokir dari grup karena pelanggaran berulang kali!"
-                        )
+                # Kirim notifikasi ke grup
+                try:
+                    await outbound_dispatcher.call(
+                        LANE_WARNING, context.bot.send_message,
+                        message_chat_id=group_id,
+                        chat_id=int(group_id),
+                        text=f"🚫 {user_name} dikeluarkan dan diblokir dari grup karena pelanggaran berulang kali!"
+                    )
+                except Exception as e:
+                    logging.warning(f"Gagal kirim notifikasi ban ke grup {group_info['group_name']}: {e}")
+                return True
 
-                    except Exception as e:
-                        logging.warning(f"Gagal ban {user_name} dari grup {group_info['group_name']}: {e}")
+            # Ban di semua grup secara bersamaan, hasil per grup dicatat setelahnya
+            berhasil_ban = []
+            for group_id, group_info, result in await fan_out(active_groups.items(), ban_in_group, ENFORCEMENT_MAX_CONCURRENCY):
+                if isinstance(result, Exception):
+                    logging.warning(f"Gagal ban {user_name} dari grup {group_info['group_name']}: {result}")
+                elif result:
+                    berhasil_ban.append(group_info["group_name"])
 
             # Simpan ke data banned users
             if berhasil_ban:
@@ -656,13 +996,14 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     "date": datetime.now().strftime("%Y-%m-%d"),
                     "time": datetime.now().strftime("%H:%M:%S")
                 }
-                save_banned_users(banned_users)
+                save_banned_users(banned_users, user_id)
                 logging.warning(f"{user_name} telah diblokir dari {', '.join(berhasil_ban)}.")
 
                 # Kirim notifikasi ke DM (hanya sekali)
                 if user_id in users_started:
                     try:
-                        await context.bot.send_message(
+                        await outbound_dispatcher.call(
+                            LANE_DM, context.bot.send_message,
                             chat_id=int(user_id),
                             text="🚫 Anda telah dikeluarkan dan diblokir dari semua grup karena pelanggaran berulang kali!"
                         )
@@ -673,15 +1014,14 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 logging.warning(f"Tidak berhasil ban {user_name} di grup manapun.")
     else:
         # Cek apakah sudah dikoreksi sebagai pelanggaran → jangan simpan ke non_violations
-        for log in violations.get(user_id, []):
-            if log["message_id"] == message_id:
-                return
-            
-        # Simpan pesan yang tidak melanggar ke dalam non_violations.json
-        if user_id not in non_violations:
-            non_violations[user_id] = []
+        if message_index.label_of(chat_id, message_id) == "violation":
+            return
+
+        if reputation_index is not None:
+            reputation_index.record(text, 0)
 
-        non_violations[user_id].append({
+        # Simpan pesan yang tidak melanggar ke dalam non_violations (append ke WAL)
+        non_violation_log.append(user_id, {
             "username": user_name,
             "name": user.full_name or "",
             "group_id": chat_id,
@@ -690,86 +1030,119 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "message": text,
             "message_id": message_id
         })
-        save_non_violations(non_violations)
-
-# Handler untuk cek user dimute dan waktunya sudah selesai (unmute otomatis)
-async def auto_unmute_users(context: ContextTypes.DEFAULT_TYPE):
-    global mute_tracker
-    # Reload mute_tracker dari file setiap kali handler dipanggil
-    with open("mute_tracker.json") as f:
-        raw = json.load(f)
-        # Convert kembali nilai "until" jadi datetime
-        mute_tracker = {
-            uid: {
-                **data,
-                "until": datetime.fromisoformat(data["until"])
-            } for uid, data in raw.items()
-        }
-
-    now = datetime.now()
-    updated = False
-
-    for user_id, data in list(mute_tracker.items()):
-        try:
-            mute_until = data["until"]
-            if isinstance(mute_until, str):
-                mute_until = datetime.fromisoformat(mute_until)
 
-            if now >= mute_until:
-                berhasil_unmute = []
+# Jadwal unmute per user: satu job run_once per user pada waktu "until" (nama job unik per user)
+def unmute_job_name(user_id):
+    return f"unmute_{user_id}"
 
-                for group_id, group_info in data.get("groups", {}).items():
-                    try:
-                        await context.bot.restrict_chat_member(
-                            chat_id=int(group_id),
-                            user_id=int(user_id),
-                            permissions=ChatPermissions(
-                                can_send_messages=True,
-                                can_send_audios=True,
-                                can_send_documents=True,
-                                can_send_photos=True,
-                                can_send_videos=True,
-                                can_send_video_notes=True,
-                                can_send_voice_notes=True,
-                                can_send_polls=True,
-                                can_send_other_messages=True,
-                                can_add_web_page_previews=True,
-                                can_invite_users=True
-                            )
-                        )
+def cancel_unmute(job_queue, user_id):
+    for job in job_queue.get_jobs_by_name(unmute_job_name(user_id)):
+        job.schedule_removal()
 
-                        # Kirim notifikasi ke grup
-                        await context.bot.send_message(
-                            chat_id=int(group_id),
-                            text=f"🔊 {data['username']} telah di unmute karena durasi mute user sudah berakhir!"
-                        )
-                        logging.info(f"User {user_id} unmute otomatis di grup {group_info['group_name']}")
+def schedule_unmute(job_queue, user_id, mute_until):
+    cancel_unmute(job_queue, user_id)
+    delay = max(0.0, (mute_until - datetime.now()).total_seconds())
+    job_queue.run_once(auto_unmute_user, when=delay, data=str(user_id), name=unmute_job_name(user_id))
 
-                        berhasil_unmute.append(group_info["group_name"])
+# Handler untuk unmute otomatis satu user saat durasi mute-nya berakhir
+async def auto_unmute_user(context: ContextTypes.DEFAULT_TYPE):
+    user_id = context.job.data
+    data = mute_tracker.get(user_id)
+    if data is None:
+        return
 
-                    except Exception as e:
-                        logging.error(f"Gagal unmute {user_id} di grup {group_id}: {e}")
+    # Durasi mute diperpanjang setelah job dijadwalkan
+    if datetime.now() < data["until"]:
+        schedule_unmute(context.job_queue, user_id, data["until"])
+        return
 
-                # DM dikirim sekali saja jika berhasil unmute di grup manapun
-                if berhasil_unmute and user_id in users_started:
-                    try:
-                        await context.bot.send_message(
-                            chat_id=int(user_id),
-                            text="🔊 Durasi mute Anda telah berakhir, sekarang Anda dapat mengirim pesan lagi di semua grup!"
-                        )
-                        logging.info(f"DM unmute berhasil dikirim ke {data['username']} (ID: {user_id})")
-                    except Exception as e:
-                        logging.warning(f"Gagal kirim DM ke {data['username']}: {e}")
+    try:
+        berhasil_unmute = []
 
-                # Hapus dari mute tracker
-                del mute_tracker[user_id]
-                updated = True
+        for group_id, group_info in data.get("groups", {}).items():
+            try:
+                await outbound_dispatcher.call(
+                    LANE_ENFORCE, context.bot.restrict_chat_member,
+                    chat_id=int(group_id),
+                    user_id=int(user_id),
+                    permissions=ChatPermissions(
+                        can_send_messages=True,
+                        can_send_audios=True,
+                        can_send_documents=True,
+                        can_send_photos=True,
+                        can_send_videos=True,
+                        can_send_video_notes=True,
+                        can_send_voice_notes=True,
+                        can_send_polls=True,
+                        can_send_other_messages=True,
+                        can_add_web_page_previews=True,
+                        can_invite_users=True
+                    )
+                )
+
+                # Kirim notifikasi ke grup
+                await outbound_dispatcher.call(
+                    LANE_WARNING, context.bot.send_message,
+                    message_chat_id=group_id,
+                    chat_id=int(group_id),
+                    text=f"🔊 {data['username']} telah di unmute karena durasi mute user sudah berakhir!"
+                )
+                logging.info(f"User {user_id} unmute otomatis di grup {group_info['group_name']}")
+
+                berhasil_unmute.append(group_info["group_name"])
 
-        except Exception as e:
-            logging.error(f"Gagal memproses unmute otomatis untuk user {user_id}: {e}")
+            except Exception as e:
+                logging.error(f"Gagal unmute {user_id} di grup {group_id}: {e}")
 
-    if updated:
-        save_mute_tracker(mute_tracker)
+        # DM dikirim sekali saja jika berhasil unmute di grup manapun
+        if berhasil_unmute and user_id in users_started:
+            try:
+                await outbound_dispatcher.call(
+                    LANE_DM, context.bot.send_message,
+                    chat_id=int(user_id),
+                    text="🔊 Durasi mute Anda telah berakhir, sekarang Anda dapat mengirim pesan lagi di semua grup!"
+                )
+                logging.info(f"DM unmute berhasil dikirim ke {data['username']} (ID: {user_id})")
+            except Exception as e:
+                logging.warning(f"Gagal kirim DM ke {data['username']}: {e}")
+
+    except Exception as e:
+        logging.error(f"Gagal memproses unmute otomatis untuk user {user_id}: {e}")
+
+    # Hapus dari mute tracker
+    mute_tracker.pop(user_id, None)
+    save_mute_tracker(mute_tracker, user_id)
+
+# Handler untuk menerapkan mute/unmute dari dashboard ke mute_tracker dan jadwal unmute
+async def sync_dashboard_mutes(context: ContextTypes.DEFAULT_TYPE):
+    global mute_cursor
+    changes, mute_cursor = store.document_changes_since("mute_tracker", mute_cursor)
+    for user_id, value in changes:
+        if value is None:
+            mute_tracker.pop(user_id, None)
+            cancel_unmute(context.job_queue, user_id)
+            continue
+        try:
+            mute_tracker[user_id] = parse_mute_entry(value)
+        except (KeyError, ValueError) as e:
+            logging.warning(f"Perubahan mute dari dashboard untuk user {user_id} tidak valid: {e}")
+            continue
+        schedule_unmute(context.job_queue, user_id, mute_tracker[user_id]["until"])
+    if changes:
+        logging.info(f"{len(changes)} perubahan mute dari dashboard diterapkan")
+
+# Handler untuk menerapkan ban/unban dari dashboard ke banned_users di memori
+# Dashboard sudah menulis barisnya sendiri; tanpa ini user yang di-unban tetap dikeluarkan saat bergabung kembali.
+async def sync_dashboard_bans(context: ContextTypes.DEFAULT_TYPE):
+    global ban_cursor
+    changes, ban_cursor = store.document_changes_since("banned_users", ban_cursor)
+    for user_id, value in changes:
+        if value is None:
+            banned_users.pop(user_id, None)
+        else:
+            banned_users[user_id] = value
+    if changes:
+        logging.info(f"{len(changes)} perubahan ban dari dashboard diterapkan")
 
 # Handler untuk bot yang baru ditambahkan ke grup
 async def handle_my_chat_member(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -786,6 +1159,13 @@ async def handle_my_chat_member(update: Update, context: ContextTypes.DEFAULT_TY
 
     logging.info(f"Bot status di chat {chat_id} berubah dari {old_status} menjadi {new_status}.")
 
+    # Bot keluar dari grup: status anggota grup ini tidak lagi diperbarui oleh event
+    if new_status in ["left", "kicked"]:
+        membership_index.forget_group(chat_id)
+        admin_cache.forget(chat_id)
+    else:
+        admin_cache.apply(chat_id, context.bot.id, new_status, format_admin_username(my_chat_member.new_chat_member.user))
+
     # Saat bot ditambahkan ke grup atau diangkat jadi admin
     if chat.type in ["group", "supergroup"] \
        and old_status in ["left", "kicked"] \
@@ -805,7 +1185,9 @@ async def handle_my_chat_member(update: Update, context: ContextTypes.DEFAULT_TY
         )
 
         # Kirim pesan
-        await context.bot.send_message(
+        await outbound_dispatcher.call(
+            LANE_WARNING, context.bot.send_message,
+            message_chat_id=chat_id,
             chat_id=chat_id,
             text=welcome_text,
             parse_mode="HTML"
@@ -824,6 +1206,13 @@ async def handle_chat_member_update(update: Update, context: ContextTypes.DEFAUL
     user_id = str(user.id)
     user_name = f"@{user.username}" if user.username else user.first_name or "Pengguna"
     new_status = chat_member.new_chat_member.status
+    old_status = chat_member.old_chat_member.status
+
+    # Promosi / demosi admin langsung diterapkan ke cache admin, lalu daftar admin diambil ulang
+    # pada pengecekan berikutnya agar tidak menunggu TTL
+    admin_cache.apply(chat_id, user_id, new_status, format_admin_username(user))
+    if old_status != new_status and (old_status in ADMIN_STATUSES or new_status in ADMIN_STATUSES):
+        admin_cache.invalidate(chat_id)
 
     # Abaikan jika bot yang bergabung
     if user.is_bot:
@@ -832,6 +1221,7 @@ async def handle_chat_member_update(update: Update, context: ContextTypes.DEFAUL
 
     # Log setiap perubahan status anggota
     logging.info(f"Status Anggota Grup: Pengguna {user_name} (ID: {user_id}) Grup {chat_id} - Status: {new_status}")
+    membership_index.record(user_id, chat_id, new_status)
 
     # Cek apakah bot masih aktif di grup ini sebelum mengambil tindakan
     if chat_id not in active_groups:
@@ -840,19 +1230,24 @@ async def handle_chat_member_update(update: Update, context: ContextTypes.DEFAUL
 
     # Jika pengguna baru bergabung (baik secara manual atau diundang admin/member)
     if new_status in ["member", "administrator"]:
+        if old_status in ["left", "kicked"]:
+            await handle_raid_transition(context.bot, chat_id, raid_detector.record_join(chat_id))
+
         # Periksa apakah user ini ada di daftar blokir
         if user_id in banned_users:
             logging.warning(f"Pengguna {user_name} (ID: {user_id}) bergabung kembali ke dalam grup. Pengguna akan dikeluarkan!")
             try:
                 # Keluarkan pengguna dari grup
-                await context.bot.ban_chat_member(chat_id=int(chat_id), user_id=int(user_id))
-                await context.bot.send_message(chat_id=int(chat_id), text=f"🚫 {user_name} telah diblokir karena pelanggaran dan tidak diperbolehkan untuk bergabung ke dalam grup!")
+                await outbound_dispatcher.call(LANE_ENFORCE, context.bot.ban_chat_member, chat_id=int(chat_id), user_id=int(user_id))
+                membership_index.record(user_id, chat_id, "kicked")
+                await outbound_dispatcher.call(LANE_WARNING, context.bot.send_message, message_chat_id=chat_id, chat_id=int(chat_id), text=f"🚫 {user_name} telah diblokir karena pelanggaran dan tidak diperbolehkan untuk bergabung ke dalam grup!")
                 logging.info(f"Pengguna {user_name} (ID: {user_id}) berhasil dikeluarkan dari grup {chat_id}!")
 
                 # Notifikasi ban di DM
                 if user_id in banned_users:  # user_id dalam bentuk string
                     try:
-                        await context.bot.send_message(
+                        await outbound_dispatcher.call(
+                            LANE_DM, context.bot.send_message,
                             chat_id=int(user_id),
                             text="🚫 Anda telah diblokir karena pelanggaran dan tidak diperbolehkan untuk bergabung ke dalam grup!"
                         )
@@ -870,7 +1265,8 @@ async def handle_chat_member_update(update: Update, context: ContextTypes.DEFAUL
 
             # 1. Restrict user sepenuhnya
             try:
-                await context.bot.restrict_chat_member(
+                await outbound_dispatcher.call(
+                    LANE_ENFORCE, context.bot.restrict_chat_member,
                     chat_id=int(chat_id),
                     user_id=int(user_id),
                     permissions=ChatPermissions(
@@ -887,11 +1283,16 @@ async def handle_chat_member_update(update: Update, context: ContextTypes.DEFAUL
                         can_invite_users=False
                     )
                 )
+                membership_index.record(user_id, chat_id, "restricted")
                 logging.info(f"{user_name} (ID: {user_id}) berhasil direstrict di grup {chat_id}")
             except Exception as e:
                 logging.warning(f"Gagal restrict user {user_name} di grup {chat_id}: {e}")
 
-            # 2. Kirim pesan sambutan dengan tombol ke grup
+            # 2. Kirim pesan sambutan dengan tombol ke grup (tidak dikirim per user saat mode raid)
+            if raid_detector.is_aggressive(chat_id):
+                logging.info(f"[RAID] Pesan sambutan untuk {user_name} di grup {chat_id} tidak dikirim")
+                return
+
             welcome_text = (
                 f"Halo {user_name}! Selamat datang!  👋🏻\n\n"
                 "Saya AntiJudiBot yang akan membantu menjaga grup ini dari pesan promosi judi online.\n\n"
@@ -903,7 +1304,9 @@ async def handle_chat_member_update(update: Update, context: ContextTypes.DEFAUL
             reply_markup = InlineKeyboardMarkup(keyboard)
 
             try:
-                await context.bot.send_message(
+                await outbound_dispatcher.call(
+                    LANE_WARNING, context.bot.send_message,
+                    message_chat_id=chat_id,
                     chat_id=int(chat_id),
                     text=welcome_text,
                     parse_mode="HTML",
@@ -913,12 +1316,124 @@ async def handle_chat_member_update(update: Update, context: ContextTypes.DEFAUL
             except Exception as e:
                 logging.warning(f"Gagal kirim pesan sambutan ke {user_name} di grup {chat_id}: {e}")
 
+        # Mode raid (opsional): anggota yang sudah terverifikasi dan bergabung kembali dibatasi sementara
+        elif RAID_RESTRICT_VERIFIED_JOINS and new_status == "member" and old_status in ["left", "kicked"] and raid_detector.is_aggressive(chat_id):
+            try:
+                await outbound_dispatcher.call(
+                    LANE_ENFORCE, context.bot.restrict_chat_member,
+                    chat_id=int(chat_id),
+                    user_id=int(user_id),
+                    permissions=ChatPermissions(
+                        can_send_messages=False,
+                        can_send_audios=False,
+                        can_send_documents=False,
+                        can_send_photos=False,
+                        can_send_videos=False,
+                        can_send_video_notes=False,
+                        can_send_voice_notes=False,
+                        can_send_polls=False,
+                        can_send_other_messages=False,
+                        can_add_web_page_previews=False,
+                        can_invite_users=False
+                    ),
+                    until_date=int(time.time()) + RAID_JOIN_RESTRICT_SECONDS
+                )
+                membership_index.record(user_id, chat_id, "restricted")
+                logging.info(f"[RAID] {user_name} (ID: {user_id}) dibatasi {RAID_JOIN_RESTRICT_SECONDS} detik di grup {chat_id}")
+            except Exception as e:
+                logging.warning(f"Gagal membatasi sementara {user_name} di grup {chat_id}: {e}")
+
+# Handler untuk sinkronisasi dan compaction WAL secara berkala
+async def sync_message_logs(context: ContextTypes.DEFAULT_TYPE):
+    violation_log.sync()
+    non_violation_log.sync()
+
+# Pesan yang dikoreksi dashboard juga dipindahkan di index near-duplicate dan reputasi
+def update_relabelled_indexes(entry, to_kind):
+    text = entry.get("message", "")
+    if near_duplicate_index is not None:
+        if to_kind == "clean":
+            near_duplicate_index.remove(text)
+        else:
+            near_duplicate_index.add(text)
+    if reputation_index is not None:
+        reputation_index.relabel(text, 0 if to_kind == "clean" else 1)
+
+# Handler untuk menerapkan relabel dari dashboard ke index dan data di memori
+async def sync_dashboard_relabels(context: ContextTypes.DEFAULT_TYPE):
+    global relabel_cursor
+    records, relabel_cursor = store.relabels_since(relabel_cursor)
+    if records:
+        moved = apply_relabels(
+            records, {"violation": violation_log.data, "clean": non_violation_log.data}, message_index,
+            on_move=update_relabelled_indexes
+        )
+        logging.info(f"{len(records)} relabel dari dashboard diterapkan ({moved} pesan dipindahkan di memori)")
+
+# Handler untuk menyimpan hit dan last seen reputasi entitas (ditampilkan di dashboard)
+async def save_entity_reputation(context: ContextTypes.DEFAULT_TYPE):
+    for key, item in reputation_index.take_changes():
+        document_flusher.mark_dirty("entity_reputation", key, lambda item=item: item)
+
+# Handler untuk mengarsipkan pesan bersih yang melewati retensi (dijalankan di thread)
+async def archive_old_messages(context: ContextTypes.DEFAULT_TYPE):
+    try:
+        await asyncio.to_thread(store.archive_messages, "clean", CLEAN_RETENTION_DAYS, CLEAN_ARCHIVE_DIR)
+    except Exception as e:
+        logging.error(f"Gagal mengarsipkan pesan bersih: {e}")
+
+# Handler untuk mengembalikan grup yang sudah sepi dari mode agresif
+async def check_raid_modes(context: ContextTypes.DEFAULT_TYPE):
+    for group_id, transition in raid_detector.check():
+        await handle_raid_transition(context.bot, group_id, transition)
+
+# Posisi jurnal relabel disimpan setelah kedua snapshot berhasil ditulis, sehingga relabel yang belum
+# tercakup snapshot diputar ulang saat start berikutnya
+async def compact_message_logs(context: ContextTypes.DEFAULT_TYPE):
+    cursor = relabel_cursor
+    compacted = await violation_log.compact_async()
+    compacted = await non_violation_log.compact_async() and compacted
+    if compacted:
+        store.save_relabel_cursor(cursor)
+
+# Hook lifecycle aplikasi
+async def on_startup(application):
+    await prediction_batcher.start()
+    document_flusher.start()
+    outbound_dispatcher.start()
+
+    # Jadwal unmute dibangun sekali dari mute_tracker yang tersimpan
+    for user_id, data in mute_tracker.items():
+        schedule_unmute(application.job_queue, user_id, data["until"])
+    logging.info(f"{len(mute_tracker)} jadwal unmute dipulihkan")
+
+async def on_shutdown(application):
+    await prediction_batcher.stop()
+    await warning_aggregator.stop()
+    await outbound_dispatcher.stop()
+    inference_executor.shutdown(wait=True)
+    prediction_cache.save()
+    await document_flusher.stop()
+    compacted = violation_log.close()
+    compacted = non_violation_log.close() and compacted
+    if compacted:
+        store.save_relabel_cursor(relabel_cursor)
+    if store.backend == "sqlite":
+        store.close()
+
 # Fungsi utama untuk menjalankan bot
 def main():
     logging.info("Memulai bot...")
     
     # Membangun aplikasi dengan token
-    application = ApplicationBuilder().token(TOKEN).build()
+    application = (
+        ApplicationBuilder()
+        .token(TOKEN)
+        .concurrent_updates(CONCURRENT_UPDATES)  # Handler harus berjalan bersamaan agar pesan bisa di-batch
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
 
     # Menambahkan handler untuk perintah dan pesan
     application.add_handler(CommandHandler("start", start))
@@ -926,7 +1441,16 @@ def main():
     application.add_handler(CommandHandler("stop_antijudibot", stop_anti_judi_bot))
     application.add_handler(CommandHandler("status_antijudibot", status_anti_judi_bot))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
-    application.job_queue.run_repeating(auto_unmute_users, interval=60, first=10)
+    if reputation_index is not None:
+        application.job_queue.run_repeating(save_entity_reputation, interval=REPUTATION_SAVE_INTERVAL, first=REPUTATION_SAVE_INTERVAL)
+    application.job_queue.run_repeating(check_raid_modes, interval=RAID_CHECK_INTERVAL, first=RAID_CHECK_INTERVAL)
+    application.job_queue.run_repeating(sync_dashboard_mutes, interval=MUTE_SYNC_INTERVAL, first=MUTE_SYNC_INTERVAL)
+    application.job_queue.run_repeating(sync_dashboard_bans, interval=BAN_SYNC_INTERVAL, first=BAN_SYNC_INTERVAL)
+    application.job_queue.run_repeating(sync_message_logs, interval=WAL_GROUP_COMMIT_INTERVAL, first=WAL_GROUP_COMMIT_INTERVAL)
+    application.job_queue.run_repeating(sync_dashboard_relabels, interval=RELABEL_SYNC_INTERVAL, first=RELABEL_SYNC_INTERVAL)
+    application.job_queue.run_repeating(archive_old_messages, interval=24 * 3600, first=60)
+    application.job_queue.run_repeating(compact_message_logs, interval=WAL_COMPACTION_INTERVAL, first=WAL_COMPACTION_INTERVAL)
+    application.job_queue.run_repeating(log_prediction_cache_stats, interval=PREDICTION_CACHE_STATS_INTERVAL, first=PREDICTION_CACHE_STATS_INTERVAL)
     application.add_handler(ChatMemberHandler(handle_chat_member_update, ChatMemberHandler.CHAT_MEMBER))
     application.add_handler(ChatMemberHandler(handle_my_chat_member, ChatMemberHandler.MY_CHAT_MEMBER))
     logging.info("Bot sedang berjalan...")
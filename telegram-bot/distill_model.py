@@ -0,0 +1,155 @@
+import os
+import argparse
+import logging
+from inference import TorchBackend, resolve_text_normalization, save_text_normalization
+from model_utils import DEFAULT_DATASET_PATH, load_labelled_dataset, classification_metrics, benchmark_predict, model_size_mb, save_report
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DISTILLATION_REPORT_FILE = "distillation_report.json"
+
+# Fungsi untuk membuat model student (lebih sedikit layer dan hidden size lebih kecil)
+# Jika hidden size sama dengan teacher, embedding dan layer teacher (berjarak rata) disalin sebagai inisialisasi.
+def build_student(teacher, num_layers, hidden_size, num_heads, intermediate_size):
+    from transformers import BertConfig, BertForSequenceClassification
+    config = BertConfig.from_dict({
+        **teacher.config.to_dict(),
+        "num_hidden_layers": num_layers,
+        "hidden_size": hidden_size,
+        "num_attention_heads": num_heads,
+        "intermediate_size": intermediate_size,
+        "hidden_dropout_prob": 0.1,
+        "attention_probs_dropout_prob": 0.1
+    })
+    student = BertForSequenceClassification(config)
+
+    if hidden_size == teacher.config.hidden_size and num_heads == teacher.config.num_attention_heads:
+        student.bert.embeddings.load_state_dict(teacher.bert.embeddings.state_dict())
+        step = teacher.config.num_hidden_layers / num_layers
+        for student_index in range(num_layers):
+            teacher_index = int(round((student_index + 1) * step)) - 1
+            student.bert.encoder.layer[student_index].load_state_dict(teacher.bert.encoder.layer[teacher_index].state_dict())
+        student.bert.pooler.load_state_dict(teacher.bert.pooler.state_dict())
+        student.classifier.load_state_dict(teacher.classifier.state_dict())
+        logging.info("Student diinisialisasi dari embedding dan layer teacher")
+    return student
+
+# Fungsi untuk menghitung soft label (logits) teacher sekali di awal
+def teacher_logits(teacher_backend, texts, batch_size):
+    import torch
+    chunks = []
+    for start in range(0, len(texts), batch_size):
+        chunks.append(torch.from_numpy(teacher_backend.predict_logits(texts[start:start + batch_size])))
+    return torch.cat(chunks)
+
+# Fungsi untuk melatih student dengan soft label teacher + label asli
+def train_student(student, tokenizer, texts, labels, soft_logits, args):
+    import torch
+    import torch.nn.functional as F
+
+    optimizer = torch.optim.AdamW(student.parameters(), lr=args.learning_rate, weight_decay=0.01)
+    targets = torch.tensor(labels)
+    temperature = args.temperature
+    student.train()
+    for epoch in range(args.epochs):
+        permutation = torch.randperm(len(texts)).tolist()
+        total_loss = 0.0
+        for start in range(0, len(texts), args.batch_size):
+            index = permutation[start:start + args.batch_size]
+            inputs = tokenizer([texts[i] for i in index], return_tensors="pt", padding="longest", truncation=True, max_length=args.max_length)
+            logits = student(**inputs).logits
+
+            soft_loss = F.kl_div(
+                F.log_softmax(logits / temperature, dim=-1),
+                F.softmax(soft_logits[index] / temperature, dim=-1),
+                reduction="batchmean"
+            ) * temperature ** 2
+            hard_loss = F.cross_entropy(logits, targets[index])
+            loss = args.alpha * soft_loss + (1 - args.alpha) * hard_loss
+
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item() * len(index)
+        logging.info(f"Epoch {epoch + 1}/{args.epochs} - loss {total_loss / len(texts):.4f}")
+    student.eval()
+    return student
+
+# Fungsi untuk mengevaluasi akurasi, F1, latensi dan ukuran sebuah backend
+def evaluate_backend(backend, texts, labels, path):
+    predictions, latency = benchmark_predict(lambda chunk: [r.label for r in backend.predict(chunk)], texts, batch_size=1)
+    return {
+        **classification_metrics(labels, predictions),
+        **latency,
+        "size_mb": model_size_mb(path),
+        "parameters": sum(p.numel() for p in backend.model.parameters())
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Distilasi IndoBERT menjadi model student kecil untuk deployment CPU")
+    parser.add_argument("--checkpoint", required=True, help="Folder checkpoint IndoBERT teacher (CHECKPOINT_PATH)")
+    parser.add_argument("--output-dir", default="student-model", help="Folder output student (bisa dipakai sebagai CHECKPOINT_PATH)")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET_PATH)
+    parser.add_argument("--layers", type=int, default=4)
+    parser.add_argument("--hidden-size", type=int, default=384)
+    parser.add_argument("--heads", type=int, default=6)
+    parser.add_argument("--intermediate-size", type=int, default=1536)
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--max-length", type=int, default=128)
+    parser.add_argument("--learning-rate", type=float, default=5e-5)
+    parser.add_argument("--temperature", type=float, default=2.0)
+    parser.add_argument("--alpha", type=float, default=0.7, help="Bobot loss soft label teacher")
+    parser.add_argument("--threads", type=int, default=os.cpu_count(), help="torch.set_num_threads selama training")
+    parser.add_argument("--eval-limit", type=int, default=1000, help="Jumlah sampel test untuk laporan latensi")
+    parser.add_argument("--normalize", action=argparse.BooleanOptionalAction, default=None,
+                        help="Normalisasi slang/stopword (default mengikuti preprocessing.json checkpoint)")
+    args = parser.parse_args()
+
+    import torch
+    from sklearn.model_selection import train_test_split
+    torch.set_num_threads(args.threads)
+
+    # Pembagian data mengikuti notebook skenario (70% train, 20% validasi, 10% test)
+    normalize = resolve_text_normalization(args.normalize, args.checkpoint)
+    texts, labels = load_labelled_dataset(args.dataset, normalize=normalize)
+    X_train, X_temp, y_train, y_temp = train_test_split(texts, labels, test_size=0.3, random_state=42, stratify=labels)
+    X_val, X_test, y_val, y_test = train_test_split(X_temp, y_temp, test_size=0.3333, random_state=42, stratify=y_temp)
+
+    teacher_backend = TorchBackend(args.checkpoint, max_length=args.max_length)
+    soft_logits = teacher_logits(teacher_backend, X_train, args.batch_size)
+
+    student = build_student(teacher_backend.model, args.layers, args.hidden_size, args.heads, args.intermediate_size)
+    student = train_student(student, teacher_backend.tokenizer, X_train, y_train, soft_logits, args)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    student.save_pretrained(args.output_dir)
+    teacher_backend.tokenizer.save_pretrained(args.output_dir)
+    save_text_normalization(args.output_dir, normalize)
+
+    # Laporan perbandingan teacher vs student
+    student_backend = TorchBackend(args.output_dir, max_length=args.max_length)
+    X_eval, y_eval = X_test[:args.eval_limit], y_test[:args.eval_limit]
+    val_predictions = [r.label for r in student_backend.predict(X_val[:args.eval_limit])]
+    report = {
+        "teacher": evaluate_backend(teacher_backend, X_eval, y_eval, args.checkpoint),
+        "student": evaluate_backend(student_backend, X_eval, y_eval, args.output_dir),
+        "student_config": {
+            "layers": args.layers, "hidden_size": args.hidden_size,
+            "heads": args.heads, "intermediate_size": args.intermediate_size
+        },
+        "student_validation": classification_metrics(y_val[:args.eval_limit], val_predictions),
+        "samples": len(X_eval),
+        "threads": args.threads
+    }
+    report["speedup_p50"] = report["teacher"]["p50_ms"] / report["student"]["p50_ms"] if report["student"]["p50_ms"] else 0.0
+    save_report(os.path.join(args.output_dir, DISTILLATION_REPORT_FILE), report)
+
+    print(f"{'':9}{'Parameter':>12}{'Ukuran (MB)':>14}{'p50 (ms)':>12}{'p99 (ms)':>12}{'Akurasi':>10}{'F1':>10}")
+    for name in ("teacher", "student"):
+        row = report[name]
+        print(f"{name:9}{row['parameters']:>12,}{row['size_mb']:>14.1f}{row['p50_ms']:>12.2f}{row['p99_ms']:>12.2f}{row['accuracy']:>10.4f}{row['f1']:>10.4f}")
+    print(f"Student {report['speedup_p50']:.1f}x lebih cepat (p50), disimpan di {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
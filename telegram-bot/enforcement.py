@@ -0,0 +1,205 @@
+import time
+import asyncio
+import logging
+from telegram.error import RetryAfter
+
+# Token bucket sederhana untuk event loop asyncio
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        while True:
+            wait = self.try_acquire()
+            if wait == 0:
+                return
+            await asyncio.sleep(wait)
+
+    # Mengambil satu token jika tersedia (hasil 0), atau mengembalikan lama tunggu dalam detik
+    def try_acquire(self):
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+# Jalur prioritas dispatcher (angka kecil diproses lebih dulu)
+LANE_DELETE = 0     # Hapus pesan spam
+LANE_ENFORCE = 1    # Restrict / ban (termasuk getChatMember / getChatAdministrators yang mendahuluinya)
+LANE_WARNING = 2    # Peringatan dan notifikasi di grup
+LANE_DM = 3         # Pesan pribadi ke user
+LANE_NAMES = {LANE_DELETE: "delete", LANE_ENFORCE: "enforce", LANE_WARNING: "warning", LANE_DM: "dm"}
+
+# Dispatcher semua request keluar ke Telegram dengan jalur prioritas: delete > restrict/ban > peringatan > DM.
+# Worker selalu mengambil request dengan prioritas tertinggi, lalu menunggu token bucket global (~30 request/detik)
+# dan bucket per grup untuk pesan yang dikirim ke grup (~20 pesan/menit). RetryAfter menghentikan semua worker
+# selama retry_after detik dan request dimasukkan kembali ke antrian dengan prioritas yang sama.
+class OutboundDispatcher:
+    def __init__(self, global_rate=30, group_message_rate=20 / 60, group_burst=3, workers=4, max_retries=3):
+        self.global_bucket = TokenBucket(global_rate)
+        self.group_message_rate = group_message_rate
+        self.group_burst = group_burst
+        self.workers = max(1, int(workers))
+        self.max_retries = max_retries
+        self._group_buckets = {}
+        self._queue = None
+        self._tasks = []
+        self._delayed = {}  # request yang menunggu bucket grup: handle timer -> (jalur, item)
+        self._sequence = 0
+        self._paused_until = 0.0
+        self._depths = {lane: 0 for lane in LANE_NAMES}
+        self.sent = {lane: 0 for lane in LANE_NAMES}
+        self.throttled = 0
+
+    def _group_bucket(self, chat_id):
+        bucket = self._group_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._group_buckets[chat_id] = TokenBucket(self.group_message_rate, self.group_burst)
+        return bucket
+
+    def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    # Menjalankan satu panggilan API lewat antrian; message_chat_id diisi untuk pengiriman pesan ke grup
+    # Sebelum start() (atau setelah stop()) panggilan dijalankan langsung dengan batas yang sama.
+    async def call(self, lane, api_call, *args, message_chat_id=None, **kwargs):
+        if not self._tasks:
+            return await self._call_direct(api_call, args, kwargs, message_chat_id)
+        future = asyncio.get_running_loop().create_future()
+        self._put(lane, [future, api_call, args, kwargs, message_chat_id, 0])
+        return await future
+
+    def _delay(self, lane, item, wait):
+        self._depths[lane] += 1
+        handle = None
+
+        def requeue():
+            self._delayed.pop(handle, None)
+            self._depths[lane] -= 1
+            self._put(lane, item)
+
+        handle = asyncio.get_running_loop().call_later(wait, requeue)
+        self._delayed[handle] = (lane, item)
+
+    def _put(self, lane, item):
+        self._sequence += 1
+        self._depths[lane] += 1
+        self._queue.put_nowait((lane, self._sequence, item))
+
+    async def _call_direct(self, api_call, args, kwargs, message_chat_id):
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(message_chat_id)
+            try:
+                return await api_call(*args, **kwargs)
+            except RetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                self._pause(e)
+                await asyncio.sleep(max(0.0, self._paused_until - time.monotonic()))
+
+    async def _acquire(self, message_chat_id):
+        if message_chat_id is not None:
+            await self._group_bucket(str(message_chat_id)).acquire()
+        await self.global_bucket.acquire()
+
+    def _pause(self, error):
+        self.throttled += 1
+        retry_after = error.retry_after.total_seconds() if hasattr(error.retry_after, "total_seconds") else error.retry_after
+        self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        logging.warning(f"[RATE LIMIT] Telegram meminta menunggu {retry_after} detik")
+
+    async def _run(self):
+        while True:
+            lane, _, item = await self._queue.get()
+            self._depths[lane] -= 1
+            future, api_call, args, kwargs, message_chat_id, attempt = item
+            try:
+                if future.cancelled():
+                    continue
+                while self._paused_until > time.monotonic():
+                    await asyncio.sleep(self._paused_until - time.monotonic())
+                # Grup yang sedang penuh tidak menahan worker: request dijadwalkan ulang saat token tersedia
+                if message_chat_id is not None:
+                    wait = self._group_bucket(str(message_chat_id)).try_acquire()
+                    if wait > 0:
+                        self._delay(lane, item, wait)
+                        continue
+                await self.global_bucket.acquire()
+                try:
+                    result = await api_call(*args, **kwargs)
+                except RetryAfter as e:
+                    self._pause(e)
+                    if attempt < self.max_retries:
+                        item[5] = attempt + 1
+                        self._put(lane, item)
+                    elif not future.done():
+                        future.set_exception(e)
+                    continue
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                    continue
+                self.sent[lane] += 1
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self._queue.task_done()
+
+    # Menunggu antrian kosong (maksimal timeout detik), lalu menghentikan worker
+    async def stop(self, timeout=10):
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logging.warning(f"Dispatcher dihentikan dengan {self._queue.qsize()} request belum terkirim")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        pending = [item for _, item in self._delayed.values()]
+        for handle in self._delayed:
+            handle.cancel()
+        self._delayed = {}
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait()[2])
+        for item in pending:
+            if not item[0].done():
+                item[0].set_exception(RuntimeError("Dispatcher sudah dihentikan"))
+        self._depths = {lane: 0 for lane in LANE_NAMES}
+
+    # Jumlah request yang menunggu per jalur
+    def queue_depths(self):
+        return {LANE_NAMES[lane]: depth for lane, depth in self._depths.items()}
+
+    def stats(self):
+        return {
+            "queued": self.queue_depths(),
+            "sent": {LANE_NAMES[lane]: count for lane, count in self.sent.items()},
+            "throttled": self.throttled
+        }
+
+# Fungsi untuk menjalankan aksi per grup secara bersamaan dengan batas paralelisme
+# action(group_id, group_info) dijalankan untuk setiap grup; hasilnya dikembalikan berurutan
+# sebagai (group_id, group_info, hasil atau exception) agar pemanggil bisa mencatat hasil per grup.
+async def fan_out(groups, action, max_concurrency=8):
+    semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+    groups = list(groups)
+
+    async def run(group_id, group_info):
+        async with semaphore:
+            return await action(group_id, group_info)
+
+    results = await asyncio.gather(*(run(group_id, group_info) for group_id, group_info in groups), return_exceptions=True)
+    return [(group_id, group_info, result) for (group_id, group_info), result in zip(groups, results)]
@@ -0,0 +1,102 @@
+import os
+import argparse
+import logging
+from inference import TorchBackend, OnnxBackend, ONNX_MODEL_FILE, PARITY_REPORT_FILE, resolve_text_normalization, save_text_normalization
+from model_utils import DEFAULT_DATASET_PATH, load_labelled_dataset, classification_metrics, save_report
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Fungsi untuk export checkpoint IndoBERT dan konfigurasi tokenizer ke graph ONNX
+def export_onnx(checkpoint_path, output_dir, opset=14):
+    import torch
+    from transformers import BertTokenizer, BertForSequenceClassification
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = BertTokenizer.from_pretrained(checkpoint_path)
+    model = BertForSequenceClassification.from_pretrained(checkpoint_path)
+    model.eval()
+
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    sample = tokenizer(["contoh pesan untuk export onnx"], return_tensors="pt")
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            os.path.join(output_dir, ONNX_MODEL_FILE),
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True
+        )
+    tokenizer.save_pretrained(output_dir)
+    logging.info(f"Model ONNX disimpan di {output_dir}")
+
+# Fungsi untuk membandingkan logits ONNX dengan model torch pada dataset.csv
+def check_parity(checkpoint_path, output_dir, dataset_path, limit, batch_size, tolerance, min_agreement, normalize=True):
+    import numpy as np
+
+    texts, labels = load_labelled_dataset(dataset_path, limit=limit, normalize=normalize)
+    torch_backend = TorchBackend(checkpoint_path)
+    onnx_backend = OnnxBackend(output_dir, require_parity=False)
+
+    max_abs_diff = 0.0
+    torch_preds, onnx_preds = [], []
+    for start in range(0, len(texts), batch_size):
+        chunk = texts[start:start + batch_size]
+        torch_logits = torch_backend.predict_logits(chunk)
+        onnx_logits = onnx_backend.predict_logits(chunk)
+        max_abs_diff = max(max_abs_diff, float(np.abs(torch_logits - onnx_logits).max()))
+        torch_preds.extend(torch_logits.argmax(axis=-1).tolist())
+        onnx_preds.extend(onnx_logits.argmax(axis=-1).tolist())
+
+    agreement = sum(1 for a, b in zip(torch_preds, onnx_preds) if a == b) / len(texts) if texts else 0.0
+    report = {
+        "checkpoint": os.path.abspath(checkpoint_path),
+        "dataset": os.path.abspath(dataset_path),
+        "samples": len(texts),
+        "normalized": normalize,
+        "max_abs_logit_diff": max_abs_diff,
+        "label_agreement": agreement,
+        "tolerance": tolerance,
+        "min_agreement": min_agreement,
+        "torch_metrics": classification_metrics(labels, torch_preds),
+        "onnx_metrics": classification_metrics(labels, onnx_preds),
+        "passed": max_abs_diff <= tolerance and agreement >= min_agreement
+    }
+    save_report(os.path.join(output_dir, PARITY_REPORT_FILE), report)
+
+    if report["passed"]:
+        logging.info(f"Parity check lolos: max diff {max_abs_diff:.6f}, kesesuaian label {agreement:.4%}")
+    else:
+        logging.error(f"Parity check gagal: max diff {max_abs_diff:.6f}, kesesuaian label {agreement:.4%} - backend ONNX tidak akan dipakai bot")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Export model IndoBERT ke ONNX dan cek parity terhadap model torch")
+    parser.add_argument("--checkpoint", required=True, help="Folder checkpoint IndoBERT (CHECKPOINT_PATH)")
+    parser.add_argument("--output-dir", default="onnx-model", help="Folder output model ONNX (ONNX_MODEL_DIR)")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET_PATH, help="Dataset berlabel untuk parity check")
+    parser.add_argument("--limit", type=int, default=1000, help="Jumlah sampel dataset untuk parity check (0 = semua)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--opset", type=int, default=14)
+    parser.add_argument("--tolerance", type=float, default=1e-3, help="Selisih logits maksimal yang diizinkan")
+    parser.add_argument("--min-agreement", type=float, default=0.999, help="Kesesuaian label minimal dengan model torch")
+    parser.add_argument("--normalize", action=argparse.BooleanOptionalAction, default=None,
+                        help="Normalisasi slang/stopword (default mengikuti preprocessing.json checkpoint)")
+    args = parser.parse_args()
+
+    normalize = resolve_text_normalization(args.normalize, args.checkpoint)
+    export_onnx(args.checkpoint, args.output_dir, opset=args.opset)
+    save_text_normalization(args.output_dir, normalize)
+    report = check_parity(
+        args.checkpoint, args.output_dir, args.dataset, args.limit or None,
+        args.batch_size, args.tolerance, args.min_agreement, normalize
+    )
+    raise SystemExit(0 if report["passed"] else 1)
+
+if __name__ == "__main__":
+    main()
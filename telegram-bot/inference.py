@@ -0,0 +1,435 @@
+import os
+import asyncio
+import logging
+from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor
+from model_utils import load_report, save_report
+
+ONNX_MODEL_FILE = "model.onnx"
+PARITY_REPORT_FILE = "parity_report.json"
+QUANTIZED_MODEL_FILE = "quantized_model.pt"
+QUANTIZATION_REPORT_FILE = "quantization_report.json"
+EARLY_EXIT_HEADS_FILE = "early_exit_heads.pt"
+PREPROCESSING_FILE = "preprocessing.json"
+
+# Hasil prediksi terstruktur (label, probabilitas judi, versi model dan layer keluar)
+@dataclass
+class PredictionResult:
+    label: int
+    spam_probability: float
+    model_version: str
+    exit_layer: int = None
+    stage: str = "model"
+
+    def as_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+# Fungsi softmax untuk logits numpy
+def softmax(logits):
+    import numpy as np
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+# Fungsi untuk mengubah probabilitas menjadi daftar PredictionResult
+def results_from_probabilities(probabilities, model_version, exit_layers=None):
+    exit_layers = exit_layers or [None] * len(probabilities)
+    return [
+        PredictionResult(
+            label=int(max(range(len(row)), key=lambda i: row[i])),
+            spam_probability=float(row[1]),
+            model_version=model_version,
+            exit_layer=exit_layer
+        )
+        for row, exit_layer in zip(probabilities, exit_layers)
+    ]
+
+# Fungsi untuk membuat versi model dari nama backend dan folder checkpoint
+def model_version_of(backend_name, path):
+    return f"{backend_name}:{os.path.basename(os.path.normpath(path))}"
+
+# Fungsi untuk membaca dan menulis penanda preprocessing checkpoint (preprocessing.json)
+# None berarti checkpoint belum ditandai, misalnya checkpoint lama hasil notebook.
+def load_text_normalization(model_dir):
+    report = load_report(os.path.join(model_dir, PREPROCESSING_FILE)) if model_dir else None
+    return report.get("text_normalization") if report else None
+
+def save_text_normalization(model_dir, enabled):
+    save_report(os.path.join(model_dir, PREPROCESSING_FILE), {"text_normalization": bool(enabled)})
+
+# Normalisasi yang dipakai script: argumen --normalize, lalu penanda checkpoint,
+# lalu default True (checkpoint notebook dilatih dengan teks yang dinormalisasi)
+def resolve_text_normalization(requested, checkpoint_path, default=True):
+    if requested is not None:
+        return requested
+    marked = load_text_normalization(checkpoint_path)
+    return default if marked is None else marked
+
+# Fungsi untuk load dan save head klasifikasi early-exit (hasil train_early_exit.py)
+def load_early_exit_heads(path):
+    import torch
+    data = torch.load(path)
+    heads = {}
+    for layer_index, state_dict in data["heads"].items():
+        head = torch.nn.Linear(data["hidden_size"], data["num_labels"])
+        head.load_state_dict(state_dict)
+        head.eval()
+        heads[int(layer_index)] = head
+    return heads
+
+def save_early_exit_heads(path, heads, hidden_size, num_labels=2):
+    import torch
+    torch.save({
+        "hidden_size": hidden_size,
+        "num_labels": num_labels,
+        "heads": {layer_index: head.state_dict() for layer_index, head in heads.items()}
+    }, path)
+
+# Backend inferensi PyTorch (model eager dari CHECKPOINT_PATH)
+# Jika head early-exit tersedia, inferensi berhenti di layer tengah yang sudah cukup yakin.
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self, checkpoint_path, max_length=512, early_exit_heads_path=None, early_exit_threshold=0.95):
+        from transformers import BertTokenizer, BertForSequenceClassification
+        self.max_length = max_length
+        self.tokenizer = BertTokenizer.from_pretrained(checkpoint_path)
+        self.model = BertForSequenceClassification.from_pretrained(checkpoint_path)
+        self.model.eval()
+        self.model_version = model_version_of(self.name, checkpoint_path)
+        self.text_normalization = load_text_normalization(checkpoint_path)
+        self._setup_early_exit(early_exit_heads_path, early_exit_threshold)
+
+    def _setup_early_exit(self, heads_path, threshold):
+        self.early_exit_threshold = threshold
+        self.early_exit_heads = {}
+        if heads_path and os.path.exists(heads_path):
+            self.early_exit_heads = load_early_exit_heads(heads_path)
+            logging.info(f"Head early-exit dimuat untuk layer {sorted(self.early_exit_heads)} (threshold {threshold})")
+        elif heads_path:
+            logging.warning(f"Head early-exit {heads_path} tidak ditemukan, inferensi memakai semua layer")
+
+    def predict(self, texts):
+        if self.early_exit_heads:
+            return self._predict_early_exit(texts)
+        num_layers = self.model.config.num_hidden_layers
+        return results_from_probabilities(self.predict_proba(texts), self.model_version, [num_layers] * len(texts))
+
+    # Forward pass layer demi layer, pesan yang sudah yakin dikeluarkan dari batch
+    def _predict_early_exit(self, texts):
+        import torch
+        inputs = self.tokenizer(texts, return_tensors="pt", padding="longest", truncation=True, max_length=self.max_length)
+        bert = self.model.bert
+        layers = bert.encoder.layer
+        probabilities = [None] * len(texts)
+        exit_layers = [None] * len(texts)
+
+        with torch.no_grad():
+            hidden = bert.embeddings(input_ids=inputs["input_ids"], token_type_ids=inputs.get("token_type_ids"))
+            mask = bert.get_extended_attention_mask(inputs["attention_mask"], inputs["input_ids"].shape)
+            active = torch.arange(len(texts))
+
+            for layer_index, layer in enumerate(layers, start=1):
+                hidden = layer(hidden, attention_mask=mask)[0]
+                head = self.early_exit_heads.get(layer_index)
+                if head is None or layer_index == len(layers):
+                    continue
+
+                layer_probabilities = torch.nn.functional.softmax(head(hidden[:, 0]), dim=-1)
+                confident = layer_probabilities.max(dim=-1).values >= self.early_exit_threshold
+                for position in confident.nonzero().flatten().tolist():
+                    original = active[position].item()
+                    probabilities[original] = layer_probabilities[position].tolist()
+                    exit_layers[original] = layer_index
+
+                remaining = ~confident
+                hidden, mask, active = hidden[remaining], mask[remaining], active[remaining]
+                if active.numel() == 0:
+                    break
+
+            # Pesan yang belum yakin memakai classifier asli di layer terakhir
+            if active.numel():
+                logits = self.model.classifier(bert.pooler(hidden))
+                final_probabilities = torch.nn.functional.softmax(logits, dim=-1)
+                for position, original in enumerate(active.tolist()):
+                    probabilities[original] = final_probabilities[position].tolist()
+                    exit_layers[original] = len(layers)
+
+        return results_from_probabilities(probabilities, self.model_version, exit_layers)
+
+    def predict_logits(self, texts):
+        import torch
+        inputs = self.tokenizer(texts, return_tensors="pt", padding="longest", truncation=True, max_length=self.max_length)
+        with torch.no_grad():
+            outputs = self.model(**inputs)
+        return outputs.logits.numpy()
+
+    def predict_proba(self, texts):
+        return softmax(self.predict_logits(texts))
+
+# Fungsi untuk membuat model IndoBERT INT8 (dynamic quantization pada layer Linear)
+def quantize_dynamic_int8(model):
+    import torch
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+# Backend inferensi PyTorch INT8 (hasil quantize_model.py)
+# Model ditolak jika penurunan akurasi terhadap fp32 melebihi max_accuracy_drop.
+class QuantizedTorchBackend(TorchBackend):
+    name = "int8"
+
+    def __init__(self, model_dir, max_accuracy_drop=0.01, max_length=512, early_exit_heads_path=None, early_exit_threshold=0.95):
+        report = load_report(os.path.join(model_dir, QUANTIZATION_REPORT_FILE))
+        if not report:
+            raise RuntimeError(f"Laporan kuantisasi tidak ditemukan di {model_dir}, jalankan quantize_model.py terlebih dahulu")
+        accuracy_drop = report["fp32"]["accuracy"] - report["int8"]["accuracy"]
+        if accuracy_drop > max_accuracy_drop:
+            raise RuntimeError(
+                f"Penurunan akurasi model INT8 ({accuracy_drop:.4f}) melebihi batas {max_accuracy_drop:.4f}"
+            )
+
+        import torch
+        from transformers import BertConfig, BertTokenizer, BertForSequenceClassification
+        self.max_length = max_length
+        self.tokenizer = BertTokenizer.from_pretrained(model_dir)
+        model = BertForSequenceClassification(BertConfig.from_pretrained(model_dir))
+        model.eval()
+        self.model = quantize_dynamic_int8(model)
+        self.model.load_state_dict(torch.load(os.path.join(model_dir, QUANTIZED_MODEL_FILE)))
+        self.model.eval()
+        self.model_version = model_version_of(self.name, model_dir)
+        self.text_normalization = load_text_normalization(model_dir)
+        self._setup_early_exit(early_exit_heads_path, early_exit_threshold)
+
+# Backend inferensi ONNX Runtime (hasil export_onnx.py)
+# Hanya boleh dipakai jika laporan parity terhadap model torch dinyatakan lolos.
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, model_dir, max_length=512, intra_op_threads=None, require_parity=True):
+        if require_parity:
+            report = load_report(os.path.join(model_dir, PARITY_REPORT_FILE))
+            if not report or not report.get("passed"):
+                raise RuntimeError(f"Model ONNX di {model_dir} belum lolos parity check, jalankan export_onnx.py terlebih dahulu")
+
+        import onnxruntime as ort
+        from transformers import BertTokenizer
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.max_length = max_length
+        self.tokenizer = BertTokenizer.from_pretrained(model_dir)
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, ONNX_MODEL_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {item.name for item in self.session.get_inputs()}
+        self.model_version = model_version_of(self.name, model_dir)
+        self.text_normalization = load_text_normalization(model_dir)
+
+    def predict_logits(self, texts):
+        import numpy as np
+        inputs = self.tokenizer(texts, return_tensors="np", padding="longest", truncation=True, max_length=self.max_length)
+        feed = {name: value.astype(np.int64) for name, value in inputs.items() if name in self.input_names}
+        return self.session.run(["logits"], feed)[0]
+
+    def predict_proba(self, texts):
+        return softmax(self.predict_logits(texts))
+
+    def predict(self, texts):
+        return results_from_probabilities(self.predict_proba(texts), self.model_version)
+
+# Fungsi untuk memuat backend inferensi ("torch", "onnx" atau "int8")
+# Jika backend ONNX/INT8 ditolak (belum lolos parity atau akurasi turun terlalu jauh), bot kembali memakai backend torch.
+def load_inference_backend(kind, checkpoint_path, onnx_model_dir=None, intra_op_threads=None,
+                           quantized_model_dir=None, max_accuracy_drop=0.01,
+                           early_exit_heads_path=None, early_exit_threshold=0.95):
+    if kind == "onnx":
+        try:
+            backend = OnnxBackend(onnx_model_dir, intra_op_threads=intra_op_threads)
+            logging.info(f"Backend inferensi ONNX dimuat dari {onnx_model_dir}")
+            return backend
+        except Exception as e:
+            logging.error(f"Backend ONNX tidak dapat digunakan, kembali ke backend torch: {e}")
+    elif kind == "int8":
+        try:
+            backend = QuantizedTorchBackend(
+                quantized_model_dir,
+                max_accuracy_drop=max_accuracy_drop,
+                early_exit_heads_path=early_exit_heads_path,
+                early_exit_threshold=early_exit_threshold
+            )
+            logging.info(f"Backend inferensi INT8 dimuat dari {quantized_model_dir}")
+            return backend
+        except Exception as e:
+            logging.error(f"Backend INT8 tidak dapat digunakan, kembali ke backend torch: {e}")
+    elif kind != "torch":
+        raise ValueError(f"Backend inferensi tidak dikenal: {kind}")
+
+    backend = TorchBackend(
+        checkpoint_path,
+        early_exit_heads_path=early_exit_heads_path,
+        early_exit_threshold=early_exit_threshold
+    )
+    logging.info(f"Backend inferensi torch dimuat dari {checkpoint_path}")
+    return backend
+
+# Pengaturan thread torch berlaku untuk seluruh proses (bukan per thread), jadi cukup diatur sekali.
+# Semua worker thread berbagi satu pool intra-op berisi intra_op_threads thread.
+def configure_torch_threads(intra_op_threads, inter_op_threads):
+    import torch
+    if intra_op_threads:
+        torch.set_num_threads(intra_op_threads)
+    if inter_op_threads:
+        try:
+            torch.set_interop_threads(inter_op_threads)
+        except RuntimeError as e:
+            # set_interop_threads hanya bisa dipanggil sekali per proses
+            logging.warning(f"Gagal mengatur inter-op threads: {e}")
+
+# Inisialisasi setiap worker inferensi (CPU affinity thread worker)
+def _init_inference_worker(cpu_affinity):
+    if cpu_affinity and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, set(cpu_affinity))
+        except OSError as e:
+            logging.warning(f"Gagal mengatur CPU affinity {cpu_affinity}: {e}")
+
+# Fungsi untuk membuat executor inferensi (thread pool)
+# Torch dan ONNX Runtime melepas GIL saat forward pass sehingga thread cukup. Tidak ada mode proses:
+# fork saat event loop dan thread torch sudah berjalan tidak aman, dan worker spawn harus memuat ulang model.
+def create_inference_executor(max_workers=1, intra_op_threads=None, inter_op_threads=None, cpu_affinity=None):
+    configure_torch_threads(intra_op_threads, inter_op_threads)
+    executor = ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="inference",
+        initializer=_init_inference_worker, initargs=(cpu_affinity,)
+    )
+    logging.info(
+        f"Executor inferensi dibuat: thread (workers={max_workers}, intra_op={intra_op_threads} bersama, "
+        f"inter_op={inter_op_threads}, affinity={cpu_affinity})"
+    )
+    return executor
+
+# Antrian micro-batching untuk inferensi model
+# Pesan yang masuk dikumpulkan selama max_wait_ms (atau sampai max_batch_size pesan),
+# lalu diprediksi sekaligus dalam satu forward pass. Setiap pemanggil mendapat hasil prediksinya sendiri.
+# Jika executor diberikan, forward pass dijalankan di luar event loop sehingga handler lain tetap berjalan.
+class PredictionBatcher:
+    def __init__(self, predict_batch_fn, max_batch_size=32, max_wait_ms=15, executor=None, max_queue_size=0, max_pending_batches=2):
+        self.predict_batch_fn = predict_batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0, max_wait_ms) / 1000
+        self.executor = executor
+        self.max_queue_size = max(0, int(max_queue_size))  # 0 = tanpa batas
+        self.max_pending_batches = max(1, int(max_pending_batches))
+        self._queue = None
+        self._task = None
+        self._pending = None
+        self._inflight = set()
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._pending = asyncio.Semaphore(self.max_pending_batches)
+        self._task = asyncio.create_task(self._run())
+        logging.info(f"PredictionBatcher aktif (max_batch_size={self.max_batch_size}, max_wait={self.max_wait * 1000:.0f} ms)")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        # Tunggu batch yang sedang diproses executor
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+        # Gagalkan semua permintaan yang masih menunggu di antrian
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("PredictionBatcher dihentikan"))
+
+    async def predict(self, text):
+        if self._task is None:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        # Jika antrian penuh, pemanggil menunggu di sini (backpressure)
+        await self._queue.put((text, future))
+        return await future
+
+    def queue_depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    # Pesan dimasukkan ke batch milik pemanggil agar tidak hilang jika task dibatalkan di tengah pengumpulan
+    async def _collect_batch(self, batch):
+        loop = asyncio.get_running_loop()
+        batch.append(await self._queue.get())
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # Ambil pesan yang sudah mengantri tanpa menunggu
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self):
+        while True:
+            # Batasi jumlah batch yang sedang dikirim ke executor
+            await self._pending.acquire()
+            batch = []
+            try:
+                await self._collect_batch(batch)
+            except asyncio.CancelledError:
+                # Pesan yang sudah diambil dari antrian tetap diprediksi, stop() menunggu batch ini selesai
+                if batch:
+                    self._dispatch(batch)
+                else:
+                    self._pending.release()
+                raise
+            except BaseException:
+                self._pending.release()
+                raise
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        task = asyncio.create_task(self._process(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _process(self, batch):
+        texts = [text for text, _ in batch]
+        try:
+            if self.executor is not None:
+                loop = asyncio.get_running_loop()
+                results = await loop.run_in_executor(self.executor, self.predict_batch_fn, texts)
+            else:
+                results = self.predict_batch_fn(texts)
+        except Exception as e:
+            logging.error(f"Gagal memprediksi batch berisi {len(texts)} pesan: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._pending.release()
+
+        logging.info(f"Batch prediksi selesai: {len(texts)} pesan")
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,141 @@
+import os
+import time
+import argparse
+import logging
+from model_utils import DEFAULT_DATASET_PATH, load_labelled_dataset, classification_metrics
+
+# Classifier leksikal ringan (hashed character n-gram TF-IDF + model linear)
+# Dipakai sebagai tahap pertama sebelum IndoBERT: hanya pesan dengan probabilitas
+# di antara low_threshold dan high_threshold yang diteruskan ke model transformer.
+# Jika dilatih dengan normalizer, teks yang diprediksi juga dinormalisasi (disimpan bersama model).
+class LexicalClassifier:
+    def __init__(self, pipeline, normalizer=None):
+        self.pipeline = pipeline
+        self.normalizer = normalizer
+
+    @classmethod
+    def build_pipeline(cls, n_features=2 ** 20, ngram_range=(2, 5)):
+        from sklearn.pipeline import make_pipeline
+        from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+        from sklearn.linear_model import LogisticRegression
+        return make_pipeline(
+            HashingVectorizer(analyzer="char_wb", ngram_range=ngram_range, n_features=n_features,
+                              alternate_sign=False, lowercase=True, norm=None),
+            TfidfTransformer(sublinear_tf=True),
+            LogisticRegression(max_iter=1000, C=4.0)
+        )
+
+    @classmethod
+    def train(cls, texts, labels, normalizer=None, **kwargs):
+        pipeline = cls.build_pipeline(**kwargs)
+        pipeline.fit(normalizer.normalize_batch(texts) if normalizer else texts, labels)
+        return cls(pipeline, normalizer)
+
+    # Model lama hanya berisi pipeline, model baru {"pipeline": ..., "normalize": bool}
+    @classmethod
+    def load(cls, path):
+        import joblib
+        data = joblib.load(path)
+        if not isinstance(data, dict):
+            return cls(data)
+        normalizer = None
+        if data.get("normalize"):
+            from text_normalizer import get_text_normalizer
+            normalizer = get_text_normalizer()
+        return cls(data["pipeline"], normalizer)
+
+    def save(self, path):
+        import joblib
+        joblib.dump({"pipeline": self.pipeline, "normalize": self.normalizer is not None}, path)
+
+    # Probabilitas pesan termasuk promosi judi (label 1)
+    def predict_spam_proba(self, texts):
+        if self.normalizer is not None:
+            texts = self.normalizer.normalize_batch(texts)
+        return self.pipeline.predict_proba(texts)[:, 1].tolist()
+
+# Tahap cascade leksikal dengan band ketidakpastian yang bisa dikonfigurasi
+class LexicalCascade:
+    def __init__(self, classifier, low_threshold=0.05, high_threshold=0.98):
+        if not 0.0 <= low_threshold <= high_threshold <= 1.0:
+            raise ValueError("Threshold cascade harus memenuhi 0 <= low <= high <= 1")
+        self.classifier = classifier
+        self.low_threshold = low_threshold
+        self.high_threshold = high_threshold
+        self.decisions = {"clean": 0, "spam": 0, "uncertain": 0}
+        self.total_seconds = 0.0
+
+    # Mengembalikan (label, probabilitas) atau (None, probabilitas) jika harus diteruskan ke IndoBERT
+    def classify(self, text):
+        started = time.perf_counter()
+        probability = self.classifier.predict_spam_proba([text])[0]
+        elapsed = time.perf_counter() - started
+        self.total_seconds += elapsed
+
+        if probability <= self.low_threshold:
+            decision, label = "clean", 0
+        elif probability >= self.high_threshold:
+            decision, label = "spam", 1
+        else:
+            decision, label = "uncertain", None
+        self.decisions[decision] += 1
+        logging.info(f"[CASCADE] Tahap leksikal: {decision} (p={probability:.4f}, {elapsed * 1000:.2f} ms)")
+        return label, probability
+
+    def stats(self):
+        total = sum(self.decisions.values())
+        skipped = self.decisions["clean"] + self.decisions["spam"]
+        return {
+            **self.decisions,
+            "skip_transformer_ratio": skipped / total if total else 0.0,
+            "avg_ms": self.total_seconds / total * 1000 if total else 0.0
+        }
+
+# Fungsi untuk memuat cascade leksikal, None jika model belum dilatih
+def load_lexical_cascade(path, low_threshold, high_threshold):
+    if not path or not os.path.exists(path):
+        logging.warning(f"Model leksikal {path} tidak ditemukan, semua pesan langsung diprediksi IndoBERT")
+        return None
+    cascade = LexicalCascade(LexicalClassifier.load(path), low_threshold, high_threshold)
+    logging.info(f"Cascade leksikal dimuat dari {path} (band {low_threshold} - {high_threshold})")
+    return cascade
+
+def main():
+    parser = argparse.ArgumentParser(description="Melatih classifier leksikal tahap pertama dari dataset.csv")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET_PATH)
+    parser.add_argument("--output", default="lexical_model.joblib", help="File output model (LEXICAL_MODEL_PATH)")
+    parser.add_argument("--low-threshold", type=float, default=0.05)
+    parser.add_argument("--high-threshold", type=float, default=0.98)
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--normalize", action="store_true", help="Latih dan prediksi dengan normalisasi slang/stopword (text_normalizer.py)")
+    args = parser.parse_args()
+
+    from sklearn.model_selection import train_test_split
+
+    normalizer = None
+    if args.normalize:
+        from text_normalizer import get_text_normalizer
+        normalizer = get_text_normalizer()
+
+    texts, labels = load_labelled_dataset(args.dataset)
+    X_train, X_test, y_train, y_test = train_test_split(texts, labels, test_size=args.test_size, random_state=42, stratify=labels)
+    classifier = LexicalClassifier.train(X_train, y_train, normalizer=normalizer)
+
+    # Evaluasi: akurasi pada pesan yang diputuskan sendiri oleh tahap leksikal
+    probabilities = classifier.predict_spam_proba(X_test)
+    decided = [
+        (label, 1 if p >= args.high_threshold else 0)
+        for label, p in zip(y_test, probabilities)
+        if p <= args.low_threshold or p >= args.high_threshold
+    ]
+    print(f"Metrik keseluruhan (threshold 0.5): {classification_metrics(y_test, [int(p >= 0.5) for p in probabilities])}")
+    print(f"Pesan yang tidak perlu IndoBERT: {len(decided) / len(X_test):.2%}")
+    if decided:
+        print(f"Metrik pada pesan yang diputuskan tahap leksikal: {classification_metrics(*zip(*decided))}")
+
+    classifier = LexicalClassifier.train(texts, labels, normalizer=normalizer)
+    classifier.save(args.output)
+    print(f"Model leksikal disimpan di {args.output}")
+
+if __name__ == "__main__":
+    main()
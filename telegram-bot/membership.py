@@ -0,0 +1,69 @@
+import time
+from collections import OrderedDict
+
+MEMBER_STATUSES = ("member", "administrator", "creator", "restricted")
+
+# Index keanggotaan user -> {group_id: (status, waktu_diperbarui)}
+# Diisi dari event CHAT_MEMBER, pesan yang masuk di handle_message dan hasil getChatMember,
+# sehingga penegakan lintas grup tidak perlu memanggil API untuk setiap grup aktif.
+# Status anggota berlaku member_ttl detik, status bukan anggota (left/kicked) hanya negative_ttl
+# detik karena user bisa bergabung lagi tanpa event yang terlihat oleh bot.
+class MembershipIndex:
+    def __init__(self, max_users=100000, member_ttl=6 * 3600, negative_ttl=600):
+        self.max_users = max(1, int(max_users))
+        self.member_ttl = member_ttl
+        self.negative_ttl = negative_ttl
+        self._users = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def record(self, user_id, group_id, status):
+        user_id = str(user_id)
+        groups = self._users.get(user_id)
+        if groups is None:
+            groups = self._users[user_id] = {}
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._users.move_to_end(user_id)
+        groups[str(group_id)] = (str(status), time.monotonic())
+
+    # User terlihat mengirim pesan di grup: pasti anggota, status admin/restricted yang diketahui dipertahankan
+    def seen(self, user_id, group_id):
+        known = self.status(user_id, group_id, count=False)
+        self.record(user_id, group_id, known if known in MEMBER_STATUSES else "member")
+
+    # Status user di grup, None jika belum diketahui atau sudah kedaluwarsa
+    def status(self, user_id, group_id, count=True):
+        groups = self._users.get(str(user_id))
+        entry = groups.get(str(group_id)) if groups else None
+        if entry is not None:
+            status, updated = entry
+            ttl = self.member_ttl if status in MEMBER_STATUSES else self.negative_ttl
+            if time.monotonic() - updated <= ttl:
+                if count:
+                    self.hits += 1
+                return status
+            del groups[str(group_id)]
+        if count:
+            self.misses += 1
+        return None
+
+    # Bot keluar dari grup: semua status di grup tersebut tidak bisa diperbarui lagi
+    def forget_group(self, group_id):
+        group_id = str(group_id)
+        for groups in self._users.values():
+            groups.pop(group_id, None)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "users": len(self._users),
+            "memberships": sum(len(groups) for groups in self._users.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions
+        }
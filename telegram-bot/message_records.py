@@ -0,0 +1,232 @@
+from array import array
+from datetime import datetime, timezone
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+SECONDS_PER_DAY = 86400
+MISSING = -1  # penanda timestamp / message_id kosong di kolom array
+
+# Fungsi konversi timestamp "YYYY-mm-dd HH:MM:SS" <-> detik epoch
+# Timestamp bot adalah waktu lokal tanpa zona, jadi dikodekan apa adanya (sebagai UTC) agar bisa dikembalikan persis.
+def timestamp_to_epoch(timestamp):
+    try:
+        return int(datetime.strptime(timestamp, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc).timestamp())
+    except (TypeError, ValueError):
+        return MISSING
+
+def epoch_to_timestamp(epoch):
+    if epoch == MISSING:
+        return ""
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+def epoch_to_date(epoch):
+    return epoch_to_timestamp(epoch)[:10]
+
+# Batas epoch hot window: pesan lebih tua dari max_age_days hari dilepas dari memori
+def window_cutoff(max_age_days):
+    if not max_age_days:
+        return None
+    return timestamp_to_epoch(datetime.now().strftime(TIMESTAMP_FORMAT)) - int(max_age_days * SECONDS_PER_DAY)
+
+# Tabel intern: nilai yang sering berulang (user, grup) disimpan sekali dan dirujuk lewat nomor
+class Interner:
+    __slots__ = ("values", "_ids")
+
+    def __init__(self):
+        self.values = []
+        self._ids = {}
+
+    def intern(self, value):
+        ref = self._ids.get(value)
+        if ref is None:
+            ref = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return ref
+
+    def __len__(self):
+        return len(self.values)
+
+# Penyimpanan ringkas log pesan (pengganti dict user_id -> list of dict)
+# Setiap pesan adalah satu baris di kolom array: referensi user/grup yang di-intern,
+# timestamp epoch int dan message_id int. Teks pesan disimpan terpisah di list.
+class MessageRecords:
+    __slots__ = ("_users", "_groups", "_user_ref", "_group_ref", "_timestamps", "_message_ids",
+                 "_texts", "_positions", "_dates", "_size")
+
+    def __init__(self):
+        self._users = Interner()       # (username, name)
+        self._groups = Interner()      # (group_id, group_name)
+        self._user_ref = array("I")
+        self._group_ref = array("I")
+        self._timestamps = array("q")
+        self._message_ids = array("q")
+        self._texts = []
+        self._positions = {}           # user_id -> array posisi baris milik user
+        self._dates = {}               # cache hari epoch -> "YYYY-mm-dd"
+        self._size = 0
+
+    @classmethod
+    def from_json(cls, data):
+        records = cls()
+        records.extend_json(data)
+        return records
+
+    # Menambahkan data format JSON lama; list per user dilepas setelah dikonversi agar memori puncak kecil
+    def extend_json(self, data):
+        for user_id in list(data):
+            for entry in data.pop(user_id):
+                self.append(user_id, entry)
+        return self
+
+    def append(self, user_id, entry):
+        user_id = str(user_id)
+        message_id = entry.get("message_id")
+        position = len(self._texts)
+        self._user_ref.append(self._users.intern((entry.get("username", ""), entry.get("name", ""))))
+        self._group_ref.append(self._groups.intern((entry.get("group_id", ""), entry.get("group_name", ""))))
+        self._timestamps.append(timestamp_to_epoch(entry.get("timestamp", "")))
+        self._message_ids.append(MISSING if message_id is None else int(message_id))
+        self._texts.append(entry.get("message", ""))
+        self._positions.setdefault(user_id, array("I")).append(position)
+        self._size += 1
+        return position
+
+    # Akses kolom per baris (tanpa membuat dict)
+    def epoch(self, position):
+        return self._timestamps[position]
+
+    def date(self, position):
+        epoch = self._timestamps[position]
+        if epoch == MISSING:
+            return ""
+        day = epoch // SECONDS_PER_DAY
+        date = self._dates.get(day)
+        if date is None:
+            date = self._dates[day] = epoch_to_date(epoch)
+        return date
+
+    def group_id(self, position):
+        return self._groups.values[self._group_ref[position]][0]
+
+    def group_name(self, position):
+        return self._groups.values[self._group_ref[position]][1]
+
+    def message_id(self, position):
+        message_id = self._message_ids[position]
+        return None if message_id == MISSING else message_id
+
+    def text(self, position):
+        return self._texts[position]
+
+    def username(self, position):
+        return self._users.values[self._user_ref[position]][0]
+
+    def name(self, position):
+        return self._users.values[self._user_ref[position]][1]
+
+    # Baris dalam format entri JSON lama
+    def entry(self, position):
+        username, name = self._users.values[self._user_ref[position]]
+        group_id, group_name = self._groups.values[self._group_ref[position]]
+        return {
+            "username": username,
+            "name": name,
+            "group_id": group_id,
+            "group_name": group_name,
+            "timestamp": epoch_to_timestamp(self._timestamps[position]),
+            "message": self._texts[position],
+            "message_id": self.message_id(position)
+        }
+
+    def positions(self, user_id):
+        return self._positions.get(str(user_id), ())
+
+    def entries(self, user_id):
+        return [self.entry(position) for position in self.positions(user_id)]
+
+    def count(self, user_id=None):
+        if user_id is None:
+            return self._size
+        return len(self.positions(user_id))
+
+    def user_ids(self):
+        return list(self._positions)
+
+    # Semua baris yang masih ada sebagai pasangan (user_id, posisi)
+    def rows(self):
+        for user_id, positions in self._positions.items():
+            for position in positions:
+                yield user_id, position
+
+    # Menghapus pesan user berdasarkan posisi baris, mengembalikan entri JSON-nya
+    def pop_positions(self, user_id, positions):
+        user_id = str(user_id)
+        selected = set(positions)
+        owned = self._positions.get(user_id, array("I"))
+        removed = [self.entry(position) for position in owned if position in selected]
+        remaining = array("I", (position for position in owned if position not in selected))
+        if remaining:
+            self._positions[user_id] = remaining
+        else:
+            self._positions.pop(user_id, None)
+        for position in owned:
+            if position in selected:
+                self._texts[position] = ""  # teks dilepas, baris kosong direklamasi oleh vacuum()
+        self._size -= len(removed)
+        return removed
+
+    # Posisi baris satu pesan (user, grup, message_id) atau None
+    def find(self, user_id, group_id, message_id):
+        for position in self.positions(user_id):
+            if str(self.group_id(position)) == str(group_id) and self.message_id(position) == message_id:
+                return position
+        return None
+
+    # Menghapus satu pesan (misalnya saat relabel), mengembalikan entri JSON-nya atau None
+    def remove(self, user_id, group_id, message_id):
+        position = self.find(user_id, group_id, message_id)
+        return None if position is None else self.pop_positions(user_id, [position])[0]
+
+    # Melepas pesan di luar hot window: lebih dari max_per_user pesan terbaru per user,
+    # atau lebih tua dari before_epoch. Mengembalikan [(user_id, entri), ...] untuk ditulis ke segmen.
+    def evict(self, max_per_user=None, before_epoch=None):
+        evicted = []
+        for user_id in self.user_ids():
+            positions = self._positions[user_id]
+            overflow = len(positions) - max_per_user if max_per_user else 0
+            selected = [
+                position for index, position in enumerate(positions)
+                if index < overflow or (before_epoch is not None and self._timestamps[position] < before_epoch)
+            ]
+            if selected:
+                evicted.extend((user_id, entry) for entry in self.pop_positions(user_id, selected))
+        return evicted
+
+    # Menyusun ulang kolom tanpa baris yang sudah dihapus (di tempat, referensi lama tetap valid)
+    def vacuum(self):
+        if len(self._texts) == self._size:
+            return self
+        fresh = MessageRecords()
+        for user_id, position in self.rows():
+            fresh.append(user_id, self.entry(position))
+        for slot in self.__slots__:
+            setattr(self, slot, getattr(fresh, slot))
+        return self
+
+    # Serialisasi ke skema JSON lama: {user_id: [entri, ...]}
+    def to_json(self):
+        return {user_id: [self.entry(position) for position in positions] for user_id, positions in self._positions.items()}
+
+    def __contains__(self, user_id):
+        return str(user_id) in self._positions
+
+    def __len__(self):
+        return self._size
+
+    def stats(self):
+        return {
+            "records": self._size,
+            "users": len(self._positions),
+            "interned_user_names": len(self._users),
+            "interned_groups": len(self._groups),
+            "dead_rows": len(self._texts) - self._size
+        }
@@ -0,0 +1,88 @@
+import os
+import csv
+import json
+import time
+import random
+
+DEFAULT_DATASET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "datasets", "dataset.csv")
+
+# Fungsi untuk memuat dataset berlabel (full_text, label)
+# normalize=True menerapkan normalisasi slang/stopword yang sama dengan bot (text_normalizer.py)
+def load_labelled_dataset(path=DEFAULT_DATASET_PATH, limit=None, seed=42, normalize=False):
+    texts, labels = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            text = (row.get("full_text") or "").strip()
+            label = (row.get("label") or "").strip()
+            if not text or label not in ("0", "1"):
+                continue
+            texts.append(text)
+            labels.append(int(label))
+
+    # Ambil sampel acak yang tetap (seed) jika dibatasi
+    if limit and len(texts) > limit:
+        indexes = sorted(random.Random(seed).sample(range(len(texts)), limit))
+        texts = [texts[i] for i in indexes]
+        labels = [labels[i] for i in indexes]
+    if normalize:
+        from text_normalizer import get_text_normalizer
+        texts = get_text_normalizer().normalize_batch(texts)
+    return texts, labels
+
+# Fungsi untuk menghitung akurasi dan F1 (kelas judi = 1)
+def classification_metrics(y_true, y_pred):
+    tp = sum(1 for t, p in zip(y_true, y_pred) if t == 1 and p == 1)
+    fp = sum(1 for t, p in zip(y_true, y_pred) if t == 0 and p == 1)
+    fn = sum(1 for t, p in zip(y_true, y_pred) if t == 1 and p == 0)
+    correct = sum(1 for t, p in zip(y_true, y_pred) if t == p)
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        "accuracy": correct / len(y_true) if y_true else 0.0,
+        "precision": precision,
+        "recall": recall,
+        "f1": f1
+    }
+
+# Fungsi untuk menghitung persentil latensi (ms)
+def latency_percentiles(latencies_ms):
+    if not latencies_ms:
+        return {"p50_ms": 0.0, "p99_ms": 0.0}
+    ordered = sorted(latencies_ms)
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+    return {"p50_ms": pick(0.50), "p99_ms": pick(0.99)}
+
+# Fungsi untuk mengukur latensi per pesan dan prediksi sebuah fungsi batch
+def benchmark_predict(predict_batch_fn, texts, batch_size=1):
+    latencies, predictions = [], []
+    for start in range(0, len(texts), batch_size):
+        chunk = texts[start:start + batch_size]
+        started = time.perf_counter()
+        predictions.extend(predict_batch_fn(chunk))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        latencies.extend([elapsed_ms / len(chunk)] * len(chunk))
+    return predictions, latency_percentiles(latencies)
+
+# Fungsi untuk menghitung ukuran file/folder model (MB)
+def model_size_mb(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path) / (1024 * 1024)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total / (1024 * 1024)
+
+# Fungsi untuk load dan save laporan JSON (parity, kuantisasi, distilasi)
+def load_report(path):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return None
+
+def save_report(path, report):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=4)
@@ -0,0 +1,121 @@
+import re
+import time
+import zlib
+import logging
+import numpy as np
+from prediction_cache import normalize_for_cache, cache_key
+
+MERSENNE_PRIME = (1 << 31) - 1
+NON_WORD_PATTERN = re.compile(r"[^\w:/.]+")
+
+# Fungsi untuk membuat shingle karakter dari teks yang dinormalisasi
+# Emoji, tanda baca dan spasi dibuang agar variasi kecil antar posting spam tidak mengubah shingle.
+def shingles(text, size=5):
+    text = NON_WORD_PATTERN.sub("", normalize_for_cache(text))
+    if len(text) <= size:
+        return {zlib.crc32(text.encode("utf-8"))} if text else set()
+    return {zlib.crc32(text[i:i + size].encode("utf-8")) for i in range(len(text) - size + 1)}
+
+# Index MinHash/LSH pesan judi yang sudah diketahui (violations + dataset label 1)
+# Signature num_perm MinHash dibagi menjadi bands; pesan yang memiliki satu band identik menjadi kandidat,
+# lalu kemiripan Jaccard diestimasi dari signature dan dibandingkan dengan threshold.
+class NearDuplicateIndex:
+    def __init__(self, num_perm=64, bands=16, shingle_size=5, threshold=0.7, seed=42):
+        if num_perm % bands:
+            raise ValueError("num_perm harus habis dibagi bands")
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, MERSENNE_PRIME, size=(num_perm, 1)).astype(np.uint64)
+        self._b = rng.randint(0, MERSENNE_PRIME, size=(num_perm, 1)).astype(np.uint64)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        self._buckets = [{} for _ in range(bands)]  # per band: bytes band -> [id dokumen]
+        self._signatures = []                       # id dokumen -> signature (None jika dihapus)
+        self._keys = {}                             # kunci teks ternormalisasi -> id dokumen
+        self.hits = 0
+        self.lookups = 0
+        self.lookup_seconds = 0.0
+
+    def signature(self, text):
+        values = shingles(text, self.shingle_size)
+        if not values:
+            return None
+        x = np.fromiter(values, dtype=np.uint64, count=len(values)) & np.uint64(MERSENNE_PRIME)
+        return ((self._a * x + self._b) % np.uint64(MERSENNE_PRIME)).min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def add(self, text):
+        key = cache_key(text)
+        if key in self._keys:
+            return False
+        signature = self.signature(text)
+        if signature is None:
+            return False
+        doc_id = len(self._signatures)
+        self._signatures.append(signature)
+        self._keys[key] = doc_id
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            buckets.setdefault(band_key, []).append(doc_id)
+        return True
+
+    def add_many(self, texts):
+        return sum(1 for text in texts if self.add(text))
+
+    # Pesan dikoreksi sebagai bersih (relabel dashboard): tidak lagi dipakai untuk pencocokan
+    def remove(self, text):
+        doc_id = self._keys.pop(cache_key(text), None)
+        if doc_id is not None:
+            self._signatures[doc_id] = None
+        return doc_id is not None
+
+    # Mengembalikan estimasi kemiripan Jaccard tertinggi (>= threshold) atau None
+    def match(self, text):
+        started = time.perf_counter()
+        self.lookups += 1
+        best = None
+        signature = self.signature(text)
+        if signature is not None:
+            candidates = set()
+            for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+                candidates.update(buckets.get(band_key, ()))
+            for doc_id in candidates:
+                known = self._signatures[doc_id]
+                if known is None:
+                    continue
+                similarity = float(np.count_nonzero(known == signature)) / self.num_perm
+                if similarity >= self.threshold and (best is None or similarity > best):
+                    best = similarity
+        self.lookup_seconds += time.perf_counter() - started
+        if best is not None:
+            self.hits += 1
+        return best
+
+    def __len__(self):
+        return len(self._keys)
+
+    def stats(self):
+        return {
+            "entries": len(self._keys),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "avg_us": self.lookup_seconds / self.lookups * 1e6 if self.lookups else 0.0
+        }
+
+# Fungsi untuk membangun index dari teks pelanggaran dan dataset berlabel
+def build_near_duplicate_index(violation_texts, dataset_path=None, **kwargs):
+    index = NearDuplicateIndex(**kwargs)
+    started = time.perf_counter()
+    added = index.add_many(violation_texts)
+    if dataset_path:
+        from model_utils import load_labelled_dataset
+        try:
+            texts, labels = load_labelled_dataset(dataset_path)
+            added += index.add_many(text for text, label in zip(texts, labels) if label == 1)
+        except OSError as e:
+            logging.warning(f"Dataset {dataset_path} tidak bisa dibaca untuk index near-duplicate: {e}")
+    logging.info(f"Index near-duplicate dibangun: {added} pesan judi dalam {time.perf_counter() - started:.2f} detik")
+    return index
@@ -0,0 +1,124 @@
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+
+# Status ringkasan peringatan satu grup
+class GroupWarnings:
+    __slots__ = ("started", "offenders", "total", "message_id", "task")
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.offenders = OrderedDict()  # user_name -> jumlah pesan yang dihapus
+        self.total = 0
+        self.message_id = None          # pesan ringkasan yang diedit selama masih berlaku
+        self.task = None                # flush yang sedang dijadwalkan
+
+# Penggabung peringatan per grup saat terjadi lonjakan spam
+# Pelanggaran pertama langsung diperingatkan seperti biasa; pelanggaran berikutnya dikumpulkan selama
+# window detik lalu pesan peringatan tadi diedit menjadi ringkasan (daftar pelanggar dan jumlahnya).
+# Ringkasan diedit di tempat selama summary_lifetime detik, setelah itu pesan baru dikirim.
+# send(bot, group_id, text) mengembalikan message_id, edit(bot, group_id, message_id, text) mengedit pesan.
+class WarningAggregator:
+    def __init__(self, send, edit, window=10, max_listed=10, summary_lifetime=120, dm_cooldown=60, group_settings=None):
+        self._send = send
+        self._edit = edit
+        self.window = window
+        self.max_listed = max_listed
+        self.summary_lifetime = summary_lifetime
+        self.dm_cooldown = dm_cooldown
+        self.group_settings = group_settings or {}  # group_id -> {"window": ..., "max_listed": ..., "summary_lifetime": ...}
+        self._groups = {}
+        self._last_dm = {}
+        self._bot = None
+        self.sent = 0
+        self.edited = 0
+        self.coalesced = 0
+
+    def _setting(self, group_id, name):
+        return self.group_settings.get(str(group_id), {}).get(name, getattr(self, name))
+
+    @staticmethod
+    def warning_text(user_name):
+        return f"⚠️ Peringatan kepada {user_name}, pesan Anda terdeteksi sebagai promosi judi online!"
+
+    def summary_text(self, group_id, state):
+        if state.total == 1:
+            return self.warning_text(next(iter(state.offenders)))
+        max_listed = self._setting(group_id, "max_listed")
+        lines = [f"⚠️ Peringatan! {state.total} pesan promosi judi online telah dihapus:"]
+        for user_name, count in list(state.offenders.items())[:max_listed]:
+            lines.append(f"- {user_name} ({count}x)")
+        if len(state.offenders) > max_listed:
+            lines.append(f"... dan {len(state.offenders) - max_listed} pengguna lainnya")
+        return "\n".join(lines)
+
+    async def add(self, bot, group_id, user_name):
+        self._bot = bot
+        group_id = str(group_id)
+        state = self._groups.get(group_id)
+        if state is not None and time.monotonic() - state.started > self._setting(group_id, "summary_lifetime") and state.task is None:
+            state = None
+        if state is None:
+            state = self._groups[group_id] = GroupWarnings()
+            state.offenders[user_name] = 1
+            state.total = 1
+            await self._publish(bot, group_id, state, self.warning_text(user_name))
+            return
+        state.offenders[user_name] = state.offenders.get(user_name, 0) + 1
+        state.total += 1
+        self.coalesced += 1
+        if state.task is None:
+            state.task = asyncio.create_task(self._flush_later(bot, group_id, state))
+
+    async def _flush_later(self, bot, group_id, state):
+        try:
+            await asyncio.sleep(self._setting(group_id, "window"))
+        finally:
+            state.task = None
+        await self._publish(bot, group_id, state, self.summary_text(group_id, state))
+
+    # Mengedit ringkasan yang ada, atau mengirim pesan baru jika belum ada / gagal diedit
+    async def _publish(self, bot, group_id, state, text):
+        if state.message_id is not None:
+            try:
+                await self._edit(bot, group_id, state.message_id, text)
+                self.edited += 1
+                return
+            except Exception as e:
+                if "not modified" in str(e).lower():
+                    return
+                logging.warning(f"Gagal mengedit ringkasan peringatan di grup {group_id}: {e}")
+        try:
+            state.message_id = await self._send(bot, group_id, text)
+            self.sent += 1
+        except Exception as e:
+            logging.warning(f"Gagal mengirim peringatan ke grup {group_id}: {e}")
+
+    # DM peringatan dikirim paling banyak sekali per dm_cooldown detik per user
+    def allow_dm(self, user_id):
+        now = time.monotonic()
+        last = self._last_dm.get(str(user_id))
+        if last is not None and now - last < self.dm_cooldown:
+            return False
+        self._last_dm[str(user_id)] = now
+        if len(self._last_dm) > 10000:
+            self._last_dm = {uid: t for uid, t in self._last_dm.items() if now - t < self.dm_cooldown}
+        return True
+
+    # Ringkasan yang masih menunggu langsung dikirim (dipanggil saat bot berhenti)
+    async def stop(self):
+        pending = [(group_id, state) for group_id, state in self._groups.items() if state.task is not None]
+        for _, state in pending:
+            state.task.cancel()
+        await asyncio.gather(*(state.task for _, state in pending), return_exceptions=True)
+        for group_id, state in pending:
+            await self._publish(self._bot, group_id, state, self.summary_text(group_id, state))
+
+    def stats(self):
+        return {
+            "groups": len(self._groups),
+            "sent": self.sent,
+            "edited": self.edited,
+            "coalesced": self.coalesced
+        }
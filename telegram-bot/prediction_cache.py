@@ -0,0 +1,116 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+
+URL_PATTERN = re.compile(r"(?i)\b(?:https?://|www\.)[^\s]+")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Fungsi untuk menyeragamkan URL (skema/host huruf kecil, tanpa www, fragment dan garis miring di akhir)
+def canonicalize_url(match):
+    url = match.group(0).lower()
+    url = re.sub(r"^https?://", "", url)
+    url = re.sub(r"^www\.", "", url)
+    url = url.split("#", 1)[0].rstrip("/.,!?)")
+    return f"url:{url}"
+
+# Fungsi normalisasi teks untuk kunci cache (case-fold, spasi diringkas, URL diseragamkan)
+def normalize_for_cache(text):
+    text = URL_PATTERN.sub(canonicalize_url, text.casefold())
+    return WHITESPACE_PATTERN.sub(" ", text).strip()
+
+def cache_key(text):
+    return hashlib.blake2b(normalize_for_cache(text).encode("utf-8"), digest_size=16).hexdigest()
+
+# Cache hasil prediksi dengan eviksi LRU + TTL dan batas jumlah entri
+# Kunci berupa hash 16 byte sehingga memori per entri tetap kecil walau pesan panjang.
+class PredictionCache:
+    def __init__(self, max_entries=100000, ttl_seconds=24 * 3600, persist_path=None):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path
+        self._entries = OrderedDict()  # key -> (hasil prediksi, expires_at)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.model_seconds = 0.0
+        self.model_calls = 0
+
+    def get(self, text):
+        key = cache_key(text)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, text, value):
+        key = cache_key(text)
+        self._entries[key] = (value, time.time() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    # Catat waktu model untuk pesan yang tidak ada di cache (untuk estimasi waktu yang dihemat)
+    def record_model_time(self, seconds):
+        self.model_seconds += seconds
+        self.model_calls += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        avg_model_seconds = self.model_seconds / self.model_calls if self.model_calls else 0.0
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "avg_model_ms": avg_model_seconds * 1000,
+            "saved_model_seconds": self.hits * avg_model_seconds
+        }
+
+    # Fungsi untuk load dan save cache ke disk agar bertahan setelah restart
+    def load(self):
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, "r") as f:
+                raw = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logging.warning(f"Gagal memuat {self.persist_path}: {e}")
+            return
+
+        now = time.time()
+        for key, value, expires_at in raw.get("entries", []):
+            if expires_at > now:
+                self._entries[key] = (value, expires_at)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        logging.info(f"Cache prediksi dimuat: {len(self._entries)} entri dari {self.persist_path}")
+
+    def save(self):
+        if not self.persist_path:
+            return
+        now = time.time()
+        entries = [[key, value, expires_at] for key, (value, expires_at) in self._entries.items() if expires_at > now]
+        tmp_path = f"{self.persist_path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"entries": entries}, f)
+            os.replace(tmp_path, self.persist_path)
+        except OSError as e:
+            logging.error(f"Gagal menyimpan {self.persist_path}: {e}")
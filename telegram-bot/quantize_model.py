@@ -0,0 +1,84 @@
+import io
+import os
+import argparse
+import logging
+from inference import TorchBackend, quantize_dynamic_int8, save_text_normalization, resolve_text_normalization, QUANTIZED_MODEL_FILE, QUANTIZATION_REPORT_FILE
+from model_utils import DEFAULT_DATASET_PATH, load_labelled_dataset, classification_metrics, benchmark_predict, model_size_mb, save_report
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Fungsi untuk menghitung ukuran state_dict model (MB)
+def state_dict_size_mb(model):
+    import torch
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / (1024 * 1024)
+
+# Fungsi untuk mengevaluasi akurasi, F1 dan latensi sebuah backend
+def evaluate_backend(backend, texts, labels, batch_size):
+    predictions, latency = benchmark_predict(
+        lambda chunk: backend.predict_proba(chunk).argmax(axis=-1).tolist(), texts, batch_size=batch_size
+    )
+    return {**classification_metrics(labels, predictions), **latency}
+
+# Fungsi untuk membuat model INT8 dan laporan perbandingan dengan model fp32
+def quantize_model(checkpoint_path, output_dir, dataset_path, limit, batch_size, normalize=True):
+    import torch
+
+    os.makedirs(output_dir, exist_ok=True)
+    texts, labels = load_labelled_dataset(dataset_path, limit=limit, normalize=normalize)
+
+    fp32_backend = TorchBackend(checkpoint_path)
+    fp32_size = state_dict_size_mb(fp32_backend.model)
+    fp32_result = evaluate_backend(fp32_backend, texts, labels, batch_size)
+    logging.info(f"Model fp32: {fp32_result}")
+
+    # Kuantisasi dinamis dilakukan pada salinan model fp32
+    int8_backend = TorchBackend(checkpoint_path)
+    int8_backend.model = quantize_dynamic_int8(int8_backend.model)
+    int8_backend.model.eval()
+    int8_result = evaluate_backend(int8_backend, texts, labels, batch_size)
+    logging.info(f"Model INT8: {int8_result}")
+
+    # Simpan bobot INT8 beserta config dan tokenizer agar bisa dimuat bot
+    torch.save(int8_backend.model.state_dict(), os.path.join(output_dir, QUANTIZED_MODEL_FILE))
+    fp32_backend.model.config.save_pretrained(output_dir)
+    fp32_backend.tokenizer.save_pretrained(output_dir)
+    save_text_normalization(output_dir, normalize)
+
+    report = {
+        "checkpoint": os.path.abspath(checkpoint_path),
+        "dataset": os.path.abspath(dataset_path),
+        "samples": len(texts),
+        "batch_size": batch_size,
+        "normalized": normalize,
+        "fp32": {"size_mb": fp32_size, **fp32_result},
+        "int8": {"size_mb": model_size_mb(os.path.join(output_dir, QUANTIZED_MODEL_FILE)), **int8_result},
+        "accuracy_drop": fp32_result["accuracy"] - int8_result["accuracy"],
+        "f1_drop": fp32_result["f1"] - int8_result["f1"]
+    }
+    save_report(os.path.join(output_dir, QUANTIZATION_REPORT_FILE), report)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Membuat model IndoBERT INT8 (dynamic quantization) dan membandingkannya dengan fp32")
+    parser.add_argument("--checkpoint", required=True, help="Folder checkpoint IndoBERT (CHECKPOINT_PATH)")
+    parser.add_argument("--output-dir", default="int8-model", help="Folder output model INT8 (QUANTIZED_MODEL_DIR)")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET_PATH, help="Dataset berlabel untuk evaluasi")
+    parser.add_argument("--limit", type=int, default=2000, help="Jumlah sampel dataset untuk evaluasi (0 = semua)")
+    parser.add_argument("--batch-size", type=int, default=1, help="Ukuran batch saat mengukur latensi")
+    parser.add_argument("--normalize", action=argparse.BooleanOptionalAction, default=None,
+                        help="Normalisasi slang/stopword (default mengikuti preprocessing.json checkpoint)")
+    args = parser.parse_args()
+
+    report = quantize_model(args.checkpoint, args.output_dir, args.dataset, args.limit or None, args.batch_size,
+                            resolve_text_normalization(args.normalize, args.checkpoint))
+
+    print(f"{'':8}{'Ukuran (MB)':>14}{'p50 (ms)':>12}{'p99 (ms)':>12}{'Akurasi':>10}{'F1':>10}")
+    for name in ("fp32", "int8"):
+        row = report[name]
+        print(f"{name:8}{row['size_mb']:>14.1f}{row['p50_ms']:>12.2f}{row['p99_ms']:>12.2f}{row['accuracy']:>10.4f}{row['f1']:>10.4f}")
+    print(f"Penurunan akurasi: {report['accuracy_drop']:.4f} | Penurunan F1: {report['f1_drop']:.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import time
+from array import array
+
+# Penghitung sliding window berbasis ring buffer: window dibagi menjadi slot berukuran tetap,
+# slot lama dikosongkan saat waktu bergeser sehingga add() dan total() O(1) (amortized).
+class RingCounter:
+    __slots__ = ("slot_seconds", "_slots", "_head", "_head_time", "_total")
+
+    def __init__(self, window_seconds=60, slot_seconds=1):
+        self.slot_seconds = slot_seconds
+        self._slots = array("I", [0] * max(1, int(window_seconds / slot_seconds)))
+        self._head = 0
+        self._head_time = int(time.monotonic() / slot_seconds)
+        self._total = 0
+
+    def _advance(self, now):
+        current = int(now / self.slot_seconds)
+        steps = min(current - self._head_time, len(self._slots))
+        for _ in range(max(0, steps)):
+            self._head = (self._head + 1) % len(self._slots)
+            self._total -= self._slots[self._head]
+            self._slots[self._head] = 0
+        self._head_time = max(self._head_time, current)
+
+    def add(self, count=1, now=None):
+        self._advance(time.monotonic() if now is None else now)
+        self._slots[self._head] += count
+        self._total += count
+
+    def total(self, now=None):
+        self._advance(time.monotonic() if now is None else now)
+        return self._total
+
+# Status satu grup: laju pesan, member baru dan pelanggaran dalam window, serta mode agresif
+class GroupRate:
+    __slots__ = ("messages", "joins", "violations", "aggressive", "since", "calm_since")
+
+    def __init__(self, window_seconds):
+        self.messages = RingCounter(window_seconds)
+        self.joins = RingCounter(window_seconds)
+        self.violations = RingCounter(window_seconds)
+        self.aggressive = False
+        self.since = None       # waktu mode agresif dimulai
+        self.calm_since = None  # waktu laju pertama kali turun di bawah batas keluar
+
+# Detektor raid per grup (streaming). Raid terdeteksi jika dalam window:
+# - jumlah pelanggaran >= violation_threshold, atau
+# - jumlah pesan >= message_threshold dan rasio pelanggaran >= violation_ratio, atau
+# - jumlah member baru >= join_threshold.
+# Mode agresif berakhir otomatis setelah semua laju di bawah exit_factor * batas selama calm_seconds.
+class RaidDetector:
+    def __init__(self, window_seconds=60, message_threshold=60, violation_ratio=0.3, violation_threshold=15,
+                 join_threshold=20, exit_factor=0.5, calm_seconds=120):
+        self.window_seconds = window_seconds
+        self.message_threshold = message_threshold
+        self.violation_ratio = violation_ratio
+        self.violation_threshold = violation_threshold
+        self.join_threshold = join_threshold
+        self.exit_factor = exit_factor
+        self.calm_seconds = calm_seconds
+        self._groups = {}
+        self.raids = 0
+
+    def _group(self, group_id):
+        group_id = str(group_id)
+        state = self._groups.get(group_id)
+        if state is None:
+            state = self._groups[group_id] = GroupRate(self.window_seconds)
+        return state
+
+    # Setiap record_* mengembalikan "start" / "end" saat mode agresif berubah, selain itu None
+    def record_message(self, group_id):
+        state = self._group(group_id)
+        state.messages.add()
+        return self._evaluate(state)
+
+    def record_violation(self, group_id):
+        state = self._group(group_id)
+        state.violations.add()
+        return self._evaluate(state)
+
+    def record_join(self, group_id):
+        state = self._group(group_id)
+        state.joins.add()
+        return self._evaluate(state)
+
+    def _over(self, state, factor):
+        messages = state.messages.total()
+        violations = state.violations.total()
+        return (
+            violations >= self.violation_threshold * factor
+            or (messages >= self.message_threshold * factor and violations >= messages * self.violation_ratio * factor)
+            or state.joins.total() >= self.join_threshold * factor
+        )
+
+    def _evaluate(self, state):
+        now = time.monotonic()
+        if not state.aggressive:
+            if self._over(state, 1.0):
+                state.aggressive, state.since, state.calm_since = True, now, None
+                self.raids += 1
+                return "start"
+            return None
+        if self._over(state, self.exit_factor):
+            state.calm_since = None
+            return None
+        if state.calm_since is None:
+            state.calm_since = now
+        if now - state.calm_since >= self.calm_seconds:
+            state.aggressive, state.since, state.calm_since = False, None, None
+            return "end"
+        return None
+
+    def is_aggressive(self, group_id):
+        state = self._groups.get(str(group_id))
+        return state is not None and state.aggressive
+
+    # Evaluasi ulang grup yang sedang agresif (dipanggil berkala agar grup yang sepi tetap kembali normal)
+    def check(self):
+        return [(group_id, transition) for group_id, state in list(self._groups.items())
+                if state.aggressive and (transition := self._evaluate(state))]
+
+    def rates(self, group_id):
+        state = self._group(group_id)
+        return {
+            "messages": state.messages.total(),
+            "joins": state.joins.total(),
+            "violations": state.violations.total(),
+            "aggressive": state.aggressive
+        }
+
+    def stats(self):
+        return {
+            "groups": len(self._groups),
+            "aggressive": [group_id for group_id, state in self._groups.items() if state.aggressive],
+            "raids": self.raids
+        }
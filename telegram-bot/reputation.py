@@ -0,0 +1,161 @@
+import re
+import time
+import logging
+from datetime import datetime
+
+URL_PATTERN = re.compile(r"(?i)\b(?:https?://|www\.)[^\s]+")
+DOMAIN_PATTERN = re.compile(
+    r"(?i)\b((?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+"
+    r"(?:com|net|org|id|co|io|me|xyz|site|online|vip|top|cc|info|link|biz|club|live|pro|asia|ly|gg|bet|win|fun|store|shop|app|ink|icu|one|art|life|world|lol))\b(/[^\s]*)?"
+)
+PHONE_PATTERN = re.compile(r"(?<![\d+])(?:\+?62|0)[\s.-]?8(?:[\s.-]?\d){7,12}(?!\d)")
+TRAILING_PUNCTUATION = ".,!?)]}\"'"
+
+# Domain pemendek link: link-nya unik per posting sehingga hanya URL lengkap yang dinilai, bukan domainnya
+SHORTENER_DOMAINS = frozenset({
+    "t.co", "bit.ly", "s.id", "tinyurl.com", "cutt.ly", "shorturl.at", "rb.gy", "is.gd", "ow.ly",
+    "linktr.ee", "wa.me", "t.me", "lynk.id", "heylink.me"
+})
+
+# Fungsi untuk menyeragamkan host dan path (huruf kecil, tanpa skema, www dan tanda baca di akhir)
+def canonical_url(url):
+    url = url.lower().split("#", 1)[0]
+    url = re.sub(r"^https?://", "", url)
+    url = re.sub(r"^www\.", "", url).rstrip(TRAILING_PUNCTUATION).rstrip("/")
+    host, _, path = url.partition("/")
+    return host.split(":", 1)[0], path
+
+# Fungsi untuk menyeragamkan nomor telepon Indonesia ke format 62xxxxxxxx
+def canonical_phone(number):
+    digits = re.sub(r"\D", "", number)
+    return "62" + digits[1:] if digits.startswith("0") else digits
+
+# Fungsi untuk mengambil entitas (url, domain, nomor telepon) dari sebuah pesan
+def extract_entities(text):
+    entities = set()
+    if not text:
+        return entities
+    for match in URL_PATTERN.finditer(text):
+        host, path = canonical_url(match.group(0))
+        if host:
+            entities.add(f"url:{host}/{path}" if path else f"url:{host}")
+            if host not in SHORTENER_DOMAINS:
+                entities.add(f"domain:{host}")
+    for match in DOMAIN_PATTERN.finditer(URL_PATTERN.sub(" ", text)):
+        host, path = canonical_url(match.group(0))
+        if host in SHORTENER_DOMAINS:
+            if path:
+                entities.add(f"url:{host}/{path}")
+        else:
+            entities.add(f"domain:{host}")
+    for match in PHONE_PATTERN.finditer(text):
+        entities.add(f"phone:{canonical_phone(match.group(0))}")
+    return entities
+
+# Index reputasi entitas: kunci entitas -> [jumlah di pesan judi, jumlah di pesan bersih, hit, last_seen epoch]
+# Entitas dianggap buruk jika muncul di >= min_bad pesan judi dan rasio judi >= bad_ratio.
+class ReputationIndex:
+    def __init__(self, min_bad=2, bad_ratio=0.9):
+        self.min_bad = min_bad
+        self.bad_ratio = bad_ratio
+        self._entries = {}
+        self._changed = set()  # entitas yang berubah sejak take_changes terakhir
+        self.lookups = 0
+        self.flagged = 0
+
+    def _entry(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = [0, 0, 0, None]
+        return entry
+
+    # Menambahkan contoh berlabel (seed dataset tidak mengubah last_seen)
+    def record(self, text, label, seen=True):
+        now = time.time()
+        for key in extract_entities(text):
+            entry = self._entry(key)
+            entry[0 if label == 1 else 1] += 1
+            if seen:
+                entry[3] = now
+                self._changed.add(key)
+
+    def seed(self, texts, labels):
+        for text, label in zip(texts, labels):
+            self.record(text, label, seen=False)
+
+    # Pesan dipindah dashboard dari judi ke bersih (atau sebaliknya)
+    def relabel(self, text, to_label):
+        for key in extract_entities(text):
+            entry = self._entry(key)
+            source = 1 if to_label == 1 else 0
+            entry[source] = max(0, entry[source] - 1)
+            entry[0 if to_label == 1 else 1] += 1
+            self._changed.add(key)
+
+    def is_bad(self, entry):
+        bad, clean = entry[0], entry[1]
+        return bad >= self.min_bad and bad >= self.bad_ratio * (bad + clean)
+
+    # Mengembalikan entitas buruk pertama di pesan (lookup O(1) per entitas) atau None
+    def lookup(self, text):
+        self.lookups += 1
+        for key in extract_entities(text):
+            entry = self._entries.get(key)
+            if entry is not None and self.is_bad(entry):
+                entry[2] += 1
+                entry[3] = time.time()
+                self._changed.add(key)
+                self.flagged += 1
+                return key
+        return None
+
+    @staticmethod
+    def format_entry(key, entry):
+        bad, clean, hits, last_seen = entry
+        return {
+            "kind": key.split(":", 1)[0],
+            "bad": bad,
+            "clean": clean,
+            "hits": hits,
+            "last_seen": datetime.fromtimestamp(last_seen).strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+    # Data untuk dashboard: entitas yang berubah sejak pemanggilan terakhir dan pernah terlihat di grup
+    # (bukan hanya dari dataset), sehingga hanya baris yang berubah yang ditulis ulang
+    def take_changes(self):
+        changed, self._changed = self._changed, set()
+        return [
+            (key, self.format_entry(key, self._entries[key]))
+            for key in changed if self._entries[key][3] is not None
+        ]
+
+    # Memulihkan hitungan yang tersimpan (sudah termasuk seed dataset) setelah restart
+    def restore(self, snapshot):
+        for key, data in snapshot.items():
+            try:
+                last_seen = datetime.strptime(data["last_seen"], "%Y-%m-%d %H:%M:%S").timestamp()
+            except (KeyError, TypeError, ValueError):
+                last_seen = None
+            self._entries[key] = [int(data.get("bad") or 0), int(data.get("clean") or 0), int(data.get("hits") or 0), last_seen]
+
+    def stats(self):
+        return {
+            "entities": len(self._entries),
+            "bad_entities": sum(1 for entry in self._entries.values() if self.is_bad(entry)),
+            "lookups": self.lookups,
+            "flagged": self.flagged
+        }
+
+# Fungsi untuk membangun index reputasi dari dataset berlabel dan data tersimpan
+def build_reputation_index(dataset_path=None, saved=None, **kwargs):
+    index = ReputationIndex(**kwargs)
+    if dataset_path:
+        from model_utils import load_labelled_dataset
+        try:
+            index.seed(*load_labelled_dataset(dataset_path))
+        except OSError as e:
+            logging.warning(f"Dataset {dataset_path} tidak bisa dibaca untuk index reputasi: {e}")
+    if saved:
+        index.restore(saved)
+    logging.info(f"Index reputasi dibangun: {index.stats()}")
+    return index
@@ -0,0 +1,104 @@
+import os
+import gzip
+import json
+import shutil
+import logging
+
+UNDATED_SEGMENT = "undated"
+
+# Fungsi untuk menentukan segmen harian sebuah entri pesan (berdasarkan tanggal timestamp)
+def segment_day(entry):
+    timestamp = entry.get("timestamp") or ""
+    return timestamp[:10] if len(timestamp) >= 10 else UNDATED_SEGMENT
+
+# Segmen log pesan terkompresi per hari: <folder>/YYYY-mm-dd.jsonl.gz
+# Setiap baris sama dengan format WAL ({"user_id": ..., "entry": {...}}), sehingga pesan
+# lama bisa dilepas dari memori dan hanya dibaca lagi saat dibutuhkan (dashboard / relabel).
+class DaySegments:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, day):
+        return os.path.join(self.directory, f"{day}.jsonl.gz")
+
+    def days(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-len(".jsonl.gz")] for name in os.listdir(self.directory) if name.endswith(".jsonl.gz"))
+
+    # Menambahkan pesan ke segmen harinya (gzip member baru di akhir file, lalu fsync)
+    def append(self, rows):
+        by_day = {}
+        for user_id, entry in rows:
+            by_day.setdefault(segment_day(entry), []).append(json.dumps({"user_id": str(user_id), "entry": entry}) + "\n")
+        if not by_day:
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        for day, lines in by_day.items():
+            with open(self.path(day), "ab") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="wb") as f:
+                    f.write("".join(lines).encode("utf-8"))
+                raw.flush()
+                os.fsync(raw.fileno())
+        return sum(len(lines) for lines in by_day.values())
+
+    def read_day(self, day):
+        path = self.path(day)
+        if not os.path.exists(path):
+            return
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        logging.warning(f"Baris segmen rusak diabaikan di {path}")
+                        continue
+                    yield str(record["user_id"]), record["entry"]
+        except (OSError, EOFError) as e:
+            logging.warning(f"Gagal membaca segmen {path}: {e}")
+
+    # Membaca semua segmen secara lazy (hari terlama lebih dulu), duplikat dilewati
+    def iter_rows(self):
+        seen = set()
+        for day in self.days():
+            for user_id, entry in self.read_day(day):
+                key = (user_id, entry.get("group_id"), entry.get("message_id"), entry.get("timestamp"))
+                if key in seen:
+                    continue
+                seen.add(key)
+                yield user_id, entry
+
+    # Menghapus pesan tertentu dari segmennya (relabel dashboard), file ditulis ulang secara atomik
+    def remove(self, user_id, entries):
+        by_day = {}
+        for entry in entries:
+            by_day.setdefault(segment_day(entry), set()).add(
+                (str(user_id), entry.get("group_id"), entry.get("message_id"), entry.get("timestamp"))
+            )
+        for day, keys in by_day.items():
+            kept = [
+                json.dumps({"user_id": uid, "entry": entry}) + "\n"
+                for uid, entry in self.read_day(day)
+                if (uid, entry.get("group_id"), entry.get("message_id"), entry.get("timestamp")) not in keys
+            ]
+            tmp_path = f"{self.path(day)}.tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                f.writelines(kept)
+            os.replace(tmp_path, self.path(day))
+
+    # Segmen yang lebih tua dari retensi dipindahkan ke folder arsip (atau dihapus jika archive_dir None)
+    def archive_before(self, cutoff_day, archive_dir=None):
+        archived = []
+        for day in self.days():
+            if day == UNDATED_SEGMENT or day >= cutoff_day:
+                continue
+            if archive_dir:
+                os.makedirs(archive_dir, exist_ok=True)
+                shutil.move(self.path(day), os.path.join(archive_dir, os.path.basename(self.path(day))))
+            else:
+                os.remove(self.path(day))
+            archived.append(day)
+        if archived:
+            logging.info(f"{len(archived)} segmen di {self.directory} melewati retensi ({archived[0]} - {archived[-1]})")
+        return archived
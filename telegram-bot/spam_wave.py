@@ -0,0 +1,128 @@
+import math
+import time
+from array import array
+from prediction_cache import cache_key
+
+# Count-min sketch dengan peluruhan waktu (forward decay): setiap penambahan diberi bobot
+# e^(λ·(t - t0)) dan estimasi dibagi e^(λ·(t - t0)), sehingga hitungan lama meluruh tanpa
+# menyentuh seluruh tabel. Tabel dinormalisasi ulang sebelum bobot terlalu besar.
+class DecayingCountMinSketch:
+    def __init__(self, width=4096, depth=4, half_life_seconds=60):
+        self.width = width
+        self.depth = depth
+        self.decay_rate = math.log(2) / half_life_seconds
+        self._table = [array("d", [0.0] * width) for _ in range(depth)]
+        self._origin = time.monotonic()
+
+    def _indexes(self, fingerprint):
+        value = int(fingerprint, 16)
+        first, second = value & 0xFFFFFFFF, (value >> 32) & 0xFFFFFFFF | 1
+        return [(first + row * second) % self.width for row in range(self.depth)]
+
+    def _weight(self, now):
+        exponent = self.decay_rate * (now - self._origin)
+        if exponent > 50:
+            self._rescale(now)
+            exponent = 0.0
+        return math.exp(exponent)
+
+    def _rescale(self, now):
+        factor = math.exp(-self.decay_rate * (now - self._origin))
+        for row in self._table:
+            for index in range(self.width):
+                row[index] *= factor
+        self._origin = now
+
+    # Menambahkan satu kemunculan dan mengembalikan estimasi hitungan saat ini
+    def add(self, fingerprint, count=1.0, now=None):
+        now = time.monotonic() if now is None else now
+        weight = self._weight(now)
+        estimate = math.inf
+        for row, index in zip(self._table, self._indexes(fingerprint)):
+            row[index] += count * weight
+            estimate = min(estimate, row[index])
+        return estimate / weight
+
+    def estimate(self, fingerprint, now=None):
+        now = time.monotonic() if now is None else now
+        weight = self._weight(now)
+        return min(row[index] for row, index in zip(self._table, self._indexes(fingerprint))) / weight
+
+# Entri heavy hitter: grup tempat pesan muncul (dibatasi) dan status sudah dikonfirmasi judi
+class WaveEntry:
+    __slots__ = ("estimate", "groups", "confirmed", "last_seen")
+
+    def __init__(self):
+        self.estimate = 0.0
+        self.groups = set()
+        self.confirmed = False
+        self.last_seen = 0.0
+
+# Pelacak gelombang spam lintas grup: count-min sketch + top-k sidik jari pesan dengan peluruhan waktu.
+# Sidik jari yang sedang menyebar (estimasi >= wave_threshold di >= min_groups grup) dan pernah dikonfirmasi
+# judi langsung ditindak di semua grup tanpa menjalankan model lagi. Memori tetap: tabel sketch + top_k entri.
+class SpamWaveTracker:
+    def __init__(self, top_k=256, width=4096, depth=4, half_life_seconds=60, wave_threshold=5, min_groups=2, max_groups_per_entry=64):
+        self.sketch = DecayingCountMinSketch(width, depth, half_life_seconds)
+        self.top_k = top_k
+        self.wave_threshold = wave_threshold
+        self.min_groups = min_groups
+        self.max_groups_per_entry = max_groups_per_entry
+        self._entries = {}  # sidik jari -> WaveEntry
+        self.auto_actions = 0
+
+    @staticmethod
+    def fingerprint(text):
+        return cache_key(text)
+
+    def observe(self, fingerprint, group_id):
+        now = time.monotonic()
+        estimate = self.sketch.add(fingerprint, now=now)
+        entry = self._entries.get(fingerprint)
+        if entry is None:
+            if len(self._entries) >= self.top_k:
+                weakest = min(self._entries, key=lambda key: self._decayed(self._entries[key], now))
+                if self._decayed(self._entries[weakest], now) >= estimate:
+                    return estimate
+                del self._entries[weakest]
+            entry = self._entries[fingerprint] = WaveEntry()
+        entry.estimate = estimate
+        entry.last_seen = now
+        if len(entry.groups) < self.max_groups_per_entry:
+            entry.groups.add(str(group_id))
+        return estimate
+
+    def _decayed(self, entry, now):
+        return entry.estimate * math.exp(-self.sketch.decay_rate * (now - entry.last_seen))
+
+    # Menandai sidik jari sebagai judi (dari hasil model / cascade)
+    def confirm(self, fingerprint):
+        entry = self._entries.get(fingerprint)
+        if entry is not None:
+            entry.confirmed = True
+
+    # Sidik jari judi yang sedang menyebar di beberapa grup
+    def is_wave(self, fingerprint):
+        entry = self._entries.get(fingerprint)
+        if entry is None or not entry.confirmed or len(entry.groups) < self.min_groups:
+            return False
+        if self._decayed(entry, time.monotonic()) < self.wave_threshold:
+            return False
+        self.auto_actions += 1
+        return True
+
+    def top(self, n=10):
+        now = time.monotonic()
+        ranked = sorted(self._entries.items(), key=lambda item: self._decayed(item[1], now), reverse=True)[:n]
+        return [
+            {"fingerprint": key, "estimate": round(self._decayed(entry, now), 2), "groups": len(entry.groups), "confirmed": entry.confirmed}
+            for key, entry in ranked
+        ]
+
+    def stats(self):
+        return {
+            "tracked": len(self._entries),
+            "confirmed": sum(1 for entry in self._entries.values() if entry.confirmed),
+            "auto_actions": self.auto_actions,
+            "top": self.top(3)
+        }
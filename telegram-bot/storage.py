@@ -0,0 +1,1085 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from message_records import MessageRecords, window_cutoff
+from segments import DaySegments
+
+# Fungsi untuk menyeragamkan format satu entri pesan (sama dengan format violations.json / non_violations.json)
+def format_message_entry(entry):
+    return {
+        "username": entry.get("username", ""),
+        "name": entry.get("name", ""),
+        "group_id": entry.get("group_id", ""),
+        "group_name": entry.get("group_name", ""),
+        "timestamp": entry.get("timestamp", ""),
+        "message": entry.get("message", ""),
+        "message_id": entry.get("message_id", None)
+    }
+
+def format_message_log(data):
+    return {
+        str(user_id): [format_message_entry(entry) for entry in entries]
+        for user_id, entries in data.items()
+    }
+
+# Fungsi untuk menulis file JSON secara atomik (file sementara + rename)
+def write_json_atomic(path, data, indent=4):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+# Log pesan append-only: snapshot JSON + write-ahead log (JSONL)
+# Setiap pesan baru hanya ditambahkan satu baris ke file .wal (fsync berkelompok),
+# snapshot ditulis ulang hanya saat compaction (berkala dan saat shutdown).
+# Jika max_per_user / max_age_days diisi, hanya hot window yang disimpan di memori dan snapshot;
+# pesan yang lebih lama dipindahkan ke segmen harian terkompresi di <path>.segments.
+class MessageLog:
+    def __init__(self, path, group_commit_size=64, group_commit_interval=1.0, kind=None, index=None,
+                 max_per_user=None, max_age_days=None):
+        self.path = path
+        self.kind = kind
+        self.index = index
+        self.max_per_user = max_per_user
+        self.max_age_days = max_age_days
+        self.segments = DaySegments(f"{path}.segments")
+        self.wal_path = f"{path}.wal"
+        self.group_commit_size = max(1, int(group_commit_size))
+        self.group_commit_interval = group_commit_interval
+        self.data = {}
+        self._wal_file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._compaction_tail = None  # baris WAL yang ditambahkan selama compaction di background
+
+    # Memuat snapshot lalu memutar ulang WAL (crash recovery)
+    def load(self):
+        self.data = MessageRecords.from_json(load_message_log_with_wal(self.path))
+        self._wal_file = open(self.wal_path, "a")
+        if self.index is not None:
+            self.index.add_log(self.kind, self.data)
+        if self.max_per_user or self.max_age_days:
+            self.compact()  # Data lama di luar hot window langsung dipindah ke segmen saat start
+        return self.data
+
+    # Melepas pesan di luar hot window dari memori dan index
+    def _evict(self):
+        if not (self.max_per_user or self.max_age_days):
+            return []
+        evicted = self.data.evict(self.max_per_user, window_cutoff(self.max_age_days))
+        if self.index is not None:
+            for _, entry in evicted:
+                self.index.discard(self.kind, entry)
+        return evicted
+
+    # Segmen ditulis lebih dulu, baru snapshot (crash di antaranya hanya menyisakan duplikat yang dilewati saat dibaca)
+    def _write_compaction(self, evicted, snapshot):
+        if evicted:
+            spilled = self.segments.append(evicted)
+            logging.info(f"{spilled} pesan lama dari {self.path} dipindahkan ke segmen harian")
+        write_json_atomic(self.path, snapshot)
+
+    def append(self, user_id, entry):
+        entry = format_message_entry(entry)
+        self.data.append(user_id, entry)
+        if self.index is not None:
+            self.index.add(self.kind, entry)
+        line = json.dumps({"user_id": user_id, "entry": entry}) + "\n"
+        if self._compaction_tail is not None:
+            self._compaction_tail.append(line)
+        try:
+            self._wal_file.write(line)
+            self._wal_file.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.group_commit_size or time.monotonic() - self._last_sync >= self.group_commit_interval:
+                self.sync()
+        except OSError as e:
+            logging.error(f"Gagal menulis {self.wal_path}: {e}")
+
+    # fsync berkelompok untuk baris WAL yang belum tersinkron
+    def sync(self):
+        if self._wal_file is None or not self._unsynced:
+            return
+        try:
+            os.fsync(self._wal_file.fileno())
+        except OSError as e:
+            logging.error(f"Gagal fsync {self.wal_path}: {e}")
+            return
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    # Menulis snapshot penuh lalu mengosongkan WAL, mengembalikan True jika berhasil
+    def compact(self):
+        self.sync()
+        try:
+            evicted = self._evict()
+            self.data.vacuum()
+            self._write_compaction(evicted, self.data.to_json())
+            if self._wal_file is not None:
+                self._wal_file.truncate(0)
+                self._wal_file.seek(0)
+        except OSError as e:
+            logging.error(f"Gagal compaction {self.path}: {e}")
+            return False
+        return True
+
+    # Compaction tanpa memblokir event loop: snapshot dibuat di loop, file ditulis di thread,
+    # lalu WAL dikosongkan dan diisi ulang dengan pesan yang masuk selama penulisan.
+    async def compact_async(self):
+        if self._compaction_tail is not None:
+            return False
+        self.sync()
+        evicted = self._evict()
+        self.data.vacuum()
+        snapshot = self.data.to_json()
+        self._compaction_tail = []
+        try:
+            await asyncio.to_thread(self._write_compaction, evicted, snapshot)
+            if self._wal_file is not None:
+                self._wal_file.truncate(0)
+                self._wal_file.seek(0)
+                self._wal_file.writelines(self._compaction_tail)
+                self._wal_file.flush()
+                os.fsync(self._wal_file.fileno())
+                self._unsynced = 0
+        except OSError as e:
+            logging.error(f"Gagal compaction {self.path}: {e}")
+            return False
+        finally:
+            self._compaction_tail = None
+        return True
+
+    def close(self):
+        compacted = self.compact()
+        if self._wal_file is not None:
+            self._wal_file.close()
+            self._wal_file = None
+        return compacted
+
+# Fungsi untuk membaca baris WAL, baris terakhir yang terpotong (crash) diabaikan
+def read_wal(wal_path):
+    if not os.path.exists(wal_path):
+        return
+    with open(wal_path, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logging.warning(f"Baris WAL rusak diabaikan di {wal_path}")
+                continue
+            yield str(record["user_id"]), record["entry"]
+
+# Fungsi untuk memuat log pesan (snapshot saja)
+def load_message_log(path):
+    try:
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                return json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        logging.warning(f"Gagal memuat {path}: {e}")
+    return {}
+
+# Fungsi untuk memuat log pesan beserta WAL yang belum di-compaction
+# Entri yang sudah ada di snapshot dilewati (crash setelah snapshot ditulis, sebelum WAL dikosongkan).
+def load_message_log_with_wal(path):
+    data = load_message_log(path)
+    seen = {(uid, log.get("group_id"), log.get("message_id")) for uid, logs in data.items() for log in logs}
+    replayed = 0
+    for user_id, entry in read_wal(f"{path}.wal"):
+        key = (user_id, entry.get("group_id"), entry.get("message_id"))
+        if key not in seen:
+            data.setdefault(user_id, []).append(entry)
+            seen.add(key)
+            replayed += 1
+    if replayed:
+        logging.info(f"{replayed} pesan dipulihkan dari {path}.wal")
+    return data
+
+# Index pesan yang sudah berlabel, kunci (group_id, message_id) karena message_id Telegram
+# hanya unik di dalam satu chat. Dipakai untuk cek duplikat/koreksi dalam O(1).
+class MessageIndex:
+    def __init__(self):
+        self._labels = {}  # kunci (group_id, message_id) -> jenis pesan
+
+    # Kunci dikemas jadi satu int (group_id * 2^32 + message_id) agar index tetap kecil
+    @staticmethod
+    def key(group_id, message_id):
+        try:
+            return int(group_id) * 4294967296 + int(message_id)
+        except (TypeError, ValueError):
+            return str(group_id), message_id
+
+    def add(self, kind, entry):
+        if entry.get("message_id") is not None:
+            self._labels[self.key(entry.get("group_id"), entry["message_id"])] = kind
+
+    def add_log(self, kind, records):
+        for _, position in records.rows():
+            message_id = records.message_id(position)
+            if message_id is not None:
+                self._labels[self.key(records.group_id(position), message_id)] = kind
+
+    def label_of(self, group_id, message_id):
+        return self._labels.get(self.key(group_id, message_id))
+
+    # Hapus kunci pesan yang dilepas dari hot window (selama labelnya belum berubah)
+    def discard(self, kind, entry):
+        if entry.get("message_id") is None:
+            return
+        key = self.key(entry.get("group_id"), entry["message_id"])
+        if self._labels.get(key) == kind:
+            del self._labels[key]
+
+    def relabel(self, group_id, message_id, kind):
+        if message_id is not None:
+            self._labels[self.key(group_id, message_id)] = kind
+
+    def __len__(self):
+        return len(self._labels)
+
+# Fungsi untuk menerapkan relabel dari dashboard ke data log di memori (dan index jika diberikan)
+# messages: jenis pesan -> MessageRecords, on_move(entri, jenis_tujuan) opsional.
+# Idempoten: pesan yang sudah ada di jenis tujuan tidak ditambahkan lagi, sehingga jurnal yang sama aman
+# diputar ulang saat start (relabel saat bot mati, atau snapshot dashboard yang tertimpa compaction bot).
+def apply_relabels(records, messages, index=None, on_move=None):
+    moved = 0
+    for record in records:
+        user_id, to_kind = str(record["user_id"]), record["to_kind"]
+        group_id, message_id = record["group_id"], record["message_id"]
+        if index is not None:
+            index.relabel(group_id, message_id, to_kind)
+        entry = None
+        for kind, data in messages.items():
+            if kind != to_kind:
+                entry = data.remove(user_id, group_id, message_id) or entry
+        if messages[to_kind].find(user_id, group_id, message_id) is None:
+            entry = entry or record.get("entry")  # pesan sudah di luar hot window, entri ikut di jurnal
+            if entry is not None:
+                messages[to_kind].append(user_id, entry)
+        if entry is not None:
+            if on_move is not None:
+                on_move(entry, to_kind)
+            moved += 1
+    return moved
+
+# Dokumen kecil yang disimpan utuh dan jenis log pesan
+DOCUMENTS = ("active_groups", "banned_users", "users_started", "mute_tracker", "entity_reputation")
+MESSAGE_KINDS = ("violation", "clean")
+
+# Fungsi untuk memuat file JSON dokumen
+def load_json_file(path):
+    try:
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                return json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        logging.warning(f"Gagal memuat {path}: {e}")
+    return {}
+
+# Fungsi untuk mengambil baris terakhir seorang user (pelanggaran diutamakan, lalu pesan bersih)
+# violations / clean berisi satu atau lebih MessageRecords (hot window dan segmen lama)
+def latest_entry(violations, clean, user_id):
+    tiers = violations if any(user_id in records for records in violations) else clean
+    candidates = [(records.epoch(position), records, position) for records in tiers for position in records.positions(user_id)]
+    if not candidates:
+        return None
+    _, records, position = max(candidates, key=lambda candidate: candidate[0])
+    return records.entry(position)
+
+# Backend penyimpanan file JSON (format lama) dengan WAL untuk log pesan
+class JsonStore:
+    backend = "json"
+
+    def __init__(self, json_paths, group_commit_size=64, group_commit_interval=1.0):
+        self.paths = json_paths  # nama dokumen / jenis pesan -> path file
+        self.group_commit_size = group_commit_size
+        self.group_commit_interval = group_commit_interval
+        self._messages_cache = {}
+        self._history_cache = {}
+
+    # Melepas cache query dashboard agar file JSON dibaca ulang (dipanggil setiap rerun dashboard)
+    def refresh(self):
+        self._messages_cache.clear()
+        self._history_cache.clear()
+
+    def load_document(self, name):
+        return load_json_file(self.paths[name])
+
+    def save_document(self, name, data):
+        try:
+            write_json_atomic(self.paths[name], data)
+        except OSError as e:
+            logging.error(f"Gagal menyimpan {self.paths[name]}: {e}")
+
+    def put_item(self, name, key, value):
+        data = self.load_document(name)
+        data[str(key)] = value
+        self.save_document(name, data)
+        self._record_change(name, key, value)
+
+    def delete_item(self, name, key):
+        data = self.load_document(name)
+        if data.pop(str(key), None) is not None:
+            self.save_document(name, data)
+            self._record_change(name, key, None)
+
+    # Jurnal perubahan per item dokumen dari dashboard (JSONL), dibaca bot berdasarkan offset byte
+    # Nilai ikut dicatat agar perubahan tetap utuh walau dokumen sempat ditimpa snapshot bot.
+    def _changes_path(self, name):
+        return f"{self.paths[name]}.changes"
+
+    def _record_change(self, name, key, value):
+        try:
+            with open(self._changes_path(name), "a") as f:
+                f.write(json.dumps({"key": str(key), "value": value}, default=str) + "\n")
+        except OSError as e:
+            logging.error(f"Gagal menulis {self._changes_path(name)}: {e}")
+
+    def document_cursor(self, name):
+        path = self._changes_path(name)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def document_changes_since(self, name, cursor):
+        path = self._changes_path(name)
+        if not os.path.exists(path):
+            return [], 0
+        if os.path.getsize(path) < cursor:
+            cursor = 0  # jurnal dibuat ulang
+        changes = []
+        with open(path, "rb") as f:
+            f.seek(cursor)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # baris terakhir belum selesai ditulis
+                cursor += len(line)
+                record = json.loads(line)
+                changes.append((record["key"], record["value"]))
+        return changes, cursor
+
+    # Menulis beberapa item sekaligus (value None = item dihapus) dalam satu penulisan file
+    def write_items(self, name, items):
+        data = self.load_document(name)
+        for key, value in items:
+            if value is None:
+                data.pop(str(key), None)
+            else:
+                data[str(key)] = value
+        self.save_document(name, data)
+
+    def message_log(self, kind, index=None, max_per_user=None, max_age_days=None):
+        return MessageLog(self.paths[kind], self.group_commit_size, self.group_commit_interval, kind, index,
+                          max_per_user, max_age_days)
+
+    def _segments(self, kind):
+        return DaySegments(f"{self.paths[kind]}.segments")
+
+    # Retensi: segmen harian yang lebih tua dari retention_days dipindah ke archive_dir/<jenis> (None = dihapus)
+    def archive_messages(self, kind, retention_days, archive_dir=None):
+        cutoff_day = (datetime.now() - timedelta(days=retention_days)).strftime("%Y-%m-%d")
+        return len(self._segments(kind).archive_before(cutoff_day, archive_dir and os.path.join(archive_dir, kind)))
+
+    # Jurnal relabel dari dashboard (JSONL), dibaca bot berdasarkan offset byte
+    def _relabel_path(self):
+        return self.paths.get("relabels", f"{self.paths['violation']}.relabels")
+
+    def _record_relabels(self, user_id, moved, to_kind):
+        lines = [
+            json.dumps({"user_id": str(user_id), "group_id": log.get("group_id"), "message_id": log.get("message_id"), "to_kind": to_kind, "entry": log}) + "\n"
+            for log in moved
+        ]
+        try:
+            with open(self._relabel_path(), "a") as f:
+                f.writelines(lines)
+        except OSError as e:
+            logging.error(f"Gagal menulis {self._relabel_path()}: {e}")
+
+    # Posisi jurnal yang sudah tercakup di snapshot bot, disimpan bot setelah compaction
+    def _relabel_cursor_path(self):
+        return f"{self._relabel_path()}.cursor"
+
+    def relabel_cursor(self):
+        return int(load_json_file(self._relabel_cursor_path()).get("cursor", 0))
+
+    def save_relabel_cursor(self, cursor):
+        try:
+            write_json_atomic(self._relabel_cursor_path(), {"cursor": cursor})
+        except OSError as e:
+            logging.error(f"Gagal menyimpan {self._relabel_cursor_path()}: {e}")
+
+    def relabels_since(self, cursor):
+        path = self._relabel_path()
+        if not os.path.exists(path):
+            return [], 0
+        if os.path.getsize(path) < cursor:
+            cursor = 0  # jurnal dibuat ulang
+        records = []
+        with open(path, "rb") as f:
+            f.seek(cursor)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # baris terakhir belum selesai ditulis
+                cursor += len(line)
+                records.append(json.loads(line))
+        return records, cursor
+
+    # Query untuk dashboard (dihitung di memori dari file JSON)
+    # Relabel yang belum tercakup snapshot bot diterapkan ulang, karena WAL bot masih bisa berisi
+    # pesan di jenis lamanya dan compaction bot bisa menimpa snapshot yang ditulis dashboard.
+    def _messages(self, kind):
+        if kind not in self._messages_cache:
+            messages = {k: MessageRecords.from_json(load_message_log_with_wal(self.paths[k])) for k in MESSAGE_KINDS}
+            apply_relabels(self.relabels_since(self.relabel_cursor())[0], messages)
+            self._messages_cache.update(messages)
+        return self._messages_cache[kind]
+
+    # Pesan lama di segmen harian, baru dibaca saat query membutuhkannya
+    def _history(self, kind):
+        if kind not in self._history_cache:
+            records = MessageRecords()
+            for user_id, entry in self._segments(kind).iter_rows():
+                records.append(user_id, entry)
+            self._history_cache[kind] = records
+        return self._history_cache[kind]
+
+    def _tiers(self, kind):
+        return (self._messages(kind), self._history(kind))
+
+    def _rows(self, kind):
+        for records in self._tiers(kind):
+            for user_id, position in records.rows():
+                yield records, user_id, position
+
+    def count_messages(self, kind):
+        return sum(len(records) for records in self._tiers(kind))
+
+    def count_by_date_group(self, kind):
+        counts = {}
+        for records, _, position in self._rows(kind):
+            key = (records.date(position), records.group_name(position))
+            counts[key] = counts.get(key, 0) + 1
+        return [(date, group_name, total) for (date, group_name), total in counts.items()]
+
+    def group_names(self, kind=None):
+        kinds = [kind] if kind else MESSAGE_KINDS
+        return sorted({records.group_name(position) for k in kinds for records, _, position in self._rows(k)})
+
+    def message_texts(self, kind, group_names):
+        group_names = set(group_names)
+        return [records.text(position) for records, _, position in self._rows(kind) if records.group_name(position) in group_names]
+
+    def message_dates(self):
+        return sorted({records.date(position) for kind in MESSAGE_KINDS for records, _, position in self._rows(kind)})
+
+    def user_group_summary(self):
+        summary = {}
+        for kind in MESSAGE_KINDS:
+            for records, user_id, position in self._rows(kind):
+                group_id = records.group_id(position)
+                row = summary.setdefault((user_id, group_id), {
+                    "user_id": user_id, "group_id": group_id, "violation": 0, "clean": 0, "ref": None
+                })
+                row[kind] += 1
+                # Data referensi diambil dari pelanggaran pertama, atau pesan bersih pertama
+                if row["ref"] is None or (kind == "violation" and row["violation"] == 1):
+                    row["ref"] = (records, position)
+        return [
+            {
+                "user_id": row["user_id"], "group_id": row["group_id"],
+                "username": row["ref"][0].username(row["ref"][1]), "name": row["ref"][0].name(row["ref"][1]),
+                "group_name": row["ref"][0].group_name(row["ref"][1]),
+                "violation": row["violation"], "clean": row["clean"]
+            }
+            for row in summary.values()
+        ]
+
+    def latest_message_per_user(self, group_name=None, date=None, search=None):
+        violations, clean = self._tiers("violation"), self._tiers("clean")
+        user_ids = {user_id for records in violations + clean for user_id in records.user_ids()}
+        rows = []
+        for user_id in user_ids:
+            log = latest_entry(violations, clean, user_id)
+            if log is None:
+                continue
+            if group_name and log["group_name"] != group_name:
+                continue
+            if date and not log["timestamp"].startswith(date):
+                continue
+            if search and not any(search in str(value).lower() for value in (log["username"], log["name"], user_id)):
+                continue
+            rows.append({**log, "user_id": user_id})
+        return rows
+
+    # id pesan = posisi baris; pesan dari segmen harian memakai id negatif (-posisi - 1)
+    def user_messages(self, user_id, kind):
+        hot, history = self._tiers(kind)
+        messages = [{**history.entry(position), "id": -position - 1} for position in history.positions(user_id)]
+        messages += [{**hot.entry(position), "id": position} for position in hot.positions(user_id)]
+        return messages
+
+    # Memindahkan pesan user antar jenis (relabel dashboard), ids None = semua pesan
+    def move_messages(self, user_id, from_kind, to_kind, ids=None):
+        source, history = self._tiers(from_kind)
+        if ids is None:
+            hot_ids, history_ids = source.positions(user_id), history.positions(user_id)
+        else:
+            hot_ids = [i for i in ids if i >= 0]
+            history_ids = [-i - 1 for i in ids if i < 0]
+        moved_history = history.pop_positions(user_id, history_ids)
+        if moved_history:
+            self._segments(from_kind).remove(user_id, moved_history)
+        moved = moved_history + source.pop_positions(user_id, hot_ids)
+        target = self._messages(to_kind)
+        for log in moved:
+            target.append(user_id, log)
+        self.save_document(from_kind, source.to_json())
+        self.save_document(to_kind, target.to_json())
+        self._record_relabels(user_id, moved, to_kind)
+        return moved
+
+# Skema SQLite: satu tabel pesan (kind = violation / clean) dan satu tabel per dokumen
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    username TEXT,
+    name TEXT,
+    group_id TEXT,
+    group_name TEXT,
+    timestamp TEXT,
+    message TEXT,
+    message_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_messages_user ON messages(user_id, kind);
+CREATE INDEX IF NOT EXISTS idx_messages_group ON messages(group_id);
+CREATE INDEX IF NOT EXISTS idx_messages_group_message ON messages(group_id, message_id);
+CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages(timestamp);
+CREATE TABLE IF NOT EXISTS active_groups (
+    key TEXT PRIMARY KEY, group_name TEXT, activated_by TEXT, date TEXT, time TEXT, admins TEXT
+);
+CREATE TABLE IF NOT EXISTS banned_users (
+    key TEXT PRIMARY KEY, username TEXT, name TEXT, date TEXT, time TEXT
+);
+CREATE TABLE IF NOT EXISTS users_started (
+    key TEXT PRIMARY KEY, username TEXT, name TEXT, date TEXT, time TEXT
+);
+CREATE TABLE IF NOT EXISTS mute_tracker (
+    key TEXT PRIMARY KEY, username TEXT, name TEXT, until TEXT, groups TEXT
+);
+CREATE TABLE IF NOT EXISTS entity_reputation (
+    key TEXT PRIMARY KEY, kind TEXT, bad INTEGER, clean INTEGER, hits INTEGER, last_seen TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY, value TEXT
+);
+CREATE TABLE IF NOT EXISTS relabels (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, group_id TEXT, message_id INTEGER, to_kind TEXT
+);
+CREATE TABLE IF NOT EXISTS document_changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, key TEXT, value TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_document_changes_name ON document_changes(name, id);
+"""
+
+DOCUMENT_COLUMNS = {
+    "active_groups": ("group_name", "activated_by", "date", "time", "admins"),
+    "banned_users": ("username", "name", "date", "time"),
+    "users_started": ("username", "name", "date", "time"),
+    "mute_tracker": ("username", "name", "until", "groups"),
+    "entity_reputation": ("kind", "bad", "clean", "hits", "last_seen")
+}
+JSON_COLUMNS = {"admins", "groups"}
+
+# Backend penyimpanan SQLite (mode WAL) yang dipakai bersama oleh bot dan dashboard
+class SQLiteStore:
+    backend = "sqlite"
+
+    def __init__(self, db_path, group_commit_size=64, group_commit_interval=1.0):
+        import sqlite3
+        import threading
+        self.db_path = db_path
+        self.group_commit_size = group_commit_size
+        self.group_commit_interval = group_commit_interval
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=10000")
+        self.conn.executescript(SQLITE_SCHEMA)
+
+    def commit(self):
+        with self.lock:
+            self.conn.commit()
+
+    # Query dashboard selalu membaca database, tidak ada cache yang perlu dilepas
+    def refresh(self):
+        pass
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+
+    def get_meta(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def set_meta(self, key, value):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+            self.conn.commit()
+
+    # Dokumen kecil (grup aktif, user diblokir, user terverifikasi, mute)
+    def _row_to_item(self, name, row):
+        return {
+            column: json.loads(row[column]) if column in JSON_COLUMNS and row[column] is not None else row[column]
+            for column in DOCUMENT_COLUMNS[name]
+        }
+
+    def _item_values(self, name, key, value):
+        values = [str(key)]
+        for column in DOCUMENT_COLUMNS[name]:
+            item = value.get(column)
+            values.append(json.dumps(item) if column in JSON_COLUMNS else item)
+        return values
+
+    def load_document(self, name):
+        with self.lock:
+            rows = self.conn.execute(f"SELECT * FROM {name}").fetchall()
+        return {row["key"]: self._row_to_item(name, row) for row in rows}
+
+    def save_document(self, name, data):
+        import sqlite3
+        columns = ("key",) + DOCUMENT_COLUMNS[name]
+        sql = f"INSERT INTO {name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        try:
+            with self.lock, self.conn:
+                self.conn.execute(f"DELETE FROM {name}")
+                self.conn.executemany(sql, [self._item_values(name, key, value) for key, value in data.items()])
+        except sqlite3.Error as e:
+            logging.error(f"Gagal menyimpan {name} ke {self.db_path}: {e}")
+
+    def put_item(self, name, key, value):
+        columns = ("key",) + DOCUMENT_COLUMNS[name]
+        with self.lock, self.conn:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO {name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                self._item_values(name, key, value)
+            )
+            self.conn.execute(
+                "INSERT INTO document_changes (name, key, value) VALUES (?, ?, ?)",
+                (name, str(key), json.dumps(value, default=str))
+            )
+
+    def delete_item(self, name, key):
+        with self.lock, self.conn:
+            deleted = self.conn.execute(f"DELETE FROM {name} WHERE key = ?", (str(key),)).rowcount
+            if deleted:
+                self.conn.execute("INSERT INTO document_changes (name, key, value) VALUES (?, ?, NULL)", (name, str(key)))
+
+    # Jurnal perubahan per item dokumen dari dashboard, dibaca bot berdasarkan id terakhir
+    def document_cursor(self, name):
+        with self.lock:
+            return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM document_changes WHERE name = ?", (name,)).fetchone()[0]
+
+    def document_changes_since(self, name, cursor):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, key, value FROM document_changes WHERE name = ? AND id > ? ORDER BY id", (name, cursor)
+            ).fetchall()
+        if not rows:
+            return [], cursor
+        return [(row["key"], None if row["value"] is None else json.loads(row["value"])) for row in rows], rows[-1]["id"]
+
+    # Menulis beberapa item sekaligus (value None = item dihapus) dalam satu transaksi
+    def write_items(self, name, items):
+        import sqlite3
+        columns = ("key",) + DOCUMENT_COLUMNS[name]
+        sql = f"INSERT OR REPLACE INTO {name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        try:
+            with self.lock, self.conn:
+                self.conn.executemany(sql, [self._item_values(name, key, value) for key, value in items if value is not None])
+                self.conn.executemany(f"DELETE FROM {name} WHERE key = ?", [(str(key),) for key, value in items if value is None])
+        except sqlite3.Error as e:
+            logging.error(f"Gagal menyimpan {name} ke {self.db_path}: {e}")
+
+    # Log pesan
+    def message_log(self, kind, index=None, max_per_user=None, max_age_days=None):
+        return SQLiteMessageLog(self, kind, self.group_commit_size, self.group_commit_interval, index,
+                                max_per_user, max_age_days)
+
+    # Retensi: pesan yang lebih tua dari retention_days diekspor ke segmen harian di
+    # archive_dir/<jenis> (None = tidak diekspor) lalu dihapus dari database
+    def archive_messages(self, kind, retention_days, archive_dir=None):
+        cutoff_day = (datetime.now() - timedelta(days=retention_days)).strftime("%Y-%m-%d")
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT * FROM messages WHERE kind = ? AND timestamp < ? ORDER BY id", (kind, cutoff_day)
+            ).fetchall()
+        if not rows:
+            return 0
+        # Ekspor dilakukan di luar lock agar insert dari bot tidak tertahan
+        if archive_dir:
+            DaySegments(os.path.join(archive_dir, kind)).append(
+                (row["user_id"], format_message_entry(dict(row))) for row in rows
+            )
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM messages WHERE kind = ? AND id <= ? AND timestamp < ?", (kind, rows[-1]["id"], cutoff_day))
+        logging.info(f"{len(rows)} pesan {kind} sebelum {cutoff_day} diarsipkan dari {self.db_path}")
+        return len(rows)
+
+    # Jurnal relabel dari dashboard, dibaca bot berdasarkan id terakhir yang sudah diterapkan (tabel meta)
+    def relabel_cursor(self):
+        return int(self.get_meta("relabel_cursor") or 0)
+
+    def save_relabel_cursor(self, cursor):
+        self.set_meta("relabel_cursor", str(cursor))
+
+    def relabels_since(self, cursor):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, user_id, group_id, message_id, to_kind FROM relabels WHERE id > ? ORDER BY id", (cursor,)
+            ).fetchall()
+        if not rows:
+            return [], cursor
+        return [{key: row[key] for key in ("user_id", "group_id", "message_id", "to_kind")} for row in rows], rows[-1]["id"]
+
+    def insert_message(self, kind, user_id, entry):
+        entry = format_message_entry(entry)
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT INTO messages (kind, user_id, username, name, group_id, group_name, timestamp, message, message_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (kind, str(user_id), entry["username"], entry["name"], str(entry["group_id"]), entry["group_name"],
+                 entry["timestamp"], entry["message"], entry["message_id"])
+            )
+        return cursor.lastrowid
+
+    # Memuat pesan ke memori, opsional hanya hot window (N pesan terbaru per user / sejak tanggal tertentu)
+    def load_messages(self, kind, max_per_user=None, since=None):
+        conditions, params = ["kind = ?"], [kind]
+        if since:
+            conditions.append("timestamp >= ?")
+            params.append(since)
+        sql = f"SELECT * FROM messages WHERE {' AND '.join(conditions)}"
+        if max_per_user:
+            sql = (
+                f"SELECT * FROM (SELECT *, ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY id DESC) AS row_rank "
+                f"FROM messages WHERE {' AND '.join(conditions)}) WHERE row_rank <= ?"
+            )
+            params.append(max_per_user)
+        records = MessageRecords()
+        with self.lock:
+            cursor = self.conn.execute(f"{sql} ORDER BY id", params)
+            for row in cursor:
+                records.append(row["user_id"], dict(row))
+        return records
+
+    # Query untuk dashboard (memakai index, tanpa memuat seluruh data)
+    def count_messages(self, kind):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM messages WHERE kind = ?", (kind,)).fetchone()[0]
+
+    def count_by_date_group(self, kind):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT substr(timestamp, 1, 10) AS date, group_name, COUNT(*) AS total FROM messages "
+                "WHERE kind = ? GROUP BY date, group_name", (kind,)
+            ).fetchall()
+        return [(row["date"], row["group_name"], row["total"]) for row in rows]
+
+    def group_names(self, kind=None):
+        sql = "SELECT DISTINCT group_name FROM messages" + (" WHERE kind = ?" if kind else "") + " ORDER BY group_name"
+        with self.lock:
+            return [row[0] for row in self.conn.execute(sql, (kind,) if kind else ()).fetchall()]
+
+    def message_texts(self, kind, group_names):
+        group_names = list(group_names)
+        if not group_names:
+            return []
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT message FROM messages WHERE kind = ? AND group_name IN ({', '.join('?' * len(group_names))})",
+                [kind] + group_names
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def message_dates(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT DISTINCT substr(timestamp, 1, 10) FROM messages ORDER BY 1").fetchall()
+        return [row[0] for row in rows]
+
+    def user_group_summary(self):
+        # Data referensi diambil dari pelanggaran pertama, atau pesan bersih pertama
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT s.user_id, s.group_id, s.violation, s.clean, m.username, m.name, m.group_name FROM ("
+                "SELECT user_id, group_id, SUM(kind = 'violation') AS violation, SUM(kind = 'clean') AS clean, "
+                "COALESCE(MIN(CASE WHEN kind = 'violation' THEN id END), MIN(id)) AS ref_id "
+                "FROM messages GROUP BY user_id, group_id) AS s JOIN messages AS m ON m.id = s.ref_id"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def latest_message_per_user(self, group_name=None, date=None, search=None):
+        conditions, params = ["row_rank = 1"], []
+        if group_name:
+            conditions.append("group_name = ?")
+            params.append(group_name)
+        if date:
+            conditions.append("timestamp LIKE ?")
+            params.append(f"{date}%")
+        if search:
+            conditions.append("(username LIKE ? OR name LIKE ? OR user_id LIKE ?)")
+            params.extend([f"%{search}%"] * 3)
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT * FROM (SELECT *, ROW_NUMBER() OVER ("
+                "PARTITION BY user_id ORDER BY kind = 'violation' DESC, timestamp DESC) AS row_rank FROM messages) "
+                f"WHERE {' AND '.join(conditions)}", params
+            ).fetchall()
+        return [{**format_message_entry(dict(row)), "user_id": row["user_id"]} for row in rows]
+
+    def user_messages(self, user_id, kind):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT * FROM messages WHERE user_id = ? AND kind = ? ORDER BY id", (str(user_id), kind)
+            ).fetchall()
+        return [{**format_message_entry(dict(row)), "id": row["id"]} for row in rows]
+
+    def move_messages(self, user_id, from_kind, to_kind, ids=None):
+        condition, params = "user_id = ? AND kind = ?", [str(user_id), from_kind]
+        if ids is not None:
+            ids = list(ids)
+            if not ids:
+                return []
+            condition += f" AND id IN ({', '.join('?' * len(ids))})"
+            params += ids
+        with self.lock, self.conn:
+            rows = self.conn.execute(f"SELECT * FROM messages WHERE {condition} ORDER BY id", params).fetchall()
+            self.conn.execute(f"UPDATE messages SET kind = ? WHERE {condition}", [to_kind] + params)
+            self.conn.executemany(
+                "INSERT INTO relabels (user_id, group_id, message_id, to_kind) VALUES (?, ?, ?, ?)",
+                [(row["user_id"], row["group_id"], row["message_id"], to_kind) for row in rows]
+            )
+        return [format_message_entry(dict(row)) for row in rows]
+
+    # Migrasi satu kali dari file JSON lama
+    def migrate_from_json(self, json_paths, force=False):
+        if self.get_meta("migrated_from_json") and not force:
+            logging.info(f"{self.db_path} sudah pernah dimigrasi dari JSON, dilewati")
+            return False
+        with self.lock, self.conn:
+            for name in DOCUMENTS:
+                if name in json_paths:
+                    data = load_json_file(json_paths[name])
+                    self.conn.execute(f"DELETE FROM {name}")
+                    columns = ("key",) + DOCUMENT_COLUMNS[name]
+                    self.conn.executemany(
+                        f"INSERT INTO {name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                        [self._item_values(name, key, value) for key, value in data.items()]
+                    )
+            self.conn.execute("DELETE FROM messages")
+            # Pesan dibaca lewat JsonStore agar relabel yang belum tercakup snapshot ikut diterapkan
+            source = JsonStore(json_paths)
+            for kind in MESSAGE_KINDS:
+                if kind in json_paths:
+                    records = source._messages(kind)
+                    for user_id, position in records.rows():
+                        self.insert_message(kind, user_id, records.entry(position))
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from_json', ?)", (time.strftime("%Y-%m-%d %H:%M:%S"),))
+        logging.info(f"Data JSON berhasil dimigrasi ke {self.db_path}")
+        return True
+
+# Log pesan di atas SQLite: setiap pesan satu INSERT, commit berkelompok
+# Jika max_per_user / max_age_days diisi, memori hanya berisi hot window; pesan lama tetap di database.
+class SQLiteMessageLog:
+    def __init__(self, store, kind, group_commit_size=64, group_commit_interval=1.0, index=None,
+                 max_per_user=None, max_age_days=None):
+        self.store = store
+        self.kind = kind
+        self.index = index
+        self.max_per_user = max_per_user
+        self.max_age_days = max_age_days
+        self.group_commit_size = max(1, int(group_commit_size))
+        self.group_commit_interval = group_commit_interval
+        self.data = {}
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def load(self):
+        since = (datetime.now() - timedelta(days=self.max_age_days)).strftime("%Y-%m-%d %H:%M:%S") if self.max_age_days else None
+        self.data = self.store.load_messages(self.kind, self.max_per_user, since)
+        if self.index is not None:
+            self.index.add_log(self.kind, self.data)
+        return self.data
+
+    def append(self, user_id, entry):
+        import sqlite3
+        entry = format_message_entry(entry)
+        self.data.append(user_id, entry)
+        if self.index is not None:
+            self.index.add(self.kind, entry)
+        try:
+            self.store.insert_message(self.kind, user_id, entry)
+        except sqlite3.Error as e:
+            logging.error(f"Gagal menyimpan pesan {self.kind} ke {self.store.db_path}: {e}")
+            return
+        self._unsynced += 1
+        if self._unsynced >= self.group_commit_size or time.monotonic() - self._last_sync >= self.group_commit_interval:
+            self.sync()
+
+    def sync(self):
+        if not self._unsynced:
+            return
+        self.store.commit()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    # Pesan di luar hot window cukup dilepas dari memori, tidak dipindah ke segmen harian: database tetap
+    # menyimpannya sampai archive_messages mengekspornya setelah masa retensi
+    def compact(self):
+        self.sync()
+        if self.max_per_user or self.max_age_days:
+            for _, entry in self.data.evict(self.max_per_user, window_cutoff(self.max_age_days)):
+                if self.index is not None:
+                    self.index.discard(self.kind, entry)
+            self.data.vacuum()
+        return True
+
+    async def compact_async(self):
+        return self.compact()
+
+    def close(self):
+        self.sync()
+        return True
+
+# Penulis dokumen di background: perubahan item beruntun digabung menjadi satu tulisan per dokumen
+# setiap flush_interval detik atau setelah max_pending perubahan, dan ditulis di thread
+# executor (temp file + rename / transaksi SQLite) sehingga event loop tidak terblokir.
+# Hanya item yang berubah yang ditulis, item lain (misalnya unban dari dashboard) tidak tertimpa.
+class DocumentFlusher:
+    def __init__(self, store, flush_interval=0.5, max_pending=100):
+        self.store = store
+        self.flush_interval = flush_interval
+        self.max_pending = max(1, int(max_pending))
+        self._dirty = {}  # nama dokumen -> {kunci item: fungsi snapshot item (versi terbaru saja)}
+        self._pending = 0
+        self._wakeup = None
+        self._task = None
+        self._write_lock = None
+        self._stopping = False
+        self.writes = 0
+        self.changes = 0
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._write_lock = asyncio.Lock()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    # Tandai satu item dokumen berubah; snapshot item dibuat saat flush sehingga perubahan beruntun
+    # hanya diformat sekali. Snapshot yang mengembalikan None berarti item dihapus.
+    def mark_dirty(self, name, key, snapshot):
+        self._dirty.setdefault(name, {})[str(key)] = snapshot
+        self._pending += 1
+        self.changes += 1
+        if self._task is None:
+            self._write_now(name)
+        elif self._pending >= self.max_pending:
+            self._wakeup.set()
+
+    def _take(self, name):
+        return [(key, snapshot()) for key, snapshot in self._dirty.pop(name).items()]
+
+    def _write_now(self, name):
+        self.store.write_items(name, self._take(name))
+        self.writes += 1
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.error(f"Gagal menulis dokumen di background: {e}")
+
+    # Tulis dokumen yang kotor (semua, atau hanya yang disebutkan)
+    async def flush(self, *names):
+        names = [name for name in (names or list(self._dirty)) if name in self._dirty]
+        if not names:
+            return
+        if self._write_lock is None:
+            for name in names:
+                self._write_now(name)
+            return
+        # Snapshot dibuat di event loop agar konsisten, penulisan dilakukan di executor
+        documents = [(name, self._take(name)) for name in names]
+        if not self._dirty:
+            self._pending = 0
+        async with self._write_lock:
+            for name, items in documents:
+                await asyncio.to_thread(self.store.write_items, name, items)
+                self.writes += 1
+
+    # Hentikan task background setelah semua perubahan yang tersisa ditulis
+    async def stop(self):
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        for name in list(self._dirty):
+            self._write_now(name)
+        logging.info(f"Penulis dokumen berhenti: {self.changes} perubahan ditulis dalam {self.writes} penulisan")
+
+# Fungsi untuk membuka backend penyimpanan ("json" atau "sqlite")
+# Database SQLite yang masih kosong otomatis diisi sekali dari file JSON lama.
+def open_store(backend, json_paths, db_path=None, group_commit_size=64, group_commit_interval=1.0):
+    if backend == "json":
+        return JsonStore(json_paths, group_commit_size, group_commit_interval)
+    if backend != "sqlite":
+        raise ValueError(f"Backend penyimpanan tidak dikenal: {backend}")
+    store = SQLiteStore(db_path, group_commit_size, group_commit_interval)
+    if not store.get_meta("migrated_from_json") and any(os.path.exists(path) for path in json_paths.values()):
+        store.migrate_from_json(json_paths)
+    return store
+
+# Lokasi default file JSON lama
+def default_json_paths(data_dir="."):
+    return {
+        "active_groups": os.path.join(data_dir, "active_groups.json"),
+        "banned_users": os.path.join(data_dir, "banned_users.json"),
+        "users_started": os.path.join(data_dir, "user_started.json"),
+        "mute_tracker": os.path.join(data_dir, "mute_tracker.json"),
+        "entity_reputation": os.path.join(data_dir, "entity_reputation.json"),
+        "violation": os.path.join(data_dir, "violations.json"),
+        "clean": os.path.join(data_dir, "non_violations.json")
+    }
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Migrasi data JSON AntiJudiBot ke SQLite")
+    parser.add_argument("command", choices=["migrate"])
+    parser.add_argument("--db", default="antijudi.db")
+    parser.add_argument("--data-dir", default=".", help="Folder berisi file JSON lama")
+    parser.add_argument("--force", action="store_true", help="Ulangi migrasi walau sudah pernah dilakukan")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    store = SQLiteStore(args.db)
+    store.migrate_from_json(default_json_paths(args.data_dir), force=args.force)
+    store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modul bot berada satu folder di atas tests dan saling import sebagai modul sejajar
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,41 @@
+import pytest
+from lexical_classifier import LexicalCascade, LexicalClassifier, load_lexical_cascade
+
+# Classifier dengan probabilitas tetap per teks, cukup untuk menguji band cascade
+class FixedClassifier:
+    def __init__(self, probabilities):
+        self.probabilities = probabilities
+
+    def predict_spam_proba(self, texts):
+        return [self.probabilities[text] for text in texts]
+
+def test_cascade_only_forwards_uncertain_messages():
+    cascade = LexicalCascade(FixedClassifier({"halo": 0.01, "slot gacor": 0.99, "promo": 0.5}), 0.05, 0.98)
+
+    assert cascade.classify("halo") == (0, 0.01)
+    assert cascade.classify("slot gacor") == (1, 0.99)
+    assert cascade.classify("promo") == (None, 0.5)
+    stats = cascade.stats()
+    assert (stats["clean"], stats["spam"], stats["uncertain"]) == (1, 1, 1)
+    assert stats["skip_transformer_ratio"] == pytest.approx(2 / 3)
+
+def test_invalid_band_is_rejected():
+    with pytest.raises(ValueError):
+        LexicalCascade(FixedClassifier({}), 0.9, 0.1)
+
+def test_missing_model_disables_cascade(tmp_path):
+    assert load_lexical_cascade(str(tmp_path / "lexical.joblib"), 0.05, 0.98) is None
+
+def test_trained_model_round_trips_through_disk(tmp_path):
+    pytest.importorskip("sklearn")
+    pytest.importorskip("joblib")
+    texts = ["slot gacor maxwin hari ini", "daftar situs slot deposit", "rapat jam tiga sore", "jangan lupa makan siang"] * 5
+    labels = [1, 1, 0, 0] * 5
+    classifier = LexicalClassifier.train(texts, labels, n_features=2 ** 12)
+    path = str(tmp_path / "lexical.joblib")
+    classifier.save(path)
+
+    restored = LexicalClassifier.load(path)
+    assert restored.normalizer is None
+    assert restored.predict_spam_proba(texts[:4]) == pytest.approx(classifier.predict_spam_proba(texts[:4]))
+    assert restored.predict_spam_proba(["slot gacor maxwin"])[0] > 0.5
@@ -0,0 +1,45 @@
+import membership
+from membership import MembershipIndex
+
+def test_status_is_tracked_per_user_and_group():
+    index = MembershipIndex()
+    index.record(1, -100, "member")
+
+    assert index.status("1", "-100") == "member"
+    # Grup lain belum diketahui: pemanggil harus mengecek lewat getChatMember
+    assert index.status("1", "-200") is None
+    assert index.stats()["hits"] == 1
+    assert index.stats()["misses"] == 1
+
+def test_negative_status_expires_sooner(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(membership.time, "monotonic", lambda: now[0])
+    index = MembershipIndex(member_ttl=3600, negative_ttl=60)
+    index.record(1, -100, "member")
+    index.record(1, -200, "left")
+
+    now[0] += 120
+    assert index.status(1, -100) == "member"
+    assert index.status(1, -200) is None
+
+def test_seen_keeps_known_member_status():
+    index = MembershipIndex()
+    index.record(1, -100, "restricted")
+    index.seen(1, -100)
+    index.seen(1, -200)
+
+    assert index.status(1, -100) == "restricted"
+    assert index.status(1, -200) == "member"
+
+def test_least_recent_user_is_evicted_and_group_forgotten():
+    index = MembershipIndex(max_users=2)
+    index.record(1, -100, "member")
+    index.record(2, -100, "member")
+    index.record(1, -200, "member")
+    index.record(3, -100, "member")
+
+    assert index.status(2, -100) is None
+    assert index.status(1, -200) == "member"
+    index.forget_group(-200)
+    assert index.status(1, -200) is None
+    assert index.stats()["evictions"] == 1
@@ -0,0 +1,55 @@
+from message_records import MessageRecords
+
+def make_entry(message_id, message="pesan", timestamp="2024-05-01 10:00:00", username="@user", group_id="-100"):
+    return {
+        "username": username, "name": "User", "group_id": group_id, "group_name": "Grup",
+        "timestamp": timestamp, "message": message, "message_id": message_id
+    }
+
+def test_json_round_trip_keeps_every_field():
+    data = {
+        "1": [make_entry(10, "halo"), make_entry(None, "tanpa id", timestamp="")],
+        "2": [make_entry(11, "slot gacor", username="@lain", group_id="-200")]
+    }
+    expected = {user_id: [dict(entry) for entry in entries] for user_id, entries in data.items()}
+
+    records = MessageRecords.from_json(data)
+    assert len(records) == 3
+    assert records.to_json() == expected
+    # extend_json melepas list sumber agar memori puncak tetap kecil
+    assert data == {}
+
+def test_repeated_users_and_groups_are_interned():
+    records = MessageRecords()
+    for message_id in range(50):
+        records.append("1", make_entry(message_id))
+    stats = records.stats()
+    assert stats["records"] == 50
+    assert stats["interned_user_names"] == 1
+    assert stats["interned_groups"] == 1
+
+def test_remove_and_vacuum_keep_remaining_rows():
+    records = MessageRecords.from_json({"1": [make_entry(10), make_entry(11), make_entry(12)]})
+    removed = records.remove("1", -100, 11)
+    assert removed["message_id"] == 11
+    assert records.remove("1", -100, 11) is None
+    assert records.stats()["dead_rows"] == 1
+
+    records.vacuum()
+    assert records.stats()["dead_rows"] == 0
+    assert [entry["message_id"] for entry in records.entries("1")] == [10, 12]
+    assert records.find("1", "-100", 12) is not None
+
+def test_evict_returns_rows_outside_hot_window():
+    records = MessageRecords.from_json({"1": [
+        make_entry(10, timestamp="2024-01-01 10:00:00"),
+        make_entry(11, timestamp="2024-05-01 10:00:00"),
+        make_entry(12, timestamp="2024-05-02 10:00:00")
+    ]})
+    cutoff = records.epoch(records.positions("1")[1])
+
+    evicted = records.evict(max_per_user=5, before_epoch=cutoff)
+    assert [(user_id, entry["message_id"]) for user_id, entry in evicted] == [("1", 10)]
+    evicted = records.evict(max_per_user=1)
+    assert [entry["message_id"] for _, entry in evicted] == [11]
+    assert [entry["message_id"] for entry in records.entries("1")] == [12]
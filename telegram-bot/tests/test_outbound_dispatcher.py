@@ -0,0 +1,89 @@
+import time
+import asyncio
+import pytest
+
+RetryAfter = pytest.importorskip("telegram.error").RetryAfter
+from enforcement import OutboundDispatcher, LANE_DELETE, LANE_ENFORCE, LANE_DM, fan_out
+
+RETRY_AFTER = 0.05
+
+# Panggilan API palsu yang diminta menunggu oleh Telegram sebanyak `failures` kali
+def flaky_call(failures, calls):
+    async def api_call(value):
+        calls.append(time.monotonic())
+        if len(calls) <= failures:
+            raise RetryAfter(RETRY_AFTER)
+        return value
+    return api_call
+
+@pytest.mark.parametrize("started", [True, False])
+def test_retry_after_pauses_and_retries(started):
+    calls = []
+
+    async def scenario():
+        dispatcher = OutboundDispatcher(global_rate=1000, workers=2, max_retries=3)
+        if started:
+            dispatcher.start()
+        result = await dispatcher.call(LANE_ENFORCE, flaky_call(1, calls), "ok")
+        await dispatcher.stop()
+        return result, dispatcher
+
+    result, dispatcher = asyncio.run(scenario())
+    assert result == "ok"
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= RETRY_AFTER * 0.9
+    assert dispatcher.throttled == 1
+
+def test_retry_after_is_raised_after_max_retries():
+    calls = []
+
+    async def scenario():
+        dispatcher = OutboundDispatcher(global_rate=1000, workers=1, max_retries=1)
+        dispatcher.start()
+        try:
+            return await dispatcher.call(LANE_DM, flaky_call(5, calls), "ok")
+        finally:
+            await dispatcher.stop()
+
+    with pytest.raises(RetryAfter):
+        asyncio.run(scenario())
+    assert len(calls) == 2
+
+def test_higher_priority_lane_is_sent_first():
+    order = []
+
+    async def scenario():
+        release = asyncio.Event()
+        dispatcher = OutboundDispatcher(global_rate=1000, workers=1)
+        dispatcher.start()
+
+        async def blocking():
+            await release.wait()
+            order.append("first")
+
+        async def record(name):
+            order.append(name)
+
+        first = asyncio.create_task(dispatcher.call(LANE_ENFORCE, blocking))
+        await asyncio.sleep(0.01)
+        dm = asyncio.create_task(dispatcher.call(LANE_DM, record, "dm"))
+        delete = asyncio.create_task(dispatcher.call(LANE_DELETE, record, "delete"))
+        await asyncio.sleep(0.01)
+        assert dispatcher.queue_depths() == {"delete": 1, "enforce": 0, "warning": 0, "dm": 1}
+        release.set()
+        await asyncio.gather(first, dm, delete)
+        await dispatcher.stop()
+
+    asyncio.run(scenario())
+    assert order == ["first", "delete", "dm"]
+
+def test_fan_out_returns_result_or_exception_per_group():
+    async def action(group_id, group_info):
+        if group_id == "-2":
+            raise RuntimeError(group_info["group_name"])
+        return group_id
+
+    groups = {"-1": {"group_name": "A"}, "-2": {"group_name": "B"}}
+    results = asyncio.run(fan_out(groups.items(), action, max_concurrency=1))
+    assert [(group_id, result) for group_id, _, result in results[:1]] == [("-1", "-1")]
+    assert isinstance(results[1][2], RuntimeError)
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from inference import PredictionBatcher
+
+def test_batch_is_predicted_in_one_call():
+    calls = []
+
+    def predict_batch(texts):
+        calls.append(list(texts))
+        return [text.upper() for text in texts]
+
+    async def scenario():
+        batcher = PredictionBatcher(predict_batch, max_batch_size=8, max_wait_ms=20)
+        results = await asyncio.gather(*(batcher.predict(text) for text in ("a", "b", "c")))
+        await batcher.stop()
+        return results
+
+    assert asyncio.run(scenario()) == ["A", "B", "C"]
+    assert calls == [["a", "b", "c"]]
+
+def test_stop_finishes_partially_collected_batch():
+    async def scenario():
+        batcher = PredictionBatcher(lambda texts: [text.upper() for text in texts], max_batch_size=8, max_wait_ms=5000)
+        await batcher.start()
+        tasks = [asyncio.create_task(batcher.predict(text)) for text in ("a", "b")]
+        # Pesan sudah diambil dari antrian, batcher masih menunggu max_wait saat dihentikan
+        await asyncio.sleep(0.05)
+        assert batcher.queue_depth() == 0
+        await batcher.stop()
+        return await asyncio.wait_for(asyncio.gather(*tasks), 1)
+
+    assert asyncio.run(scenario()) == ["A", "B"]
+
+def test_stop_waits_for_inflight_batch_and_fails_queued_requests():
+    started = threading.Event()
+    release = threading.Event()
+
+    def predict_batch(texts):
+        started.set()
+        release.wait(5)
+        return list(texts)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=1)
+        batcher = PredictionBatcher(predict_batch, max_batch_size=1, max_wait_ms=0, executor=executor, max_pending_batches=1)
+        first = asyncio.create_task(batcher.predict("a"))
+        await loop.run_in_executor(None, started.wait, 5)
+        queued = asyncio.create_task(batcher.predict("b"))
+        await asyncio.sleep(0.01)
+        stopping = asyncio.create_task(batcher.stop())
+        await asyncio.sleep(0.01)
+        release.set()
+        await stopping
+        executor.shutdown()
+        return await asyncio.wait_for(asyncio.gather(first, queued, return_exceptions=True), 1)
+
+    first, queued = asyncio.run(scenario())
+    assert first == "a"
+    assert isinstance(queued, RuntimeError)
@@ -0,0 +1,46 @@
+import prediction_cache
+from prediction_cache import PredictionCache, cache_key, normalize_for_cache
+
+def test_key_ignores_case_spacing_and_url_variants():
+    assert normalize_for_cache("  Daftar   SEKARANG\n https://WWW.Situs.com/Promo/#top ") == "daftar sekarang url:situs.com/promo"
+    assert cache_key("Daftar di https://situs.com/") == cache_key("daftar  di www.situs.com")
+    assert cache_key("Daftar di situs.com") != cache_key("Daftar di situs.net")
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_entries=2)
+    cache.put("a", {"label": 0})
+    cache.put("b", {"label": 1})
+    assert cache.get("A") == {"label": 0}  # "a" jadi paling baru dipakai
+    cache.put("c", {"label": 1})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"label": 0}
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"], stats["evictions"]) == (2, 2, 1, 1)
+
+def test_expired_entry_is_a_miss(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(prediction_cache.time, "time", lambda: now[0])
+    cache = PredictionCache(ttl_seconds=60)
+    cache.put("slot gacor", {"label": 1})
+
+    now[0] += 61
+    assert cache.get("slot gacor") is None
+    assert cache.stats()["expirations"] == 1
+
+def test_cache_survives_restart_without_expired_entries(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(prediction_cache.time, "time", lambda: now[0])
+    path = str(tmp_path / "prediction_cache.json")
+    cache = PredictionCache(ttl_seconds=60, persist_path=path)
+    cache.put("lama", {"label": 0})
+    now[0] += 30
+    cache.put("baru", {"label": 1})
+    cache.save()
+
+    now[0] += 40
+    restored = PredictionCache(ttl_seconds=60, persist_path=path)
+    restored.load()
+    assert restored.get("baru") == {"label": 1}
+    assert restored.get("lama") is None
+    assert restored.stats()["entries"] == 1
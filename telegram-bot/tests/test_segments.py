@@ -0,0 +1,66 @@
+import os
+from segments import DaySegments, UNDATED_SEGMENT
+from storage import JsonStore, default_json_paths
+
+def make_entry(message_id, timestamp, message="pesan"):
+    return {
+        "username": "@user", "name": "User", "group_id": "-100", "group_name": "Grup",
+        "timestamp": timestamp, "message": message, "message_id": message_id
+    }
+
+def test_rows_are_split_per_day_and_read_back(tmp_path):
+    segments = DaySegments(str(tmp_path / "segments"))
+    rows = [
+        ("1", make_entry(10, "2024-05-01 10:00:00")),
+        ("2", make_entry(11, "2024-05-02 09:00:00")),
+        ("1", make_entry(12, ""))
+    ]
+    assert segments.append(rows) == 3
+    # Segmen yang sama bisa ditambah lagi (gzip member baru), duplikat dilewati saat dibaca
+    segments.append(rows[:1])
+
+    assert segments.days() == ["2024-05-01", "2024-05-02", UNDATED_SEGMENT]
+    assert [entry["message_id"] for _, entry in segments.read_day("2024-05-01")] == [10, 10]
+    assert [(user_id, entry["message_id"]) for user_id, entry in segments.iter_rows()] == [("1", 10), ("2", 11), ("1", 12)]
+
+def test_remove_rewrites_only_matching_rows(tmp_path):
+    segments = DaySegments(str(tmp_path / "segments"))
+    segments.append([("1", make_entry(10, "2024-05-01 10:00:00")), ("1", make_entry(11, "2024-05-01 11:00:00"))])
+    segments.remove("1", [make_entry(10, "2024-05-01 10:00:00")])
+    assert [entry["message_id"] for _, entry in segments.iter_rows()] == [11]
+
+def test_archive_moves_old_days_and_keeps_undated(tmp_path):
+    segments = DaySegments(str(tmp_path / "segments"))
+    segments.append([
+        ("1", make_entry(10, "2024-04-01 10:00:00")),
+        ("1", make_entry(11, "2024-05-01 10:00:00")),
+        ("1", make_entry(12, ""))
+    ])
+    archive_dir = str(tmp_path / "arsip")
+
+    assert segments.archive_before("2024-05-01", archive_dir) == ["2024-04-01"]
+    assert segments.days() == ["2024-05-01", UNDATED_SEGMENT]
+    assert [entry["message_id"] for _, entry in DaySegments(archive_dir).iter_rows()] == [10]
+
+    assert segments.archive_before("2024-06-01") == ["2024-05-01"]
+    assert not os.path.exists(segments.path("2024-05-01"))
+
+def test_hot_window_spills_to_segments_and_stays_queryable(tmp_path):
+    store = JsonStore(default_json_paths(str(tmp_path)))
+    log = store.message_log("clean", max_per_user=2)
+    log.load()
+    for message_id, day in ((10, "01"), (11, "02"), (12, "03")):
+        log.append("1", make_entry(message_id, f"2024-05-{day} 10:00:00"))
+    log.close()
+
+    assert [entry["message_id"] for entry in log.data.entries("1")] == [11, 12]
+    assert [entry["message_id"] for _, entry in store._segments("clean").iter_rows()] == [10]
+
+    # Dashboard membaca hot window dan segmen; pesan dari segmen memakai id negatif
+    dashboard = JsonStore(store.paths)
+    messages = dashboard.user_messages("1", "clean")
+    assert [(message["id"], message["message_id"]) for message in messages] == [(-1, 10), (0, 11), (1, 12)]
+    assert dashboard.count_messages("clean") == 3
+
+    assert dashboard.archive_messages("clean", retention_days=1, archive_dir=str(tmp_path / "arsip")) == 1
+    assert list(DaySegments(str(tmp_path / "arsip" / "clean")).iter_rows())[0][1]["message_id"] == 10
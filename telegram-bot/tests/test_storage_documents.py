@@ -0,0 +1,37 @@
+import pytest
+from storage import JsonStore, SQLiteStore, default_json_paths
+
+def banned(username):
+    return {"username": username, "name": username.title(), "date": "2024-05-01", "time": "10:00:00"}
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "json":
+        yield JsonStore(default_json_paths(str(tmp_path)))
+    else:
+        store = SQLiteStore(str(tmp_path / "antijudi.db"))
+        yield store
+        store.close()
+
+def test_bot_item_write_keeps_dashboard_unban(store):
+    store.write_items("banned_users", [("1", banned("satu")), ("2", banned("dua"))])
+    cursor = store.document_cursor("banned_users")
+
+    # Dashboard meng-unban user 1, bot kemudian menulis user 3 saja
+    store.delete_item("banned_users", "1")
+    store.write_items("banned_users", [("3", banned("tiga"))])
+
+    assert sorted(store.load_document("banned_users")) == ["2", "3"]
+    changes, _ = store.document_changes_since("banned_users", cursor)
+    assert changes == [("1", None)]
+
+def test_document_changes_are_read_from_cursor(store):
+    cursor = store.document_cursor("banned_users")
+    store.put_item("banned_users", "1", banned("satu"))
+    changes, cursor = store.document_changes_since("banned_users", cursor)
+    assert changes == [("1", banned("satu"))]
+
+    assert store.document_changes_since("banned_users", cursor) == ([], cursor)
+    store.delete_item("banned_users", "1")
+    changes, _ = store.document_changes_since("banned_users", cursor)
+    assert changes == [("1", None)]
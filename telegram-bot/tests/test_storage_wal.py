@@ -0,0 +1,146 @@
+import os
+import json
+import pytest
+from storage import JsonStore, SQLiteStore, MessageIndex, apply_relabels, default_json_paths
+
+def make_entry(message_id, message="pesan", group_id=-100, timestamp="2024-05-01 10:00:00"):
+    return {
+        "username": "user", "name": "User", "group_id": group_id, "group_name": "Grup",
+        "timestamp": timestamp, "message": message, "message_id": message_id
+    }
+
+def message_ids(records, user_id="1"):
+    return sorted(records.message_id(position) for position in records.positions(user_id))
+
+# Urutan start bot: muat kedua log, lalu putar ulang relabel setelah posisi jurnal yang tersimpan
+def start_bot(store):
+    index = MessageIndex()
+    logs = {"violation": store.message_log("violation", index=index), "clean": store.message_log("clean", index=index)}
+    messages = {kind: log.load() for kind, log in logs.items()}
+    records, cursor = store.relabels_since(store.relabel_cursor())
+    apply_relabels(records, messages, index)
+    return logs, index, cursor
+
+def stop_bot(store, logs, cursor):
+    if all([log.close() for log in logs.values()]):
+        store.save_relabel_cursor(cursor)
+
+@pytest.fixture
+def json_store(tmp_path):
+    return JsonStore(default_json_paths(str(tmp_path)))
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    store = SQLiteStore(str(tmp_path / "antijudi.db"))
+    yield store
+    store.close()
+
+def test_wal_is_replayed_after_crash(json_store):
+    log = json_store.message_log("violation")
+    log.load()
+    log.append("1", make_entry(10))
+    log.append("1", make_entry(11))
+    log.sync()  # bot mati tanpa compaction
+
+    path = json_store.paths["violation"]
+    assert not os.path.exists(path)
+    reloaded = json_store.message_log("violation")
+    assert message_ids(reloaded.load()) == [10, 11]
+
+def test_wal_replay_skips_entries_already_in_snapshot(json_store):
+    log = json_store.message_log("violation")
+    log.load()
+    log.append("1", make_entry(10))
+    log.sync()
+    # Crash setelah snapshot ditulis tetapi sebelum WAL dikosongkan
+    with open(json_store.paths["violation"], "w") as f:
+        json.dump(log.data.to_json(), f)
+
+    reloaded = json_store.message_log("violation")
+    assert message_ids(reloaded.load()) == [10]
+
+def test_compaction_writes_snapshot_and_truncates_wal(json_store):
+    log = json_store.message_log("violation")
+    log.load()
+    log.append("1", make_entry(10))
+    assert log.compact()
+
+    with open(json_store.paths["violation"]) as f:
+        assert [entry["message_id"] for entry in json.load(f)["1"]] == [10]
+    assert os.path.getsize(log.wal_path) == 0
+    log.append("1", make_entry(11))
+    log.close()
+    reloaded = json_store.message_log("violation")
+    assert message_ids(reloaded.load()) == [10, 11]
+
+def test_relabel_while_bot_is_down_survives_restart(json_store):
+    logs, _, cursor = start_bot(json_store)
+    logs["violation"].append("1", make_entry(10))
+    logs["violation"].append("1", make_entry(11))
+    logs["violation"].sync()  # crash: pesan hanya ada di WAL
+
+    dashboard = JsonStore(json_store.paths)
+    moved = dashboard.move_messages("1", "violation", "clean", ids=[0])
+    assert [entry["message_id"] for entry in moved] == [10]
+
+    logs, index, cursor = start_bot(json_store)
+    assert message_ids(logs["violation"].data) == [11]
+    assert message_ids(logs["clean"].data) == [10]
+    assert index.label_of(-100, 10) == "clean"
+
+    # Setelah compaction dan restart normal, relabel tidak diterapkan dua kali
+    stop_bot(json_store, logs, cursor)
+    logs, _, _ = start_bot(json_store)
+    assert message_ids(logs["violation"].data) == [11]
+    assert message_ids(logs["clean"].data) == [10]
+
+def test_relabel_overwritten_by_bot_compaction_is_replayed(json_store):
+    logs, _, cursor = start_bot(json_store)
+    logs["violation"].append("1", make_entry(10))
+    logs["violation"].compact()
+
+    JsonStore(json_store.paths).move_messages("1", "violation", "clean")
+    # Bot menulis snapshot dari memori sebelum relabel diterapkan, lalu mati
+    stop_bot(json_store, logs, cursor)
+
+    logs, _, _ = start_bot(json_store)
+    assert message_ids(logs["violation"].data) == []
+    assert message_ids(logs["clean"].data) == [10]
+
+def test_dashboard_view_applies_pending_relabels(json_store):
+    logs, _, _ = start_bot(json_store)
+    logs["violation"].append("1", make_entry(10))
+    logs["violation"].sync()
+    JsonStore(json_store.paths).move_messages("1", "violation", "clean")
+
+    dashboard = JsonStore(json_store.paths)
+    assert dashboard.count_messages("violation") == 0
+    assert [entry["message_id"] for entry in dashboard.user_messages("1", "clean")] == [10]
+
+def test_sqlite_relabel_cursor_survives_restart(sqlite_store):
+    logs, _, cursor = start_bot(sqlite_store)
+    logs["violation"].append("1", make_entry(10))
+    logs["violation"].sync()
+
+    row_id = sqlite_store.user_messages("1", "violation")[0]["id"]
+    sqlite_store.move_messages("1", "violation", "clean", ids=[row_id])
+
+    logs, index, cursor = start_bot(sqlite_store)
+    assert message_ids(logs["violation"].data) == []
+    assert message_ids(logs["clean"].data) == [10]
+    assert index.label_of(-100, 10) == "clean"
+    stop_bot(sqlite_store, logs, cursor)
+    assert sqlite_store.relabel_cursor() == cursor > 0
+
+def test_apply_relabels_is_idempotent(json_store):
+    logs, _, _ = start_bot(json_store)
+    logs["violation"].append("1", make_entry(10))
+    messages = {kind: log.data for kind, log in logs.items()}
+    record = {"user_id": "1", "group_id": -100, "message_id": 10, "to_kind": "clean", "entry": make_entry(10)}
+    moved = []
+
+    apply_relabels([record], messages, on_move=lambda entry, kind: moved.append(kind))
+    apply_relabels([record], messages, on_move=lambda entry, kind: moved.append(kind))
+    assert message_ids(messages["clean"]) == [10]
+    assert message_ids(messages["violation"]) == []
+    assert moved == ["clean"]
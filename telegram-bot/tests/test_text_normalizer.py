@@ -0,0 +1,32 @@
+from text_normalizer import TextNormalizer, notebook_preprocessing
+from inference import load_text_normalization, save_text_normalization, resolve_text_normalization
+
+SLANG = {"gacor": "mudah menang", "yg": "yang", "bgt": "banget", "be like": "seperti"}
+STOPWORDS = ["yang", "di", "ini"]
+
+def test_single_word_mode_matches_notebook_preprocessing():
+    normalizer = TextNormalizer(SLANG, STOPWORDS, multi_word=False)
+    texts = [
+        "Slot GACOR bgt yg di sini!!! https://situs.com/promo @admin #judi",
+        "Main &amp; menang\nuser123 x 100% be like sultan",
+        "   ",
+        "angka 88 dan kata a b cd"
+    ]
+    for text in texts:
+        assert normalizer.normalize(text) == notebook_preprocessing(text, SLANG, frozenset(STOPWORDS))
+
+def test_multi_word_entries_replace_phrases():
+    normalizer = TextNormalizer(SLANG, STOPWORDS)
+    assert normalizer.normalize("dia be like sultan") == "dia seperti sultan"
+    assert TextNormalizer(SLANG, STOPWORDS, multi_word=False).normalize("dia be like sultan") == "dia be like sultan"
+    assert normalizer.stats()["phrases"] == 1
+
+def test_preprocessing_marker_decides_normalization(tmp_path):
+    model_dir = str(tmp_path)
+    assert load_text_normalization(model_dir) is None
+    # Checkpoint tanpa penanda mengikuti default, argumen --normalize selalu menang
+    assert resolve_text_normalization(None, model_dir) is True
+    save_text_normalization(model_dir, False)
+    assert load_text_normalization(model_dir) is False
+    assert resolve_text_normalization(None, model_dir) is False
+    assert resolve_text_normalization(True, model_dir) is True
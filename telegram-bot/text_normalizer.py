@@ -0,0 +1,240 @@
+import os
+import re
+import csv
+import html
+import time
+import argparse
+import logging
+from model_utils import DEFAULT_DATASET_PATH, load_labelled_dataset, latency_percentiles
+
+DATASETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "datasets")
+DEFAULT_SLANG_PATH = os.path.join(DATASETS_DIR, "kamus_slang.csv")
+DEFAULT_STOPWORD_PATH = os.path.join(DATASETS_DIR, "stopword_id.csv")
+
+# Pembersihan karakter mengikuti preprocessing_data di notebook skenario.
+# Non-ASCII, mention, hashtag, newline dan "user" digabung dalam satu regex (urutannya tidak mengubah hasil),
+# URL dihapus setelahnya karena URL di notebook dicocokkan setelah "user" dihapus.
+CLEANUP_PATTERN = re.compile(r"[^\x00-\x7F]+|[@#]\w+|\n|user", re.ASCII)
+URL_PATTERN = re.compile(r"((www\.[^\s]+)|(https?://[^\s]+)|(http?://[^\s]+))")
+ALPHA_PATTERN = re.compile(r"[a-z]+")
+
+# Automaton Aho-Corasick atas urutan token (bukan karakter) untuk entri slang multi kata seperti "be like"
+class PhraseAutomaton:
+    def __init__(self):
+        self._goto = [{}]      # node -> {token: node berikutnya}
+        self._fail = [0]       # node -> node failure link
+        self._outputs = [()]   # node -> ((panjang frasa, token pengganti), ...)
+        self.phrases = 0
+
+    def add(self, words, replacement):
+        node = 0
+        for word in words:
+            next_node = self._goto[node].get(word)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][word] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append(())
+            node = next_node
+        # Entri duplikat: nilai terakhir yang dipakai (sama seperti dict(zip(...)) di notebook)
+        if not self._outputs[node]:
+            self.phrases += 1
+        self._outputs[node] = ((len(words), replacement),)
+
+    # Menghitung failure link (BFS) dan menggabungkan output dari suffix yang juga merupakan frasa
+    def build(self):
+        queue = [0]
+        for node in queue:
+            for word, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and word not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(word, 0) if node else 0
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+        return self
+
+    # Mengembalikan {posisi awal: (panjang, token pengganti)} dengan frasa terpanjang per posisi awal
+    def find(self, tokens):
+        matches = {}
+        node = 0
+        for position, token in enumerate(tokens):
+            while node and token not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(token, 0)
+            for length, replacement in self._outputs[node]:
+                start = position - length + 1
+                if start not in matches or matches[start][0] < length:
+                    matches[start] = (length, replacement)
+        return matches
+
+# Mesin normalisasi teks (slang + stopword) yang dipakai bersama oleh training dan bot.
+# Setiap token hanya sekali dicari di satu dict: kata slang -> kata baku tanpa stopword, stopword -> ().
+# Dengan multi_word=False hasilnya sama persis dengan preprocessing_data di notebook skenario.
+class TextNormalizer:
+    def __init__(self, slang, stopwords, multi_word=True):
+        self.stopwords = frozenset(stopwords)
+        self.multi_word = multi_word
+        self._lookup = {word: () for word in self.stopwords}
+        self._phrases = PhraseAutomaton()
+        for key, value in slang.items():
+            replacement = tuple(word for word in value.split(" ") if word and word not in self.stopwords)
+            words = ALPHA_PATTERN.findall(key.lower())
+            if " " in key.strip():
+                if multi_word and len(words) > 1:
+                    self._phrases.add(words, replacement)
+            else:
+                self._lookup[key] = replacement
+        self._phrases.build()
+        self.slang_entries = len(slang)
+        self.calls = 0
+        self.total_seconds = 0.0
+
+    @classmethod
+    def load(cls, slang_path=DEFAULT_SLANG_PATH, stopword_path=DEFAULT_STOPWORD_PATH, multi_word=True):
+        slang = {}
+        with open(slang_path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.reader(f):
+                if len(row) >= 2:
+                    slang[row[0]] = row[1]
+        with open(stopword_path, "r", encoding="utf-8") as f:
+            stopwords = [line.strip() for line in f if line.strip()]
+        return cls(slang, stopwords, multi_word=multi_word)
+
+    # Tokenizer: huruf kecil, pembersihan karakter, kata < 2 karakter dibuang, lalu diambil huruf a-z saja
+    @staticmethod
+    def tokenize(text):
+        text = URL_PATTERN.sub(" ", CLEANUP_PATTERN.sub(" ", html.unescape(text.lower())))
+        tokens = []
+        for word in text.split():
+            if len(word) < 2:
+                continue
+            if word.isalpha():
+                tokens.append(word)
+            else:
+                tokens.extend(ALPHA_PATTERN.findall(word))
+        return tokens
+
+    def normalize(self, text):
+        started = time.perf_counter()
+        tokens = self.tokenize(text or "")
+        lookup = self._lookup
+        output = []
+        matches = self._phrases.find(tokens) if self._phrases.phrases and tokens else None
+        if matches:
+            position = 0
+            while position < len(tokens):
+                match = matches.get(position)
+                if match is not None:
+                    output.extend(match[1])
+                    position += match[0]
+                    continue
+                replacement = lookup.get(tokens[position])
+                if replacement is None:
+                    output.append(tokens[position])
+                else:
+                    output.extend(replacement)
+                position += 1
+        else:
+            for token in tokens:
+                replacement = lookup.get(token)
+                if replacement is None:
+                    output.append(token)
+                else:
+                    output.extend(replacement)
+        self.calls += 1
+        self.total_seconds += time.perf_counter() - started
+        return " ".join(output)
+
+    def normalize_batch(self, texts):
+        return [self.normalize(text) for text in texts]
+
+    def stats(self):
+        return {
+            "slang_entries": self.slang_entries,
+            "phrases": self._phrases.phrases,
+            "stopwords": len(self.stopwords),
+            "calls": self.calls,
+            "avg_us": self.total_seconds / self.calls * 1e6 if self.calls else 0.0
+        }
+
+# Normalizer default (kamus di data/datasets), dimuat sekali per proses
+_default_normalizer = None
+
+def get_text_normalizer():
+    global _default_normalizer
+    if _default_normalizer is None:
+        started = time.perf_counter()
+        _default_normalizer = TextNormalizer.load()
+        logging.info(f"Normalizer teks dimuat dalam {(time.perf_counter() - started) * 1000:.1f} ms: {_default_normalizer.stats()}")
+    return _default_normalizer
+
+# Implementasi asli notebook skenario (regex berurutan + split per spasi), hanya untuk cek kesamaan hasil
+def notebook_preprocessing(text, slang, stopwords):
+    text = html.unescape(text.lower())
+    text = re.sub(r'[^\x00-\x7F]+', ' ', text)
+    text = re.sub(r'@\w+', ' ', text)
+    text = re.sub(r'#\w+', ' ', text)
+    text = re.sub(r'\n', ' ', text)
+    text = re.sub(r'user', ' ', text)
+    text = re.sub(r'((www\.[^\s]+)|(https?://[^\s]+)|(http?://[^\s]+))', ' ', text)
+    text = re.sub(' +', ' ', text).strip()
+    text = ' '.join([word for word in text.split() if len(word) >= 2])
+    text = re.sub(r'[^a-zA-Z\s]', ' ', text)
+    text = re.sub(r'(\\x[a-fA-F0-9]{2})+', ' ', text)
+    text = re.sub(r'(\\u[a-fA-F0-9]{4})+', ' ', text)
+    text = ' '.join([slang[word] if word in slang else word for word in text.split(' ')])
+    text = ' '.join(['' if word in stopwords else word for word in text.split(' ')])
+    return re.sub('  +', ' ', text).strip()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark normalisasi slang dan stopword (mikrodetik per pesan)")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET_PATH)
+    parser.add_argument("--slang", default=DEFAULT_SLANG_PATH)
+    parser.add_argument("--stopwords", default=DEFAULT_STOPWORD_PATH)
+    parser.add_argument("--limit", type=int, default=0, help="Jumlah pesan dari dataset (0 = semua)")
+    parser.add_argument("--repeat", type=int, default=3, help="Jumlah pengulangan benchmark batch")
+    parser.add_argument("--no-multi-word", action="store_true", help="Nonaktifkan entri slang multi kata (Aho-Corasick)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    normalizer = TextNormalizer.load(args.slang, args.stopwords, multi_word=not args.no_multi_word)
+    print(f"Normalizer dimuat dalam {(time.perf_counter() - started) * 1000:.1f} ms: {normalizer.stats()}")
+
+    texts, _ = load_labelled_dataset(args.dataset, limit=args.limit or None)
+
+    # Latensi per pesan (p50/p99) dan throughput normalize_batch
+    latencies = []
+    for text in texts:
+        started = time.perf_counter()
+        normalizer.normalize(text)
+        latencies.append((time.perf_counter() - started) * 1000)
+    percentiles = latency_percentiles(latencies)
+    best = None
+    for _ in range(max(1, args.repeat)):
+        started = time.perf_counter()
+        normalizer.normalize_batch(texts)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{len(texts)} pesan: p50 {percentiles['p50_ms'] * 1000:.1f} us, p99 {percentiles['p99_ms'] * 1000:.1f} us, "
+          f"batch {best / len(texts) * 1e6:.1f} us/pesan")
+
+    # Kesamaan hasil dengan preprocessing notebook (tanpa entri multi kata)
+    reference = TextNormalizer.load(args.slang, args.stopwords, multi_word=False)
+    slang = {}
+    with open(args.slang, "r", encoding="utf-8", newline="") as f:
+        for row in csv.reader(f):
+            slang[row[0]] = row[1]
+    stopwords = frozenset(reference.stopwords)
+    started = time.perf_counter()
+    expected = [notebook_preprocessing(text, slang, stopwords) for text in texts]
+    notebook_us = (time.perf_counter() - started) / len(texts) * 1e6
+    same = sum(1 for text, target in zip(texts, expected) if reference.normalize(text) == target)
+    print(f"Preprocessing notebook: {notebook_us:.1f} us/pesan, hasil sama {same}/{len(texts)} ({same / len(texts):.2%})")
+    if normalizer.multi_word:
+        changed = sum(1 for text, target in zip(texts, expected) if normalizer.normalize(text) != target)
+        print(f"Pesan yang berubah karena entri multi kata: {changed}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import logging
+from inference import TorchBackend, save_early_exit_heads, resolve_text_normalization, EARLY_EXIT_HEADS_FILE
+from model_utils import DEFAULT_DATASET_PATH, load_labelled_dataset, classification_metrics
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Fungsi untuk mengambil hidden state token [CLS] dari setiap layer (BERT dibekukan)
+def extract_cls_features(backend, texts, layers, batch_size):
+    import torch
+    features = {layer_index: [] for layer_index in layers}
+    with torch.no_grad():
+        for start in range(0, len(texts), batch_size):
+            chunk = texts[start:start + batch_size]
+            inputs = backend.tokenizer(chunk, return_tensors="pt", padding="longest", truncation=True, max_length=backend.max_length)
+            outputs = backend.model.bert(**inputs, output_hidden_states=True)
+            # hidden_states[0] adalah embedding, hidden_states[i] adalah output layer ke-i
+            for layer_index in layers:
+                features[layer_index].append(outputs.hidden_states[layer_index][:, 0])
+    return {layer_index: torch.cat(chunks) for layer_index, chunks in features.items()}
+
+# Fungsi untuk melatih satu head linear di atas fitur [CLS] sebuah layer
+def train_head(features, labels, hidden_size, epochs, learning_rate):
+    import torch
+    head = torch.nn.Linear(hidden_size, 2)
+    optimizer = torch.optim.AdamW(head.parameters(), lr=learning_rate, weight_decay=0.01)
+    loss_fn = torch.nn.CrossEntropyLoss()
+    targets = torch.tensor(labels)
+    for _ in range(epochs):
+        permutation = torch.randperm(len(targets))
+        for start in range(0, len(targets), 64):
+            index = permutation[start:start + 64]
+            optimizer.zero_grad()
+            loss = loss_fn(head(features[index]), targets[index])
+            loss.backward()
+            optimizer.step()
+    head.eval()
+    return head
+
+def main():
+    parser = argparse.ArgumentParser(description="Melatih head klasifikasi early-exit pada layer tengah IndoBERT")
+    parser.add_argument("--checkpoint", required=True, help="Folder checkpoint IndoBERT (CHECKPOINT_PATH)")
+    parser.add_argument("--output", default=EARLY_EXIT_HEADS_FILE, help="File output head (EARLY_EXIT_HEADS_PATH)")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET_PATH)
+    parser.add_argument("--layers", default="3,6,9", help="Layer yang diberi head, dipisah koma")
+    parser.add_argument("--limit", type=int, default=5000, help="Jumlah sampel dataset (0 = semua)")
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--learning-rate", type=float, default=1e-3)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--threshold", type=float, default=0.95, help="Threshold untuk laporan cakupan early exit")
+    parser.add_argument("--normalize", action=argparse.BooleanOptionalAction, default=None,
+                        help="Normalisasi slang/stopword (default mengikuti preprocessing.json checkpoint)")
+    args = parser.parse_args()
+
+    import torch
+    from sklearn.model_selection import train_test_split
+
+    layers = sorted(int(layer) for layer in args.layers.split(","))
+    texts, labels = load_labelled_dataset(args.dataset, limit=args.limit or None, normalize=resolve_text_normalization(args.normalize, args.checkpoint))
+    X_train, X_test, y_train, y_test = train_test_split(texts, labels, test_size=0.2, random_state=42, stratify=labels)
+
+    backend = TorchBackend(args.checkpoint)
+    hidden_size = backend.model.config.hidden_size
+    train_features = extract_cls_features(backend, X_train, layers, args.batch_size)
+    test_features = extract_cls_features(backend, X_test, layers, args.batch_size)
+
+    heads = {}
+    print(f"{'Layer':>6}{'Akurasi':>10}{'F1':>10}{'Cakupan':>10}{'Akurasi yakin':>15}")
+    for layer_index in layers:
+        head = train_head(train_features[layer_index], y_train, hidden_size, args.epochs, args.learning_rate)
+        heads[layer_index] = head
+
+        with torch.no_grad():
+            probabilities = torch.nn.functional.softmax(head(test_features[layer_index]), dim=-1)
+        predictions = probabilities.argmax(dim=-1).tolist()
+        confident = (probabilities.max(dim=-1).values >= args.threshold).tolist()
+        confident_pairs = [(t, p) for t, p, c in zip(y_test, predictions, confident) if c]
+        metrics = classification_metrics(y_test, predictions)
+        confident_accuracy = classification_metrics(*zip(*confident_pairs))["accuracy"] if confident_pairs else 0.0
+        print(
+            f"{layer_index:>6}{metrics['accuracy']:>10.4f}{metrics['f1']:>10.4f}"
+            f"{len(confident_pairs) / len(y_test):>10.2%}{confident_accuracy:>15.4f}"
+        )
+
+    save_early_exit_heads(args.output, heads, hidden_size)
+    print(f"Head early-exit disimpan di {args.output}")
+
+if __name__ == "__main__":
+    main()